@@ -0,0 +1,70 @@
+"""Benchmark of scoring, ranking and flagging the SourceRank breakdowns of many projects, aggregating the
+nested dicts in Python loops against the structured array of `pybraries.analytics`.
+
+Run with: python benchmarks/bench_analytics.py [projects]
+"""
+import bisect
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pybraries.analytics import SOURCERANK_FACTORS, from_breakdowns, load_array, rank, save_array
+
+
+def breakdowns(projects: int):
+    """random breakdowns, in the shape libraries.io returns them"""
+    rng = random.Random(7)
+    for index in range(projects):
+        sourcerank = {factor: rng.randint(-1, 5) for factor in SOURCERANK_FACTORS}
+        usage = {"*": rng.randint(0, 500), ">= 1.0": rng.randint(0, 100)}
+        yield ("pypi", f"project-{index}"), sourcerank, usage
+
+
+def with_loops(records, weights):
+    """the scores, percentiles and outliers computed over the dicts"""
+    scores = {
+        pair: sum(weights.get(factor, 1.0) * sourcerank.get(factor, 0) for factor in SOURCERANK_FACTORS)
+        for pair, sourcerank, _ in records
+    }
+    ordered = sorted(scores.values())
+    first, third = ordered[len(ordered) // 4], ordered[3 * len(ordered) // 4]
+    spread = 1.5 * (third - first)
+    ranked = []
+    for pair, score in scores.items():
+        below = bisect.bisect_right(ordered, score)
+        outlier = score < first - spread or score > third + spread
+        ranked.append((pair, score, below * 100.0 / len(ordered), outlier))
+    return sorted(ranked, key=lambda row: -row[1])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(projects: int = 5000):
+    records = list(breakdowns(projects))
+    weights = {"stars": 2.0, "dependent_projects": 3.0}
+
+    loops, _ = timed(lambda: with_loops(records, weights))
+    build, data = timed(lambda: from_breakdowns(records))
+    vectorized, _ = timed(lambda: rank(data, weights))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sourcerank.npy")
+        save, _ = timed(lambda: save_array(data, path))
+        load, _ = timed(lambda: load_array(path))
+
+    print(f"{projects} projects")
+    print(f"  python loops    : {loops * 1000:8.1f} ms")
+    print(f"  build the array : {build * 1000:8.1f} ms")
+    print(f"  vectorized rank : {vectorized * 1000:8.1f} ms")
+    print(f"  save .npy       : {save * 1000:8.1f} ms")
+    print(f"  load .npy       : {load * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
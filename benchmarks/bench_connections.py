@@ -0,0 +1,52 @@
+"""Benchmark of the connections opened by a burst of concurrent requests, with the default pool, a pool sized
+for the workers and a warmed up pool; the fake server delays every new connection to stand for the handshakes.
+
+Run with: python benchmarks/bench_connections.py [requests] [workers] [handshake]
+"""
+import sys
+import time
+
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+def run(requests: int, workers: int, handshake: float, pool_maxsize: int, warm: bool):
+    """the connections opened, the first burst and the total seconds of the requests"""
+    LibIOSession.set_connection_pool(pool_maxsize=pool_maxsize)
+    with FakeLibrariesIO(latency=0.005, connect_latency=handshake) as fake:
+        LibIOSession.set_api_url(fake.url)
+        LibIOSession.get_session(force_create=True)
+        if warm:
+            LibIOSession.warm_up()
+        names = [("pypi", f"project-{i}") for i in range(requests)]
+
+        start = time.perf_counter()
+        Search.map("project", names[:workers], workers=workers)
+        first = time.perf_counter() - start
+        Search.map("project", names[workers:], workers=workers)
+        total = time.perf_counter() - start
+        return fake.connections_opened, first, total
+
+
+def main(requests: int = 640, workers: int = 32, handshake: float = 0.02):
+    LibIOSession.set_key(LibIOSession._LIBRARIES_API_KEY or "benchmark-key")  # pylint: disable=protected-access
+    LibIOSession.set_rate_limit(None)
+    LibIOSession.set_coalescing(False)
+
+    print(f"{requests} requests, {workers} workers, {handshake * 1000:.0f} ms handshakes")
+    for label, pool_maxsize, warm in (
+        ("default pool (10)", 10, False),
+        (f"pool_maxsize={workers}", workers, False),
+        (f"pool_maxsize={workers} + warm_up", workers, True),
+    ):
+        connections, first, total = run(requests, workers, handshake, pool_maxsize, warm)
+        print(
+            f"  {label:28s}: {connections:4d} connections, first burst {first * 1000:7.1f} ms,"
+            f" total {total * 1000:7.1f} ms"
+        )
+    LibIOSession.set_connection_pool()
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if "." in arg else int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Benchmark of the per-response CPU time of the JSON decoders on large project_dependents payloads.
+
+Run with: python benchmarks/bench_decode.py [pages] [per_page]
+"""
+import json
+import sys
+import time
+
+from requests.models import Response
+
+
+def dependents_payload(per_page: int = 100, versions: int = 40) -> bytes:
+    """builds a project_dependents page shaped like the libraries.io responses"""
+    projects = []
+    for i in range(per_page):
+        projects.append(
+            {
+                "name": f"dependent-{i}",
+                "platform": "Pypi",
+                "description": "A package that depends on the benchmarked project " * 3,
+                "homepage": f"https://github.com/owner-{i}/dependent-{i}",
+                "repository_url": f"https://github.com/owner-{i}/dependent-{i}",
+                "normalized_licenses": ["MIT"],
+                "keywords": ["data", "science", "analytics"],
+                "language": "Python",
+                "stars": i * 7,
+                "forks": i * 3,
+                "rank": i % 30,
+                "dependents_count": i * 11,
+                "dependent_repos_count": i * 13,
+                "latest_release_number": f"{i}.0.0",
+                "latest_release_published_at": "2022-04-01T12:00:00.000Z",
+                "versions": [
+                    {"number": f"{i}.{v}.0", "published_at": "2021-01-01T00:00:00.000Z", "spdx_expression": "MIT"}
+                    for v in range(versions)
+                ],
+            }
+        )
+    return json.dumps(projects).encode()
+
+
+def requests_json(body: bytes):
+    """the previous decoding path, going through requests.Response.json"""
+    resp = Response()
+    resp._content = body  # pylint: disable=protected-access
+    resp.encoding = "utf-8"
+    return resp.json()
+
+
+def decoders():
+    """yields the name and function of every decoder available"""
+    yield "requests .json()", requests_json
+    yield "json.loads", json.loads
+    try:
+        import orjson
+
+        yield "orjson.loads", orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        yield "msgspec.json.decode", msgspec.json.decode
+    except ImportError:
+        pass
+    yield "raw (memoryview)", memoryview
+
+
+def main(pages: int = 200, per_page: int = 100):
+    body = dependents_payload(per_page)
+    print(f"payload: {len(body) / 1024:.0f} KiB per response, {pages} responses")
+    for name, decode in decoders():
+        start = time.process_time()
+        for _ in range(pages):
+            decode(body)
+        elapsed = time.process_time() - start
+        print(f"{name:>22}: {elapsed / pages * 1000:8.3f} ms CPU per response")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
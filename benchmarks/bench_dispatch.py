@@ -0,0 +1,53 @@
+"""Benchmark of the per-call client overhead of the search actions when the responses are cached.
+
+Run with: python benchmarks/bench_dispatch.py [calls]
+"""
+import sys
+import time
+
+from pybraries.endpoints import ENDPOINTS
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+def per_call_us(func, calls: int) -> float:
+    """the mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(calls: int = 100000):
+    LibIOSession.set_key(LibIOSession._LIBRARIES_API_KEY or "benchmark-key")  # pylint: disable=protected-access
+    LibIOSession.set_rate_limit(None)
+    LibIOSession.set_cache()
+    endpoint = ENDPOINTS["project_dependencies"]
+
+    with FakeLibrariesIO() as fake:
+        LibIOSession.set_api_url(fake.url)
+        # prime the cache, every call below is a cache hit
+        Search.project("pypi", "plotly")
+        Search.project_dependencies("pypi", "plotly", "5.6.0")
+        Search.project_search(keywords="plot", sort="stars")
+
+        results = {
+            "endpoint url + params": per_call_us(
+                lambda: (endpoint.url(("pypi", "plotly"), {"version": "5.6.0"}), endpoint.params({})), calls
+            ),
+            "Search.project": per_call_us(lambda: Search.project("pypi", "plotly"), calls),
+            "Search.project_dependencies": per_call_us(
+                lambda: Search.project_dependencies("pypi", "plotly", "5.6.0"), calls
+            ),
+            "Search.project_search": per_call_us(lambda: Search.project_search(keywords="plot", sort="stars"), calls),
+        }
+        served = fake.requests_served
+
+    print(f"{calls} cache hits per action, {served} requests served")
+    for name, elapsed in results.items():
+        print(f"  {name:28s}: {elapsed:6.2f} us/call")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,57 @@
+"""Benchmark of the peak memory of exporting a large result set, streamed or built as a list first;
+tracing the allocations slows every run down, compare the peaks rather than the times.
+
+Run with: python benchmarks/bench_export.py [items]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pybraries.export import export_search
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+def measure(func):
+    """the seconds and the peak traced megabytes of a call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(items: int = 5000):
+    LibIOSession.set_key(LibIOSession._LIBRARIES_API_KEY or "benchmark-key")  # pylint: disable=protected-access
+    LibIOSession.set_rate_limit(None)
+
+    def as_list(path):
+        with open(path, "w", encoding="utf8") as handle:
+            for record in list(Search.iter_project_dependents("pypi", "plotly")):
+                handle.write(json.dumps(record) + "\n")
+
+    with FakeLibrariesIO(total_items=items) as fake, tempfile.TemporaryDirectory() as tmp:
+        LibIOSession.set_api_url(fake.url)
+        results = {"list then jsonl": measure(lambda: as_list(os.path.join(tmp, "list.jsonl")))}
+        for extension in ("jsonl", "csv", "parquet"):
+            path = os.path.join(tmp, f"export.{extension}")
+            try:
+                results[f"streamed {extension}"] = measure(
+                    lambda: export_search("project_dependents", path, "pypi", "plotly")
+                )
+            except ImportError as err:
+                print(f"skipping {extension}: {err}")
+
+    print(f"{items} project dependents")
+    for name, (elapsed, peak) in results.items():
+        print(f"  {name:16s}: {elapsed * 1000:8.1f} ms, peak {peak:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
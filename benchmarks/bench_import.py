@@ -0,0 +1,39 @@
+"""Benchmark of the cold import time of pybraries, each run in a fresh interpreter.
+
+Run with: python benchmarks/bench_import.py [runs] [budget_ms]
+The script exits with an error if the median import time of the package exceeds the budget.
+"""
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import pybraries": "import pybraries",
+    "from pybraries import Search": "from pybraries import Search",
+    "first session (requests)": "from pybraries import LibIOSession; LibIOSession.get_session()",
+    "import requests": "import requests",
+}
+
+
+def cold_import_ms(statement: str, runs: int) -> float:
+    """median wall time of the statement in a fresh interpreter, minus the interpreter start up"""
+    timer = "import time; start = time.perf_counter(); {}; print((time.perf_counter() - start) * 1000)"
+    samples = [
+        float(subprocess.run([sys.executable, "-c", timer.format(statement)], capture_output=True, check=True).stdout)
+        for _ in range(runs)
+    ]
+    return statistics.median(samples)
+
+
+def main(runs: int = 15, budget_ms: float = 0.0):
+    results = {name: cold_import_ms(statement, runs) for name, statement in STATEMENTS.items()}
+    print(f"median of {runs} cold imports")
+    for name, elapsed in results.items():
+        print(f"  {name:30s}: {elapsed:8.1f} ms")
+
+    if budget_ms and results["import pybraries"] > budget_ms:
+        sys.exit(f"import pybraries took {results['import pybraries']:.1f} ms, over the {budget_ms:.1f} ms budget")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if "." in arg else int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,36 @@
+"""Benchmark of the memory held by project_dependents pages as plain dicts and as slotted models.
+
+Run with: python benchmarks/bench_models.py [pages]
+"""
+import json
+import sys
+import tracemalloc
+
+from bench_decode import dependents_payload
+
+from pybraries.models import to_models
+
+
+def held_memory(pages: int, as_models: bool) -> int:
+    """decodes the pages and returns the bytes still allocated while they are held"""
+    body = dependents_payload()
+    tracemalloc.start()
+    held = []
+    for _ in range(pages):
+        resp = json.loads(body)
+        held.append(to_models("project_dependents", resp) if as_models else resp)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main(pages: int = 20):
+    as_dicts = held_memory(pages, as_models=False)
+    as_models = held_memory(pages, as_models=True)
+    print(f"{pages} pages of 100 dependents")
+    print(f"  dicts : {as_dicts / 2**20:8.1f} MiB")
+    print(f"  models: {as_models / 2**20:8.1f} MiB ({100 * (1 - as_models / as_dicts):.0f}% less)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Benchmark of a slow consumer of a huge dependents listing: when the fetching ends, and how much the resident
+memory grows, for the listing collected as a list, iterated page by page and streamed with a memory cap.
+
+The runs grow the peak resident memory in turn, from the smallest to the largest, so each one is measured as
+its growth over the peak of the ones before.
+
+Run with: python benchmarks/bench_spill.py [items] [max_memory]
+"""
+import resource
+import sys
+import time
+
+from pybraries import spill
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+def consume(items):
+    """a consumer slower than the fetching, e.g. a downstream join"""
+    count = 0
+    for count, _ in enumerate(items, 1):
+        if count % 500 == 0:
+            time.sleep(0.1)
+    return count
+
+
+def peak_rss() -> float:
+    """the peak resident memory of the process, in megabytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def main(items: int = 20000, max_memory: int = 1024 * 1024):
+    LibIOSession.set_key(LibIOSession._LIBRARIES_API_KEY or "benchmark-key")  # pylint: disable=protected-access
+    LibIOSession.set_rate_limit(None)
+    queues = []
+
+    class RecordedQueue(spill.SpillQueue):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            queues.append(self)
+
+    spill.SpillQueue = RecordedQueue
+
+    runs = (
+        ("stream, spilling", lambda: Search.stream_project_dependents("pypi", "numpy", max_memory=max_memory)),
+        ("iter_ (2 pages)", lambda: Search.iter_project_dependents("pypi", "numpy")),
+        ("list then consume", lambda: list(Search.iter_project_dependents("pypi", "numpy"))),
+    )
+    print(f"{items} project dependents, a slow consumer, {max_memory / 1e6:.1f} MB memory cap")
+    with FakeLibrariesIO(total_items=items) as fake:
+        LibIOSession.set_api_url(fake.url)
+        route = fake.route
+        fetched = []
+
+        def timed_route(method, parts, query):
+            fetched.append(time.perf_counter())
+            return route(method, parts, query)
+
+        fake.route = timed_route
+        for name, listing in runs:
+            fetched.clear()
+            before = peak_rss()
+            start = time.perf_counter()
+            count = consume(listing())
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {name:18s}: {count} items, fetched in {(fetched[-1] - start) * 1000:7.1f} ms,"
+                f" consumed in {elapsed * 1000:7.1f} ms, peak RSS +{max(peak_rss() - before, 0):6.1f} MB"
+            )
+
+    queue = queues[-1]
+    print(
+        f"  the stream kept at most {queue.peak_memory / 1e6:.1f} MB of pages in memory"
+        f" and spilled {queue.spilled_records} pages ({queue.spilled_bytes / 1e6:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
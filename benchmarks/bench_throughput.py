@@ -0,0 +1,50 @@
+"""Benchmark of the request throughput against the local fake libraries.io server, no network involved.
+
+Run with: python benchmarks/bench_throughput.py [requests] [latency] [workers]
+"""
+import sys
+import time
+
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+def main(requests: int = 200, latency: float = 0.02, workers: int = 8):
+    LibIOSession.set_key(LibIOSession._LIBRARIES_API_KEY or "benchmark-key")  # pylint: disable=protected-access
+    LibIOSession.set_rate_limit(None)
+    names = [("pypi", f"project-{i}") for i in range(requests)]
+
+    with FakeLibrariesIO(latency=latency) as fake:
+        LibIOSession.set_api_url(fake.url)
+
+        start = time.perf_counter()
+        for args in names:
+            Search.project(*args)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Search.map("project", names, workers=workers)
+        parallel = time.perf_counter() - start
+
+    with FakeLibrariesIO(latency=latency, total_items=2000) as fake:
+        LibIOSession.set_api_url(fake.url)
+
+        start = time.perf_counter()
+        list(Search.iter_project_dependents("pypi", "plotly"))
+        paged = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Search.project_dependents("pypi", "plotly", limit=2000)
+        fanned_out = time.perf_counter() - start
+
+    print(f"{requests} requests, {latency * 1000:.0f} ms server latency")
+    print(f"  sequential     : {requests / sequential:8.1f} req/s")
+    print(f"  map({workers:2d} workers): {requests / parallel:8.1f} req/s")
+    print("2000 dependents, 20 pages")
+    print(f"  iter_ (prefetch): {paged * 1000:8.1f} ms")
+    print(f"  limit=2000      : {fanned_out * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if "." in arg else int(arg) for arg in sys.argv[1:]))
@@ -1,12 +1,58 @@
-"""Module that imports helpers"""
+"""Module that imports helpers
+
+The public names are imported on first access (PEP 562), so that importing the package does not pay
+for the HTTP stack or the optional dependencies of the modules that are never used.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# `make_request` shares its name with its module, import it eagerly so that importing the submodule
+# later on does not shadow the function; it is cheap as it only imports the HTTP stack when called
 from .make_request import make_request
-from .pagination import fix_pages
-from .search import Search
-from .search_helpers import search_api
-from .remote_sess import LibIOSession
-from .subscribe import Subscribe
-from .subscription_helpers import sub_api
-from .errors import APIKeyMissingError, SessionNotInitialisedError
+
+# the public names and the modules that define them
+_LAZY_ATTRS = {
+    "LibIOSession": ".remote_sess",
+    "fix_pages": ".pagination",
+    "Search": ".search",
+    "search_api": ".search_helpers",
+    "Subscribe": ".subscribe",
+    "sub_api": ".subscription_helpers",
+    "APIKeyMissingError": ".errors",
+    "SessionNotInitialisedError": ".errors",
+    "LibrariesIOError": ".errors",
+    "NotFoundError": ".errors",
+    "RateLimitedError": ".errors",
+    "ServerError": ".errors",
+    "RequestTimeoutError": ".errors",
+    "ConnectionFailedError": ".errors",
+    "CircuitOpenError": ".errors",
+    "AsyncLibIOSession": ".async_client",
+    "AsyncSearch": ".async_client",
+    "AsyncSubscribe": ".async_client",
+    "CircuitBreaker": ".circuit_breaker",
+    "KeyPool": ".key_pool",
+    "SingleFlight": ".single_flight",
+    "SpillQueue": ".spill",
+    "stream_search": ".spill",
+    "TokenBucket": ".rate_limit",
+    "FileTokenBucket": ".rate_limit",
+    "ResponseCache": ".cache",
+    "DependencyGraph": ".dependency_graph",
+    "Crawler": ".crawler",
+    "export_search": ".export",
+    "ReleaseWatcher": ".release_watcher",
+    "SubscriptionIndex": ".subscription_index",
+    "Project": ".models",
+    "Version": ".models",
+    "Repository": ".models",
+    "User": ".models",
+    "Dependency": ".models",
+    "RecordingTransport": ".transport",
+    "ReplayTransport": ".transport",
+    "RequestEvent": ".metrics",
+    "RequestMetrics": ".metrics",
+}
 
 __all__ = [
     "LibIOSession",
@@ -18,4 +64,84 @@ __all__ = [
     "sub_api",
     "APIKeyMissingError",
     "SessionNotInitialisedError",
+    "LibrariesIOError",
+    "NotFoundError",
+    "RateLimitedError",
+    "ServerError",
+    "RequestTimeoutError",
+    "ConnectionFailedError",
+    "CircuitOpenError",
+    "AsyncLibIOSession",
+    "AsyncSearch",
+    "AsyncSubscribe",
+    "CircuitBreaker",
+    "KeyPool",
+    "SingleFlight",
+    "SpillQueue",
+    "stream_search",
+    "TokenBucket",
+    "FileTokenBucket",
+    "ResponseCache",
+    "DependencyGraph",
+    "Crawler",
+    "export_search",
+    "ReleaseWatcher",
+    "SubscriptionIndex",
+    "Project",
+    "Version",
+    "Repository",
+    "User",
+    "Dependency",
+    "RecordingTransport",
+    "ReplayTransport",
+    "RequestEvent",
+    "RequestMetrics",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value  # later accesses do not go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .async_client import AsyncLibIOSession, AsyncSearch, AsyncSubscribe
+    from .cache import ResponseCache
+    from .circuit_breaker import CircuitBreaker
+    from .crawler import Crawler
+    from .dependency_graph import DependencyGraph
+    from .export import export_search
+    from .errors import (
+        APIKeyMissingError,
+        CircuitOpenError,
+        ConnectionFailedError,
+        LibrariesIOError,
+        NotFoundError,
+        RateLimitedError,
+        RequestTimeoutError,
+        ServerError,
+        SessionNotInitialisedError,
+    )
+    from .key_pool import KeyPool
+    from .metrics import RequestEvent, RequestMetrics
+    from .models import Dependency, Project, Repository, User, Version
+    from .pagination import fix_pages
+    from .rate_limit import FileTokenBucket, TokenBucket
+    from .release_watcher import ReleaseWatcher
+    from .remote_sess import LibIOSession
+    from .search import Search
+    from .search_helpers import search_api
+    from .single_flight import SingleFlight
+    from .spill import SpillQueue, stream_search
+    from .subscribe import Subscribe
+    from .subscription_helpers import sub_api
+    from .subscription_index import SubscriptionIndex
+    from .transport import RecordingTransport, ReplayTransport
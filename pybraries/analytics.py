@@ -0,0 +1,278 @@
+"""Module that implements the batch SourceRank and usage analytics of many projects.
+
+The breakdowns of the projects are collected into a NumPy structured array, one row per project and one
+column per SourceRank factor, so scoring, ranking and flagging thousands of projects are array operations.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from pybraries.search_helpers import search_api
+
+try:
+    import numpy
+    from numpy.lib import recfunctions
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# the factors of the SourceRank breakdown of libraries.io, in the order of the columns
+SOURCERANK_FACTORS = (
+    "basic_info_present",
+    "repository_present",
+    "readme_present",
+    "license_present",
+    "versions_present",
+    "follows_semver",
+    "recent_release",
+    "not_brand_new",
+    "is_1_or_greater",
+    "dependent_projects",
+    "dependent_repositories",
+    "stars",
+    "contributors",
+    "subscribers",
+    "all_prereleases",
+    "any_outdated_dependencies",
+    "is_deprecated",
+    "is_unmaintained",
+    "is_removed",
+)
+
+# the columns summarising the usage breakdown, requirement -> number of dependents
+USAGE_COLUMNS = ("usage_total", "usage_unpinned", "usage_requirements")
+
+# the requirement of the dependents that accept any version
+UNPINNED = "*"
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("The analytics require numpy, install it using: pip install pybraries[analytics]")
+
+
+def _dtype(width_platform: int, width_name: int) -> "numpy.dtype":
+    """the row type, the strings are fixed width so that the arrays are saved without pickling"""
+    return numpy.dtype(
+        [("platform", f"U{max(width_platform, 1)}"), ("name", f"U{max(width_name, 1)}"), ("fetched", "?")]
+        + [(factor, "f8") for factor in SOURCERANK_FACTORS]
+        + [("sourcerank", "f8")]
+        + [(column, "f8") for column in USAGE_COLUMNS]
+    )
+
+
+def _row(platform: str, name: str, sourcerank: Optional[Mapping], usage: Optional[Mapping]) -> Tuple:
+    """the row of a project, the factors and usage of a failed lookup are NaN"""
+    if sourcerank is None or usage is None:
+        return (platform, name, False) + (numpy.nan,) * (len(SOURCERANK_FACTORS) + 1 + len(USAGE_COLUMNS))
+    factors = tuple(float(sourcerank.get(factor) or 0) for factor in SOURCERANK_FACTORS)
+    counts = [count for count in usage.values() if isinstance(count, (int, float))]
+    return (
+        (platform, name, True)
+        + factors
+        + (sum(factors), float(sum(counts)), float(usage.get(UNPINNED) or 0), float(len(counts)))
+    )
+
+
+def to_array(rows: Sequence[Tuple]) -> "numpy.ndarray":
+    """
+    Build the structured array of the rows of the projects.
+
+    Args:
+        rows (Sequence[Tuple]): the rows, as built from the breakdowns or read from another array.
+    Returns:
+        numpy.ndarray: the structured array, with the platform, name, fetched, factor and usage columns.
+    """
+    _require_numpy()
+    dtype = _dtype(max((len(row[0]) for row in rows), default=1), max((len(row[1]) for row in rows), default=1))
+    return numpy.array(rows, dtype=dtype)
+
+
+def from_breakdowns(breakdowns: Iterable[Tuple[Tuple[str, str], Optional[Mapping], Optional[Mapping]]]):
+    """
+    Build the structured array of already fetched breakdowns.
+
+    Args:
+        breakdowns (Iterable): the ((platform, name), sourcerank, usage) tuples, the breakdowns of a failed
+            lookup are None.
+    Returns:
+        numpy.ndarray: the structured array, one row per project.
+    """
+    _require_numpy()
+    return to_array([_row(platform, name, sourcerank, usage) for (platform, name), sourcerank, usage in breakdowns])
+
+
+# pylint: disable=broad-except
+def _fetch(pair: Tuple[str, str]) -> Tuple:
+    """the row of a project, fetching its SourceRank and usage breakdowns"""
+    try:
+        sourcerank = search_api("project_sourcerank", *pair, raise_errors=True)
+        usage = search_api("project_usage", *pair, raise_errors=True)
+    except Exception:
+        return _row(*pair, None, None)
+    return _row(*pair, sourcerank, usage)
+
+
+def save_array(data: "numpy.ndarray", path: str):
+    """
+    Save a structured array to a .npy file, atomically so that a reader never sees a partial file.
+
+    Args:
+        data (numpy.ndarray): the structured array.
+        path (str): the .npy file.
+    """
+    _require_numpy()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as handle:
+        numpy.save(handle, data, allow_pickle=False)
+    os.replace(tmp, path)
+
+
+def load_array(path: str, mmap: bool = False) -> "numpy.ndarray":
+    """
+    Load a structured array saved by `save_array`.
+
+    Args:
+        path (str): the .npy file.
+        mmap (bool): map the file in memory instead of reading it.
+    Returns:
+        numpy.ndarray: the structured array.
+    """
+    _require_numpy()
+    return numpy.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+
+def collect(pairs: Iterable[Tuple[str, str]], concurrency: int = 8, cache: Optional[str] = None) -> "numpy.ndarray":
+    """
+    Fetch the SourceRank and usage breakdowns of many projects into a structured array.
+
+    Args:
+        pairs (Iterable[Tuple[str, str]]): the (platform, name) pairs of the projects, duplicates are fetched once.
+        concurrency (int): the number of projects fetched at a time.
+        cache (Optional[str]): a .npy file the array is saved to; the projects already fetched in it are
+            reused, only the missing and previously failed ones are fetched.
+    Returns:
+        numpy.ndarray: the structured array, one row per project in the order of the pairs; the factor and
+            usage columns of the projects that failed to fetch (see the "fetched" column) are NaN.
+    """
+    _require_numpy()
+    pairs = list(dict.fromkeys((platform.lower(), name) for platform, name in pairs))
+
+    rows: Dict[Tuple[str, str], Tuple] = {}
+    if cache and os.path.exists(cache):
+        rows = {(row[0], row[1]): row for row in load_array(cache).tolist() if row[2]}
+
+    missing = [pair for pair in pairs if pair not in rows]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        rows.update(zip(missing, pool.map(_fetch, missing)))
+
+    data = to_array([rows[pair] for pair in pairs])
+    if cache and missing:
+        save_array(to_array(list(rows.values())), cache)
+    return data
+
+
+def factor_matrix(data: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Get the SourceRank factors as a 2d float array.
+
+    Args:
+        data (numpy.ndarray): the structured array.
+    Returns:
+        numpy.ndarray: a (projects, factors) array, the columns in the order of `SOURCERANK_FACTORS`.
+    """
+    _require_numpy()
+    return recfunctions.structured_to_unstructured(data[list(SOURCERANK_FACTORS)], dtype="f8")
+
+
+def weighted_scores(data: "numpy.ndarray", weights: Optional[Mapping[str, float]] = None) -> "numpy.ndarray":
+    """
+    Score the projects by a weighted sum of their SourceRank factors.
+
+    Args:
+        data (numpy.ndarray): the structured array.
+        weights (Optional[Mapping[str, float]]): the weight of each factor, 1 for the factors not given;
+            with no weights the score is the SourceRank.
+    Returns:
+        numpy.ndarray: the score of each project, NaN for the projects that failed to fetch.
+    """
+    _require_numpy()
+    weights = weights or {}
+    unknown = set(weights) - set(SOURCERANK_FACTORS)
+    if unknown:
+        raise ValueError(f"Unknown SourceRank factors: {', '.join(sorted(unknown))}")
+    vector = numpy.array([weights.get(factor, 1.0) for factor in SOURCERANK_FACTORS], dtype="f8")
+    return factor_matrix(data) @ vector
+
+
+def percentile_ranks(values: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Rank values by percentile, the percentage of the values lower or equal to each.
+
+    Args:
+        values (numpy.ndarray): the values, e.g. the scores or a column of the structured array.
+    Returns:
+        numpy.ndarray: the percentile, from 0 to 100, of each value, NaN for the NaN values.
+    """
+    _require_numpy()
+    values = numpy.asarray(values, dtype="f8")
+    valid = numpy.sort(values[~numpy.isnan(values)])
+    ranks = numpy.full(values.shape, numpy.nan)
+    if valid.size:
+        present = ~numpy.isnan(values)
+        ranks[present] = numpy.searchsorted(valid, values[present], side="right") * 100.0 / valid.size
+    return ranks
+
+
+def outlier_flags(values: "numpy.ndarray", k: float = 1.5) -> "numpy.ndarray":
+    """
+    Flag the outliers of values by Tukey's fences, the values further than `k` interquartile ranges
+    below the first or above the third quartile.
+
+    Args:
+        values (numpy.ndarray): the values, e.g. the scores or a column of the structured array.
+        k (float): the width of the fences, in interquartile ranges.
+    Returns:
+        numpy.ndarray: a bool array, True for the outliers; NaN values are never outliers.
+    """
+    _require_numpy()
+    values = numpy.asarray(values, dtype="f8")
+    present = ~numpy.isnan(values)
+    if not present.any():
+        return numpy.zeros(values.shape, dtype=bool)
+    first, third = numpy.percentile(values[present], [25, 75])
+    spread = k * (third - first)
+    with numpy.errstate(invalid="ignore"):
+        return (values < first - spread) | (values > third + spread)
+
+
+def rank(data: "numpy.ndarray", weights: Optional[Mapping[str, float]] = None, k: float = 1.5) -> "numpy.ndarray":
+    """
+    Score, rank and flag the projects of a structured array.
+
+    Args:
+        data (numpy.ndarray): the structured array.
+        weights (Optional[Mapping[str, float]]): the weight of each factor, see `weighted_scores`.
+        k (float): the width of the outlier fences, see `outlier_flags`.
+    Returns:
+        numpy.ndarray: a structured array with the platform, name, score, percentile and outlier of each
+            project, sorted by descending score.
+    """
+    _require_numpy()
+    scores = weighted_scores(data, weights)
+    ranked = numpy.empty(
+        data.shape,
+        dtype=[
+            ("platform", data.dtype["platform"]),
+            ("name", data.dtype["name"]),
+            ("score", "f8"),
+            ("percentile", "f8"),
+            ("outlier", "?"),
+        ],
+    )
+    ranked["platform"] = data["platform"]
+    ranked["name"] = data["name"]
+    ranked["score"] = scores
+    ranked["percentile"] = percentile_ranks(scores)
+    ranked["outlier"] = outlier_flags(scores, k)
+    # NaN scores sort last
+    return ranked[numpy.argsort(-scores, kind="stable")]
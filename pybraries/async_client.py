@@ -0,0 +1,676 @@
+"""Module that implements the asyncio counterparts of the Search and Subscribe clients."""
+import asyncio
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from pybraries.cache import ResponseCache
+from pybraries.endpoints import ENDPOINTS
+from pybraries.errors import (
+    DEGRADED_ERRORS,
+    ConnectionFailedError,
+    LibrariesIOError,
+    NotFoundError,
+    RateLimitedError,
+    RequestTimeoutError,
+    error_for_status,
+    redact_keys,
+)
+from pybraries.key_pool import ACCOUNT_ENDPOINTS
+from pybraries.metrics import RequestEvent
+from pybraries.pagination import fix_pages
+from pybraries.rate_limit import retry_after_seconds
+from pybraries.remote_sess import LibIOSession
+from pybraries.subscription_helpers import handle_sub_path
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+def _is_private(endpoint: str) -> bool:
+    """whether the response belongs to the subscription key of the key pool only, it is neither cached nor shared"""
+    return endpoint in ACCOUNT_ENDPOINTS and LibIOSession.get_key_pool() is not None
+
+
+class AsyncSingleFlight:
+    """
+    Class that runs a single call per key at a time across the coroutines of an event loop, the asyncio
+    counterpart of `pybraries.single_flight.SingleFlight`.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Function that awaits `func()`, unless a call of the same key is in flight, whose outcome is shared.
+
+        Args:
+            key (Hashable): the key identifying the call.
+            func (Callable[[], Awaitable[Any]]): the call.
+        Returns:
+            Any: the result of the call.
+        """
+        future = self._flights.get(key)
+        if future is not None:
+            # a waiting coroutine being cancelled does not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            future.exception()  # retrieved, the error is not logged when nobody waits for it
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._flights[key]
+        return result
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+class AsyncLibIOSession:
+    """
+    Class that implements the pooled asyncio session shared by the async clients.
+    """
+
+    def __init__(self, api_key: str = "", limit: int = 100, limit_per_host: int = 0):
+        """
+        Args:
+            api_key (str): The api key to use, if not already set.
+            limit (int): the maximum number of simultaneous connections in the pool.
+            limit_per_host (int): the maximum number of simultaneous connections per host, 0 means no limit.
+        """
+        if aiohttp is None:
+            raise ImportError("The async clients require aiohttp, install it using: pip install pybraries[async]")
+
+        if api_key:
+            LibIOSession.set_key(api_key)
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._sess: Optional["aiohttp.ClientSession"] = None
+        # the identical GET requests in flight, shared by the coroutines making them
+        self._flights = AsyncSingleFlight()
+
+    def get_session(self) -> "aiohttp.ClientSession":
+        """
+        Function that fetches the pooled session, creating it within the running event loop if needed.
+
+        Returns:
+            aiohttp.ClientSession: returns the instantiated session.
+        """
+        if self._sess is None or self._sess.closed:
+            # the keep-alive and the timeouts follow the synchronous session
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                force_close=not LibIOSession.get_connection_pool()["keep_alive"],
+            )
+            connect, read = LibIOSession.get_timeout() or (None, None)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+            self._sess = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._sess
+
+    async def close(self):
+        """
+        Function that closes the pooled session along with its connections.
+        """
+        if self._sess is not None and not self._sess.closed:
+            await self._sess.close()
+        self._sess = None
+
+    # pylint: disable=broad-except
+    async def make_request(
+        self,
+        url: str,
+        kind: str,
+        params: Optional[Dict] = None,
+        endpoint: str = "",
+        raw: bool = False,
+        raise_errors: bool = False,
+    ) -> Any:
+        """Call api server, failing the same way as the synchronous `make_request`
+
+        Args:
+            url (str): base url to call
+            kind (str): get, post, put, or delete
+            params (Optional[Dict]): the query parameters of this call
+            endpoint (str): the endpoint name (e.g. "project"), used to pick the cache time to live and
+                to report the request event
+            raw (bool): return the undecoded response body as bytes
+            raise_errors (bool): raise the `LibrariesIOError` of a failed request instead of printing it and
+                returning an empty string
+        Returns:
+            `json` encoded response from libraries.io, or its body bytes if raw is set
+        """
+        params = {} if params is None else dict(params)
+        if LibIOSession.get_key_pool() is None:
+            params["api_key"] = LibIOSession.get_key()
+        if kind == "post":
+            params["include_prerelease"] = "False"
+        fix_pages(params=params)  # Must be called before any request for page validation
+        params = {key: str(value) for key, value in params.items()}
+
+        try:
+            if kind != "get" or LibIOSession.get_single_flight() is None or _is_private(endpoint):
+                return await self._send(url, kind, params, endpoint, raw)
+            return await self._coalesced(ResponseCache.make_key(kind, url, params, raw), url, params, endpoint, raw)
+        except LibrariesIOError as err:
+            if raise_errors:
+                raise
+            print(f"{'HTTP' if err.status is not None else 'Other'} error occurred: {err}")
+        except Exception as err:
+            if raise_errors:
+                raise
+            print(f"Other error occurred: {redact_keys(str(err))}")
+
+        return ""
+
+    async def _coalesced(self, key: Hashable, url: str, params: Dict, endpoint: str, raw: bool) -> Any:
+        """
+        Function that sends a GET request, or waits for the identical one in flight and shares its outcome;
+        the waiting coroutines report a "coalesced" request event.
+        """
+        sent = False
+
+        async def send() -> Any:
+            nonlocal sent
+            sent = True
+            return await self._send(url, "get", params, endpoint, raw)
+
+        event = RequestEvent(endpoint or url, "get")
+        event.cache = "coalesced"
+        start = perf_counter()
+        try:
+            return await self._flights.do(key, send)
+        except Exception as err:
+            event.error = redact_keys(str(err))
+            raise
+        finally:
+            if not sent:
+                event.queue_wait = perf_counter() - start
+                LibIOSession.emit(event)
+
+    async def _send(self, url: str, kind: str, params: Dict, endpoint: str, raw: bool) -> Any:
+        """
+        Function that sends a request, or serves it from the cache, and reports its request event;
+        the failed requests raise a `LibrariesIOError`.
+        """
+        event = RequestEvent(endpoint or url, kind)
+        # serve fresh responses from the shared cache, stale ones are revalidated with a conditional request
+        cache = LibIOSession.get_cache() if not _is_private(endpoint) else None
+        cache_key = cache.make_key(kind, url, params, raw) if cache is not None and kind == "get" else None
+        entry = cache.get(cache_key) if cache_key is not None else None
+        if entry is not None and entry.is_fresh():
+            event.cache = "hit"
+            LibIOSession.emit(event)
+            return entry.value
+        event.cache = "miss" if cache_key is not None else None
+        headers = entry.validators() if entry is not None else {}
+
+        # honour the same retry configuration as the synchronous session
+        retry = LibIOSession.get_retry_config()
+        breaker = LibIOSession.get_circuit_breaker()
+        circuit = None
+        degraded = False
+        try:
+            # shed the requests of a failing endpoint before they spend a token
+            if breaker is not None:
+                breaker.before(event.endpoint)
+                circuit = event.endpoint
+            pool = LibIOSession.get_key_pool()
+            limiter = LibIOSession.get_rate_limiter()
+            for attempt in range(retry.total + 1):
+                event.attempts = attempt + 1
+                if pool is not None:
+                    # the key with the most budget left, its own bucket takes the place of the session rate limiter
+                    api_key, limiter, wait = pool.reserve(account=endpoint in ACCOUNT_ENDPOINTS)
+                    params = dict(params, api_key=api_key)
+                    event.queue_wait += wait
+                    await asyncio.sleep(wait)
+                elif limiter is not None:
+                    wait = limiter.reserve()
+                    event.queue_wait += wait
+                    await asyncio.sleep(wait)
+                start = perf_counter()
+                try:
+                    async with self.get_session().request(kind.upper(), url, params=params, headers=headers) as resp:
+                        event.status = resp.status
+                        if limiter is not None:
+                            limiter.update_from_headers(resp.headers)
+                        if resp.status in retry.status_forcelist and attempt < retry.total:
+                            event.network_time += perf_counter() - start
+                            await asyncio.sleep(retry.backoff_factor * (2**attempt))
+                            continue
+                        if entry is not None and resp.status == 304:
+                            event.network_time += perf_counter() - start
+                            event.cache = "revalidated"
+                            cache.refresh(cache_key, endpoint)
+                            return entry.value
+                        error = error_for_status(
+                            resp.status,
+                            url,
+                            resp.reason or "",
+                            retry_after=retry_after_seconds(resp.headers) if resp.status == 429 else None,
+                            response=resp,
+                        )
+                        if error is not None:
+                            if isinstance(error, RateLimitedError):
+                                if pool is not None:
+                                    pool.cool_down(limiter, error.retry_after)
+                                elif error.retry_after and limiter is not None:
+                                    limiter.pause(error.retry_after)
+                            raise error
+                        body = await resp.read()
+                # the errors of aiohttp may quote the url along with the API key, they are not chained
+                except asyncio.TimeoutError as err:
+                    raise RequestTimeoutError(redact_keys(f"Request timed out: {err}"), url) from None
+                except aiohttp.ClientConnectionError as err:
+                    raise ConnectionFailedError(redact_keys(f"Connection failed: {err}"), url) from None
+                event.network_time += perf_counter() - start
+                event.bytes = len(body)
+                start = perf_counter()
+                ret = body if raw or not body else LibIOSession.get_decoder()(body)
+                event.decode_time = perf_counter() - start
+                break
+
+            if cache_key is not None:
+                cache.put(
+                    cache_key,
+                    ret,
+                    len(body),
+                    endpoint,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                )
+            elif cache is not None:
+                # writes change what the collection they belong to returns
+                cache.invalidate(url.rsplit("/", 2)[0])
+        except LibrariesIOError as err:
+            event.error = str(err)
+            degraded = isinstance(err, DEGRADED_ERRORS)
+            raise
+        except Exception as err:
+            event.error = redact_keys(str(err))
+            # the request failed before libraries.io answered it
+            degraded = event.status is None
+            raise
+        finally:
+            if circuit is not None:
+                (breaker.record_failure if degraded else breaker.record_success)(circuit)
+            LibIOSession.emit(event)
+
+        return ret
+
+
+class _AsyncClient:
+    """
+    Base class of the async clients which handles the session lifetime.
+    """
+
+    def __init__(self, session: Optional[AsyncLibIOSession] = None):
+        """
+        Args:
+            session (Optional[AsyncLibIOSession]): the session to use, pass the same one to share its pool.
+        """
+        self.session = AsyncLibIOSession() if session is None else session
+
+    async def close(self):
+        """
+        Function that closes the underlying session.
+        """
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncSearch(_AsyncClient):
+    """Class for wrapping the libraries.io API for
+    platform, project, repo, and user GET actions using asyncio"""
+
+    async def _search_api(self, action, *args, **kwargs) -> Any:
+        """
+        build and call for search, the async counterpart of `search_api`.
+        """
+        raw = kwargs.pop("raw", False)
+        endpoint = ENDPOINTS[action]
+        url = endpoint.url(args, kwargs)
+        return await self.session.make_request(url, endpoint.method, endpoint.params(kwargs), endpoint=action, raw=raw)
+
+    async def platforms(self, raw: bool = False) -> Any:
+        """
+        Return a list of supported package managers.
+
+        Args:
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of platforms with platform info from libraries.io.
+        """
+        return await self._search_api("platforms", raw=raw)
+
+    async def project(self, platforms: str, name: str, raw: bool = False) -> Any:
+        """
+        Return information about a project and its versions from a platform (e.g. PyPI).
+
+        Args:
+            platforms: package manager (e.g. "pypi").
+            name: project name.
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dictionaries with information about the project from libraries.io.
+        """
+        return await self._search_api("project", platforms, name, raw=raw)
+
+    async def project_dependencies(self, platforms: str, project: str, version: str = None, raw: bool = False) -> Any:
+        """
+        Get dependencies for a version of a project.
+
+        Args:
+            platforms: package manager (e.g. "pypi").
+            project: project name.
+            version: (optional) project version
+            raw: return the undecoded response body as bytes
+        Returns:
+            Dict of dependencies for a version of a project from libraries.io.
+        """
+        return await self._search_api("project_dependencies", platforms, project, version=version, raw=raw)
+
+    async def project_dependents(self, platforms: str, project: str, version: str = None, raw: bool = False) -> Any:
+        """
+        Get projects that have at least one version that depends on a given project.
+
+        Args:
+            platforms: package manager (e.g. "pypi").
+            project: project name
+            version: project version
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts project dependents from libraries.io.
+        """
+        return await self._search_api("project_dependents", platforms, project, version=version, raw=raw)
+
+    async def project_dependent_repositories(self, platforms: str, project: str, raw: bool = False) -> Any:
+        """
+        Get repositories that depend on a given project.
+
+        Args:
+            platforms: package manager (e.g. "pypi")
+            project: project name
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of dependent repositories from libraries.io.
+        """
+        return await self._search_api("project_dependent_repositories", platforms, project, raw=raw)
+
+    async def project_contributors(self, platforms: str, project: str, raw: bool = False) -> Any:
+        """
+        Get users that have contributed to a given project.
+
+        Args:
+            platforms: package manager
+            project: project name
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of project contributor info from libraries.io.
+        """
+        return await self._search_api("project_contributors", platforms, project, raw=raw)
+
+    async def project_sourcerank(self, platforms: str, project: str, raw: bool = False) -> Any:
+        """
+        Get breakdown of SourceRank score for a given project.
+
+        Args:
+            platforms: package manager
+            project: project name
+            raw: return the undecoded response body as bytes
+        Returns:
+            Dict of sourcerank info response from libraries.io.
+        """
+        return await self._search_api("project_sourcerank", platforms, project, raw=raw)
+
+    async def project_usage(self, platforms: str, project: str, raw: bool = False) -> Any:
+        """
+        Get breakdown of usage for a given project.
+
+        Args:
+            platforms: package manager
+            project: project name
+            raw: return the undecoded response body as bytes
+        Returns:
+            Dict with info about usage from libraries.io.
+        """
+        return await self._search_api("project_usage", platforms, project, raw=raw)
+
+    async def project_search(self, **kwargs) -> Any:
+        """
+        Search for projects, see `Search.project_search` for the accepted keyword arguments (including raw).
+
+        Returns:
+            List of dicts of project info from libraries.io.
+        """
+        return await self._search_api("special_project_search", **kwargs)
+
+    async def repository(self, host: str, owner: str, repo: str, raw: bool = False) -> Any:
+        """
+        Return information about a repository and its versions.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            owner: owner
+            repo: repo
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of info about a repository from libraries.io.
+        """
+        return await self._search_api("repository", host, owner, repo, raw=raw)
+
+    async def repository_dependencies(self, host: str, owner: str, repo: str, raw: bool = False) -> Any:
+        """
+        Return information about a repository's dependencies.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            owner: owner
+            repo: repo
+            raw: return the undecoded response body as bytes
+        Returns:
+            Dict of repo dependency info from libraries.io.
+        """
+        return await self._search_api("repository_dependencies", host, owner, repo, raw=raw)
+
+    async def repository_projects(self, host: str, owner: str, repo: str, raw: bool = False) -> Any:
+        """
+        Get a list of projects referencing the given repository.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            owner: owner
+            repo: repo
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of projects referencing a repo from libraries.io.
+        """
+        return await self._search_api("repository_projects", host, owner, repo, raw=raw)
+
+    async def user(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return information about a user.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            Dict of info about user from libraries.io.
+        """
+        return await self._search_api("user", host, user, raw=raw)
+
+    async def user_repositories(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return information about a user's repos.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts with info about user repos from libraries.io.
+        """
+        return await self._search_api("user_repositories", host, user, raw=raw)
+
+    async def user_projects(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return information about projects using a user's repos.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts of project info from libraries.io.
+        """
+        return await self._search_api("user_projects", host, user, raw=raw)
+
+    async def user_projects_contributions(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return information about projects a user has contributed to.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts with user project contribution info from libraries.io.
+        """
+        return await self._search_api("user_projects_contributions", host, user, raw=raw)
+
+    async def user_repository_contributions(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return information about repositories a user has contributed to.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            (list): list of dicts response from libraries.io
+        """
+        return await self._search_api("user_repositories_contributions", host, user, raw=raw)
+
+    async def user_dependencies(self, host: str, user: str, raw: bool = False) -> Any:
+        """
+        Return a list of unique user's repositories' dependencies.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            raw: return the undecoded response body as bytes
+        Returns:
+            List of dicts with user project dependency info.
+        """
+        return await self._search_api("user_dependencies", host, user, raw=raw)
+
+
+class AsyncSubscribe(_AsyncClient):
+    """Class for libraries.io API for changing user's libraries.io subscriptions using asyncio"""
+
+    async def list_subscribed(self) -> Any:
+        """
+        Return a list of packages a user is subscribed to for release notifications.
+
+        Returns:
+            Dict with info for each package subscribed to at libraries.io.
+        """
+        return await self.session.make_request(handle_sub_path(), "get", endpoint="list_subscribed")
+
+    async def subscribe(self, manager: str, package: str) -> str:
+        """
+        Subscribe to receive notifications about new releases of a project.
+
+        Args:
+            manager: package manager name (e.g. PyPI).
+            package: package name.
+        Returns:
+            Subscription confirmation message.
+        """
+        resp = await self.session.make_request(handle_sub_path(manager, package), "post", endpoint="subscribe")
+        index = LibIOSession.get_subscription_index()
+        if index is not None and resp:
+            index.update(manager, package, subscribed=True)
+        return "Successfully Subscribed"
+
+    async def check_subscribed(self, manager: str, package: str) -> bool:
+        """
+        Check if a user is subscribed to notifications for new project releases.
+
+        The check is answered without a request when the local subscription index is enabled,
+        see `LibIOSession.set_subscription_index`.
+
+        Args:
+            manager: package manager name (e.g. PyPI).
+            package: package name.
+        Returns:
+            True if subscribed to the package indicated, else False.
+        """
+        index = LibIOSession.get_subscription_index()
+        if index is not None:
+            return (manager, package) in index
+        return bool(
+            await self.session.make_request(handle_sub_path(manager, package), "get", endpoint="check_subscribed")
+        )
+
+    async def update_subscribe(self, manager: str, package: str, include_prerelease: bool = True) -> str:
+        """
+        NOT IMPLEMENTED due to possible bug in libraries.io
+        Update the options for a subscription.
+
+        Args:
+            manager: package manager name (e.g. PyPI).
+            package: package name.
+            include_prerelease (bool): default = True. Include prerelease notifications.
+
+        Returns:
+            Update confirmation message.
+        """
+        await self.session.make_request(handle_sub_path(manager, package), "put", endpoint="update_subscribe")
+        return "include_prerelease is always set to true"
+
+    async def unsubscribe(self, manager: str, package: str) -> str:
+        """
+        Stop receiving release notifications from a project.
+
+        Args:
+            manager: package manager name (e.g. PyPI).
+            package: package name.
+
+        Returns:
+            Message confirming deleted or deletion unnecessary.
+        """
+        # a single round trip, libraries.io answers 404 if there is no subscription to delete
+        try:
+            await self.session.make_request(
+                handle_sub_path(manager, package), "delete", endpoint="delete_subscribe", raise_errors=True
+            )
+            msg = "Successfully Unsubscribed"
+        except NotFoundError:
+            msg = f"Unsubscribe unnecessary. You are not subscribed to {package}."
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Other error occurred: {err}")
+            return f"Unsubscribe failed: {err}"
+        index = LibIOSession.get_subscription_index()
+        if index is not None:
+            index.update(manager, package, subscribed=False)
+        return msg
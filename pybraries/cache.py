@@ -0,0 +1,200 @@
+"""Module that implements the in-memory response cache of the libraries.io requests."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+# the default time to live of the cached responses, per endpoint, in seconds
+DEFAULT_TTLS = {
+    "platforms": 24 * 3600,
+    "project": 900,
+    "project_sourcerank": 3600,
+    "project_usage": 3600,
+    "project_contributors": 3600,
+    "repository": 900,
+    "user": 3600,
+    "list_subscribed": 60,
+    "check_subscribed": 60,
+}
+
+
+class CacheEntry:
+    """
+    Class that holds a cached response along with its validators.
+    """
+
+    __slots__ = ("value", "size", "etag", "last_modified", "expires")
+
+    def __init__(self, value: Any, size: int, etag: Optional[str], last_modified: Optional[str], expires: float):
+        self.value = value
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    def is_fresh(self) -> bool:
+        """
+        Function that checks if the entry can be served without contacting the server.
+
+        Returns:
+            bool: True if the entry has not expired yet.
+        """
+        return time.monotonic() < self.expires
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Function that returns the conditional request headers used to revalidate the entry.
+
+        Returns:
+            Dict[str, str]: the If-None-Match and If-Modified-Since headers, if available.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Class that implements a thread-safe LRU response cache bounded by entry count and bytes, whose
+    entries expire after a per-endpoint time to live; cached values are shared and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 300.0,
+        ttls: Optional[Mapping[str, float]] = None,
+    ):
+        """
+        Args:
+            max_entries (int): the maximum number of cached responses.
+            max_bytes (int): the maximum total size of the cached response bodies.
+            default_ttl (float): the time to live of the endpoints not present in `ttls`, in seconds.
+            ttls (Optional[Mapping[str, float]]): time to live overrides per endpoint (e.g. "project_sourcerank").
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, url: str, params: Mapping, raw: bool = False) -> Hashable:
+        """
+        Function that builds the cache key of a request, the API key is never part of it.
+
+        Args:
+            kind (str): get, post, put, or delete
+            url (str): the url of the request
+            params (Mapping): the query parameters of the request
+            raw (bool): whether the undecoded body is requested
+
+        Returns:
+            Hashable: the cache key.
+        """
+        return kind, url, tuple(sorted((str(k), str(v)) for k, v in params.items() if k != "api_key")), raw
+
+    def ttl_for(self, endpoint: str) -> float:
+        """
+        Function that returns the time to live of an endpoint.
+
+        Args:
+            endpoint (str): the endpoint name (e.g. "project").
+
+        Returns:
+            float: the time to live, in seconds.
+        """
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Function that fetches an entry, fresh or not, marking it as recently used.
+
+        Args:
+            key (Hashable): the cache key.
+
+        Returns:
+            Optional[CacheEntry]: the entry if present, None otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            # expired entries are only worth keeping if they can be revalidated
+            if not entry.is_fresh() and not (entry.etag or entry.last_modified):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        size: int,
+        endpoint: str = "",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        Function that stores a response, evicting the least recently used entries to stay within bounds.
+
+        Args:
+            key (Hashable): the cache key.
+            value (Any): the decoded response.
+            size (int): the size of the response body, in bytes.
+            endpoint (str): the endpoint name, used to pick the time to live.
+            etag (Optional[str]): the ETag header of the response.
+            last_modified (Optional[str]): the Last-Modified header of the response.
+        """
+        if size > self.max_bytes:
+            return
+
+        entry = CacheEntry(value, size, etag, last_modified, time.monotonic() + self.ttl_for(endpoint))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def refresh(self, key: Hashable, endpoint: str = ""):
+        """
+        Function that extends the life of a revalidated entry (e.g. after a 304 response).
+
+        Args:
+            key (Hashable): the cache key.
+            endpoint (str): the endpoint name, used to pick the time to live.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl_for(endpoint)
+
+    def invalidate(self, url_prefix: str = ""):
+        """
+        Function that drops the entries whose url starts with the given prefix, all of them by default.
+
+        Args:
+            url_prefix (str): the url prefix of the entries to drop.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[1].startswith(url_prefix)]:
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        """
+        Function that removes an entry, if present; the lock must be held by the caller.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
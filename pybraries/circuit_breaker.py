@@ -0,0 +1,116 @@
+"""Module that implements the per endpoint circuit breaker of the libraries.io requests."""
+import threading
+import time
+from typing import Callable, Dict
+
+from pybraries.errors import CircuitOpenError
+
+# the states of a circuit
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class _Circuit:
+    """
+    Class that keeps the state of the circuit of an endpoint.
+    """
+
+    __slots__ = ("failures", "opened_at", "trial")
+
+    def __init__(self):
+        # the consecutive failures, the time the circuit opened and whether the trial request is in flight
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+
+class CircuitBreaker:
+    """
+    Class that fails the requests of an endpoint fast once it kept failing: after `failure_threshold`
+    consecutive failures the circuit opens and its requests raise `CircuitOpenError` for `cooldown` seconds,
+    then a single trial request is let through, closing the circuit if it succeeds and reopening it otherwise.
+    """
+
+    def __init__(
+        self, failure_threshold: int = 5, cooldown: float = 30.0, clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            failure_threshold (int): the consecutive failures that open the circuit of an endpoint.
+            cooldown (float): the seconds an open circuit fails the requests before letting a trial one through.
+            clock (Callable[[], float]): the clock the cooldown is measured with.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before(self, endpoint: str):
+        """
+        Function that checks whether a request to the endpoint may be sent.
+
+        Args:
+            endpoint (str): the endpoint name (e.g. "project").
+        Raises:
+            CircuitOpenError: if the circuit of the endpoint is open.
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return
+            remaining = circuit.opened_at + self.cooldown - self.clock()
+            if remaining <= 0 and not circuit.trial:
+                circuit.trial = True
+                return
+            failures = circuit.failures
+        raise CircuitOpenError(
+            f"Circuit open for {endpoint} after {failures} consecutive failures", endpoint, max(remaining, 0.0)
+        )
+
+    def record_success(self, endpoint: str):
+        """
+        Function that records a request to the endpoint answered by libraries.io, closing its circuit.
+
+        Args:
+            endpoint (str): the endpoint name.
+        """
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str):
+        """
+        Function that records a failed request to the endpoint, opening its circuit after too many of them.
+
+        Args:
+            endpoint (str): the endpoint name.
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            if circuit.trial or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = self.clock()
+                circuit.trial = False
+
+    def state(self, endpoint: str) -> str:
+        """
+        Function that returns the state of the circuit of an endpoint.
+
+        Args:
+            endpoint (str): the endpoint name.
+        Returns:
+            str: "closed", "open" or "half-open" once the cooldown is over.
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return CLOSED
+            return OPEN if self.clock() - circuit.opened_at < self.cooldown else HALF_OPEN
+
+    def reset(self):
+        """
+        Function that closes every circuit.
+        """
+        with self._lock:
+            self._circuits.clear()
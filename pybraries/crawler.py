@@ -0,0 +1,363 @@
+"""Module that implements the process pool crawler of the user and repository dependencies.
+
+The tasks are sharded across worker processes, each with its own session, which share the rate budget
+through a file locked token bucket. The results are written to a JSON lines or SQLite sink as they arrive,
+and a crawl writing to an existing sink resumes from the tasks it has not completed yet.
+"""
+import json
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pybraries.remote_sess import LibIOSession
+from pybraries.search_helpers import iter_search_api, search_api
+
+# a crawl task is the search action followed by its arguments, e.g. ("user_repositories", "github", "andylamp")
+Task = Tuple[str, ...]
+
+# the actions a crawl is made of, and whether their results span several pages
+ACTIONS = {"user_dependencies": True, "user_repositories": True, "repository_dependencies": False}
+
+
+class JsonlSink:
+    """
+    Class that appends the crawl records to a JSON lines file, one record per line.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): the file the records are appended to.
+        """
+        self.path = path
+        self._truncate_partial_line()
+        self._handle = open(path, "a", encoding="utf8")  # pylint: disable=consider-using-with
+
+    def _truncate_partial_line(self):
+        """drops the last line if a crash left it half written"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as handle:
+            data = handle.read()
+            if data and not data.endswith(b"\n"):
+                handle.truncate(data.rfind(b"\n") + 1)
+
+    def completed(self) -> Iterator[Dict]:
+        """
+        Function that reads back the successful records written so far.
+
+        Returns:
+            Iterator[Dict]: the decoded records.
+        """
+        with open(self.path, "r", encoding="utf8") as handle:
+            for line in handle:
+                record = json.loads(line)
+                if record["error"] is None:
+                    yield record
+
+    def write(self, task: Task, line: str, ok: bool):
+        """
+        Function that writes a record, flushing it so a crash loses nothing already reported.
+
+        Args:
+            task (Task): the task of the record.
+            line (str): the JSON encoded record.
+            ok (bool): whether the task succeeded.
+        """
+        self._handle.write(line + "\n")
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class SqliteSink:
+    """
+    Class that stores the crawl records in a SQLite database, keyed by task; a task that is crawled
+    again replaces its previous record.
+    """
+
+    def __init__(self, path: str, commit_every: int = 100):
+        """
+        Args:
+            path (str): the database file.
+            commit_every (int): the number of records written per transaction.
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (task TEXT PRIMARY KEY, action TEXT, ok INTEGER, record TEXT)"
+        )
+        self._conn.commit()
+
+    def completed(self) -> Iterator[Dict]:
+        """
+        Function that reads back the successful records written so far.
+
+        Returns:
+            Iterator[Dict]: the decoded records.
+        """
+        for (record,) in self._conn.execute("SELECT record FROM results WHERE ok = 1"):
+            yield json.loads(record)
+
+    def write(self, task: Task, line: str, ok: bool):
+        """
+        Function that writes a record, committing every `commit_every` records.
+
+        Args:
+            task (Task): the task of the record.
+            line (str): the JSON encoded record.
+            ok (bool): whether the task succeeded.
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (json.dumps(task), task[0], int(ok), line)
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+def open_sink(path: str):
+    """
+    Open the sink of a crawl, picked by the file extension.
+
+    Args:
+        path (str): the output file, SQLite for the .db, .sqlite and .sqlite3 extensions and JSON lines otherwise.
+    Returns:
+        JsonlSink or SqliteSink: the opened sink.
+    """
+    if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+
+def follow_up(task: Task, result) -> List[Task]:
+    """
+    Build the tasks a successful task leads to, i.e. the dependencies of the repositories of a user.
+
+    Args:
+        task (Task): the finished task.
+        result: its result.
+    Returns:
+        List[Task]: the follow up tasks.
+    """
+    if task[0] != "user_repositories":
+        return []
+    host = task[1]
+    return [
+        ("repository_dependencies", host, *repo["full_name"].split("/", 1))
+        for repo in result
+        if "/" in (repo.get("full_name") or "")
+    ]
+
+
+def _init_worker(
+    key: Optional[str],
+    pool_settings: Optional[Dict],
+    api_url: str,
+    retry_config,
+    timeout: Optional[Tuple],
+    rate: Optional[float],
+    per: float,
+    lock_file: Optional[str],
+):
+    """
+    Configure the session of a worker process; the same settings work with the fork and spawn start methods.
+    """
+    LibIOSession.set_api_url(api_url)
+    LibIOSession.set_retry(retry_config)
+    LibIOSession.set_timeout(*(timeout or (None, None)))
+    if pool_settings is not None:
+        # every key keeps its own budget, shared by the workers through the lock files
+        if rate is not None:
+            pool_settings = dict(pool_settings, rate=rate, per=per, lock_file=lock_file)
+        LibIOSession.set_key_pool(**pool_settings)
+    else:
+        LibIOSession.set_key_pool(None)
+        LibIOSession.set_key(key)
+        LibIOSession.set_rate_limit(rate, per, lock_file=lock_file)
+    LibIOSession.set_cache(None)
+    LibIOSession.get_session(force_create=True)
+
+
+# pylint: disable=broad-except
+def _run_task(task: Task, follow: bool) -> Tuple[Task, str, bool, List[Task]]:
+    """
+    Run a crawl task in a worker process, the decoding and encoding of the results happens in the worker.
+    """
+    action, *args = task
+    try:
+        if ACTIONS[action]:
+            result = list(iter_search_api(action, *args, raise_errors=True))
+        else:
+            result = search_api(action, *args, raise_errors=True)
+        error = None
+    except Exception as err:
+        result, error = None, f"{type(err).__name__}: {err}"
+
+    line = json.dumps({"task": task, "result": result, "error": error})
+    return task, line, error is None, follow_up(task, result) if follow and error is None else []
+
+
+class Crawler:
+    """
+    Class that implements the sharded crawl of the user and repository dependencies over a pool of processes.
+    """
+
+    def __init__(
+        self,
+        sink: str,
+        processes: int = 4,
+        rate: Optional[float] = 60,
+        per: float = 60.0,
+        lock_file: Optional[str] = None,
+        follow_repositories: bool = False,
+    ):
+        """
+        Args:
+            sink (str): the output file, see `open_sink`; an existing one is resumed.
+            processes (int): the number of worker processes.
+            rate (Optional[float]): the requests allowed every `per` seconds across all the workers, per API key when
+                the session has a key pool; None disables rate limiting, or keeps the rate and lock file of the key
+                pool of the session if it has one.
+            per (float): the rate limit window, in seconds.
+            lock_file (Optional[str]): the file holding the shared rate budget, defaults to the sink file with a
+                .ratelimit suffix; crawls using the same file share their budget.
+            follow_repositories (bool): also crawl the dependencies of the repositories found for each user.
+        """
+        self.sink = sink
+        self.processes = processes
+        self.rate = rate
+        self.per = per
+        self.lock_file = lock_file or f"{sink}.ratelimit"
+        self.follow_repositories = follow_repositories
+
+    @staticmethod
+    def tasks_for(users: Iterable[str] = (), repositories: Iterable[str] = (), host: str = "github") -> List[Task]:
+        """
+        Build the tasks of the users and the repositories to crawl.
+
+        Args:
+            users: the user names, crawled for their dependencies and repositories.
+            repositories: the repositories as "owner/repo", crawled for their dependencies.
+            host: the repository host (e.g. "github").
+        Returns:
+            List[Task]: the crawl tasks.
+        """
+        tasks: List[Task] = []
+        for user in users:
+            tasks += [("user_dependencies", host, user), ("user_repositories", host, user)]
+        for repository in repositories:
+            tasks.append(("repository_dependencies", host, *repository.split("/", 1)))
+        return tasks
+
+    def run(self, tasks: Iterable[Task]) -> Dict[str, int]:
+        """
+        Crawl the tasks, skipping the ones the sink already holds a successful record of.
+
+        Args:
+            tasks: the tasks to crawl, see `tasks_for`.
+        Returns:
+            Dict[str, int]: the number of tasks that succeeded, failed and were skipped as already done.
+        """
+        sink = open_sink(self.sink)
+        stats = {"succeeded": 0, "failed": 0, "skipped": 0}
+        queue, seen = deque(), set()
+
+        def enqueue(task: Task):
+            if task not in seen:
+                seen.add(task)
+                queue.append(task)
+
+        try:
+            # resume: the completed tasks are skipped but their follow up tasks are not
+            follow_ups = []
+            for record in sink.completed():
+                task = tuple(record["task"])
+                if task not in seen:
+                    seen.add(task)
+                    stats["skipped"] += 1
+                    if self.follow_repositories:
+                        follow_ups += follow_up(task, record["result"])
+            for task in (*(tuple(task) for task in tasks), *follow_ups):
+                enqueue(task)
+
+            key_pool = LibIOSession.get_key_pool()
+            initargs = (
+                None if key_pool is not None else LibIOSession.get_key(),
+                key_pool.settings() if key_pool is not None else None,
+                LibIOSession.get_api_url(),
+                LibIOSession.get_retry_config(),
+                LibIOSession.get_timeout(),
+                self.rate,
+                self.per,
+                self.lock_file if self.rate is not None else None,
+            )
+            with ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=initargs) as pool:
+                pending = set()
+                while queue or pending:
+                    # keep a bounded number of tasks in flight, so follow up tasks join the queue early
+                    while queue and len(pending) < 2 * self.processes:
+                        pending.add(pool.submit(_run_task, queue.popleft(), self.follow_repositories))
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task, line, ok, new_tasks = future.result()
+                        sink.write(task, line, ok)
+                        stats["succeeded" if ok else "failed"] += 1
+                        for new_task in new_tasks:
+                            enqueue(new_task)
+        finally:
+            sink.close()
+
+        return stats
+
+
+def crawl(
+    sink: str,
+    users: Iterable[str] = (),
+    repositories: Iterable[str] = (),
+    host: str = "github",
+    processes: int = 4,
+    rate: Optional[float] = 60,
+    per: float = 60.0,
+    lock_file: Optional[str] = None,
+    follow_repositories: bool = False,
+) -> Dict[str, int]:
+    """
+    Crawl the dependencies and repositories of users and the dependencies of repositories into a sink.
+
+    Args:
+        sink (str): the output file, SQLite for the .db, .sqlite and .sqlite3 extensions and JSON lines otherwise.
+        users (Iterable[str]): the user names to crawl.
+        repositories (Iterable[str]): the repositories to crawl, as "owner/repo".
+        host (str): the repository host (e.g. "github").
+        processes (int): the number of worker processes.
+        rate (Optional[float]): the requests allowed every `per` seconds across all the workers.
+        per (float): the rate limit window, in seconds.
+        lock_file (Optional[str]): the file holding the shared rate budget.
+        follow_repositories (bool): also crawl the dependencies of the repositories found for each user.
+    Returns:
+        Dict[str, int]: the number of tasks that succeeded, failed and were skipped as already done.
+    """
+    if isinstance(users, str):
+        users = [users]
+    if isinstance(repositories, str):
+        repositories = [repositories]
+    crawler = Crawler(sink, processes, rate, per, lock_file, follow_repositories)
+    return crawler.run(Crawler.tasks_for(users, repositories, host))
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(crawl)
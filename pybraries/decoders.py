@@ -0,0 +1,31 @@
+"""Module that selects the JSON decoder used for the libraries.io responses."""
+import json
+from typing import Any, Callable
+
+# a decoder turns the raw response body into python objects
+Decoder = Callable[[bytes], Any]
+
+
+def default_decoder() -> Decoder:
+    """
+    Function that returns the fastest JSON decoder installed, orjson or msgspec if present and the
+    standard library decoder otherwise.
+
+    Returns:
+        Decoder: the decoder function.
+    """
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+
+        return orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import msgspec  # pylint: disable=import-outside-toplevel
+
+        return msgspec.json.decode
+    except ImportError:
+        pass
+
+    return json.loads
@@ -0,0 +1,185 @@
+"""Module that implements the transitive dependency graph crawler."""
+import json
+import os
+from typing import Dict, List, Optional
+
+from pybraries.search import Search
+
+
+def node_id(platform: str, name: str) -> str:
+    """
+    Build the identifier of a graph node.
+
+    Args:
+        platform (str): package manager (e.g. "pypi").
+        name (str): project name.
+    Returns:
+        (str): the node identifier, e.g. "pypi/flask".
+    """
+    return f"{platform.lower()}/{name}"
+
+
+class DependencyGraph:
+    """
+    Class that holds the adjacency structure of a transitive dependency crawl; the nodes map each
+    project to its platform, name, version and depth and the edges map each crawled project to its dependencies.
+    """
+
+    def __init__(self, root: str = "", max_depth: int = 3):
+        self.root = root
+        self.max_depth = max_depth
+        self.nodes: Dict[str, Dict] = {}
+        self.edges: Dict[str, List[Dict]] = {}
+        self.failed: List[str] = []
+
+    @classmethod
+    def build(
+        cls,
+        platform: str,
+        project: str,
+        version: Optional[str] = None,
+        max_depth: int = 3,
+        concurrency: int = 4,
+        checkpoint: Optional[str] = None,
+    ) -> "DependencyGraph":
+        """
+        Crawl the dependencies of a project breadth-first, fetching each project once.
+
+        Args:
+            platform: package manager (e.g. "pypi").
+            project: project name.
+            version: (optional) project version, the dependencies are always resolved at their latest version.
+            max_depth: the depth up to which dependencies are expanded, the project itself has depth 0.
+            concurrency: the number of concurrent `project_dependencies` calls.
+            checkpoint: (optional) file the crawl state is saved to as it progresses, an existing
+                checkpoint of the same project is resumed.
+        Returns:
+            DependencyGraph: the crawled graph.
+        """
+        root = node_id(platform, project)
+        if checkpoint and os.path.exists(checkpoint):
+            graph = cls.load(checkpoint)
+            if graph.root != root:
+                raise ValueError(f"Checkpoint {checkpoint} belongs to {graph.root}, not to {root}.")
+            graph.max_depth = max_depth
+            graph.failed = []  # give the failed projects another chance
+        else:
+            graph = cls(root=root, max_depth=max_depth)
+            graph.nodes[root] = {"platform": platform, "name": project, "version": version or "latest", "depth": 0}
+
+        try:
+            pending = graph.pending()
+            while pending:
+                # fetch in small batches so an interruption loses at most one batch of work
+                for start in range(0, len(pending), concurrency * 4):
+                    batch = pending[start : start + concurrency * 4]
+                    args = [
+                        (graph.nodes[key]["platform"], graph.nodes[key]["name"], graph.nodes[key]["version"])
+                        for key in batch
+                    ]
+                    for key, resp in zip(batch, Search.map(Search.project_dependencies, args, workers=concurrency)):
+                        graph.add_dependencies(key, resp)
+                    if checkpoint:
+                        graph.save(checkpoint)
+                pending = graph.pending()
+        finally:
+            if checkpoint:
+                graph.save(checkpoint)
+
+        return graph
+
+    def pending(self) -> List[str]:
+        """
+        Function that returns the nodes that still need to be expanded, shallowest first.
+
+        Returns:
+            List[str]: the identifiers of the pending nodes.
+        """
+        failed = set(self.failed)
+        pending = [
+            key
+            for key, node in self.nodes.items()
+            if node["depth"] < self.max_depth and key not in self.edges and key not in failed
+        ]
+        return sorted(pending, key=lambda key: self.nodes[key]["depth"])
+
+    def add_dependencies(self, key: str, resp):
+        """
+        Function that records the `project_dependencies` response of a node, adding the new dependencies as nodes.
+
+        Args:
+            key (str): the identifier of the expanded node.
+            resp: the `project_dependencies` response, an empty string if the request failed.
+        """
+        if not isinstance(resp, dict):
+            self.failed.append(key)
+            return
+
+        depth = self.nodes[key]["depth"] + 1
+        edges = []
+        for dep in resp.get("dependencies") or []:
+            name = dep.get("project_name") or dep.get("name")
+            platform = dep.get("platform") or self.nodes[key]["platform"]
+            if not name:
+                continue
+            dep_key = node_id(platform, name)
+            if dep_key not in self.nodes:
+                self.nodes[dep_key] = {"platform": platform, "name": name, "version": "latest", "depth": depth}
+            edges.append({"to": dep_key, "requirements": dep.get("requirements"), "kind": dep.get("kind")})
+        self.edges[key] = edges
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the graph as a JSON serializable dict.
+
+        Returns:
+            Dict: the root, depth, nodes, edges and failed nodes of the graph.
+        """
+        return {
+            "root": self.root,
+            "max_depth": self.max_depth,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "failed": self.failed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DependencyGraph":
+        """
+        Function that rebuilds a graph from the output of `to_dict`.
+
+        Args:
+            data (Dict): the serialized graph.
+        Returns:
+            DependencyGraph: the graph.
+        """
+        graph = cls(root=data["root"], max_depth=data["max_depth"])
+        graph.nodes = data["nodes"]
+        graph.edges = data["edges"]
+        graph.failed = data.get("failed", [])
+        return graph
+
+    def save(self, path: str):
+        """
+        Function that atomically writes the graph to a JSON file.
+
+        Args:
+            path (str): the file to write.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as handle:
+            json.dump(self.to_dict(), handle)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DependencyGraph":
+        """
+        Function that reads a graph written by `save`.
+
+        Args:
+            path (str): the file to read.
+        Returns:
+            DependencyGraph: the graph.
+        """
+        with open(path, "r", encoding="utf8") as handle:
+            return cls.from_dict(json.load(handle))
@@ -0,0 +1,147 @@
+"""Module that declares the libraries.io endpoints used by the Search and Subscribe actions.
+
+Each action maps to an `Endpoint` holding its http method, its url template with a precompiled formatter
+and the query parameters it accepts, so building a request is a dictionary lookup and a format call.
+"""
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from pybraries.remote_sess import LibIOSession
+
+# the query parameters every endpoint accepts, keyword argument -> query parameter
+PAGING_QUERY = {"sort": "sort", "page": "page", "per_page": "per_page"}
+
+
+class Endpoint:
+    """
+    Class that describes an endpoint: its url template relative to the api url, whose fields are the path
+    parameters in order, and the keyword arguments it turns into query parameters.
+    """
+
+    __slots__ = ("name", "method", "template", "path_params", "defaults", "query", "required", "_format", "_arity")
+
+    def __init__(
+        self,
+        name: str,
+        template: str,
+        path_params: Sequence[str] = (),
+        query: Optional[Mapping[str, str]] = None,
+        method: str = "get",
+        defaults: Optional[Mapping[str, str]] = None,
+        required: Sequence[str] = (),
+    ):
+        """
+        Args:
+            name (str): the action name (e.g. "project_dependents").
+            template (str): the url template, e.g. "{platforms}/{project}/dependents".
+            path_params (Sequence[str]): the names of the template fields, in the order of the positional arguments.
+            query (Optional[Mapping[str, str]]): the accepted keyword arguments and their query parameter names.
+            method (str): get, post, put, or delete
+            defaults (Optional[Mapping[str, str]]): the values of the path parameters that are not given or None.
+            required (Sequence[str]): the keyword arguments the query must include.
+        """
+        self.name = name
+        self.method = method
+        self.template = template
+        self.path_params = tuple(path_params)
+        self.defaults = dict(defaults or {})
+        self.query: Tuple[Tuple[str, str], ...] = tuple((query or {}).items())
+        self.required = tuple(required)
+        self._arity = len(self.path_params)
+        # the fields are positional once compiled, so formatting needs no keyword lookups
+        positional = template
+        for index, param in enumerate(self.path_params):
+            positional = positional.replace(f"{{{param}}}", f"{{{index}}}")
+        self._format = positional.format
+
+    def url(self, args: Sequence = (), kwargs: Optional[Mapping] = None) -> str:
+        """
+        Function that builds the url of a call.
+
+        Args:
+            args (Sequence): the positional arguments, filling the path parameters in order.
+            kwargs (Optional[Mapping]): the keyword arguments, filling the remaining path parameters by name.
+        Returns:
+            str: the url.
+        """
+        values = list(args[: self._arity])
+        for param in self.path_params[len(values) :]:
+            value = kwargs.get(param) if kwargs else None
+            if value is None:
+                value = self.defaults.get(param)
+                if value is None:
+                    raise TypeError(f"{self.name} requires the {param} argument")
+            values.append(value)
+        return f"{LibIOSession.get_api_url()}/{self._format(*values)}"
+
+    def params(self, kwargs: Mapping) -> Dict:
+        """
+        Function that builds the query parameters of a call, the keyword arguments not accepted are ignored;
+        the "filters" dict is merged into the query as is.
+
+        Args:
+            kwargs (Mapping): the keyword arguments of the call.
+        Returns:
+            Dict: the query parameters.
+        """
+        for key in self.required:
+            if key not in kwargs:
+                raise TypeError(f"{self.name} requires the {key} keyword argument")
+        params = {param: kwargs[key] for key, param in self.query if key in kwargs}
+        filters = kwargs.get("filters")
+        if filters:
+            params.update(filters)
+        return params
+
+
+def _endpoints(*endpoints: Endpoint) -> Dict[str, Endpoint]:
+    return {endpoint.name: endpoint for endpoint in endpoints}
+
+
+_PROJECT = ("platforms", "project")
+_REPOSITORY = ("host", "owner", "repo")
+_USER = ("host", "user")
+_SUBSCRIPTION = ("manager", "package")
+
+# the endpoints of the Search and Subscribe actions
+ENDPOINTS = _endpoints(
+    Endpoint("platforms", "platforms", query=PAGING_QUERY),
+    Endpoint("project", "{platforms}/{project}", _PROJECT, PAGING_QUERY),
+    Endpoint(
+        "project_dependencies",
+        "{platforms}/{project}/{version}/dependencies",
+        (*_PROJECT, "version"),
+        PAGING_QUERY,
+        defaults={"version": "latest"},
+    ),
+    Endpoint("project_dependents", "{platforms}/{project}/dependents", _PROJECT, PAGING_QUERY),
+    Endpoint("project_dependent_repositories", "{platforms}/{project}/dependent_repositories", _PROJECT, PAGING_QUERY),
+    Endpoint("project_contributors", "{platforms}/{project}/contributors", _PROJECT, PAGING_QUERY),
+    Endpoint("project_sourcerank", "{platforms}/{project}/sourcerank", _PROJECT, PAGING_QUERY),
+    Endpoint("project_usage", "{platforms}/{project}/usage", _PROJECT, PAGING_QUERY),
+    Endpoint(
+        "special_project_search",
+        "search",
+        query={
+            "keywords": "q",
+            "platforms": "platforms",
+            "licenses": "licenses",
+            "languages": "languages",
+            **PAGING_QUERY,
+        },
+        required=("keywords",),
+    ),
+    Endpoint("repository", "{host}/{owner}/{repo}", _REPOSITORY, PAGING_QUERY),
+    Endpoint("repository_dependencies", "{host}/{owner}/{repo}/dependencies", _REPOSITORY, PAGING_QUERY),
+    Endpoint("repository_projects", "{host}/{owner}/{repo}/projects", _REPOSITORY, PAGING_QUERY),
+    Endpoint("user", "{host}/{user}", _USER, PAGING_QUERY),
+    Endpoint("user_repositories", "{host}/{user}/repositories", _USER, PAGING_QUERY),
+    Endpoint("user_projects", "{host}/{user}/projects", _USER, PAGING_QUERY),
+    Endpoint("user_projects_contributions", "{host}/{user}/project-contributions", _USER, PAGING_QUERY),
+    Endpoint("user_repositories_contributions", "{host}/{user}/repository-contributions", _USER, PAGING_QUERY),
+    Endpoint("user_dependencies", "{host}/{user}/dependencies", _USER, PAGING_QUERY),
+    Endpoint("list_subscribed", "subscriptions", query={"page": "page", "per_page": "per_page"}),
+    Endpoint("check_subscribed", "subscriptions/{manager}/{package}", _SUBSCRIPTION),
+    Endpoint("subscribe", "subscriptions/{manager}/{package}", _SUBSCRIPTION, method="post"),
+    Endpoint("update_subscribe", "subscriptions/{manager}/{package}", _SUBSCRIPTION, method="put"),
+    Endpoint("delete_subscribe", "subscriptions/{manager}/{package}", _SUBSCRIPTION, method="delete"),
+)
@@ -1,4 +1,9 @@
 """Module that includes the custom exceptions used throughout."""
+import re
+from typing import Any, Optional
+
+# the API key query parameter, e.g. within the urls quoted by the errors of the HTTP stack
+_API_KEY_PARAM = re.compile(r"(api_key=)[^&\s'\"]+")
 
 
 class APIKeyMissingError(Exception):
@@ -7,3 +12,95 @@ class APIKeyMissingError(Exception):
 
 class SessionNotInitialisedError(Exception):
     """Custom error indicating that the session has not been initialised yet."""
+
+
+class LibrariesIOError(Exception):
+    """Base error of the failed libraries.io requests."""
+
+    def __init__(self, message: str, url: str = "", status: Optional[int] = None, response: Any = None):
+        """
+        Args:
+            message (str): the error message.
+            url (str): the url of the failed request.
+            status (Optional[int]): the http status of the response, None if there was no response.
+            response (Any): the response, if any.
+        """
+        super().__init__(message)
+        self.url = url
+        self.status = status
+        self.response = response
+
+
+class NotFoundError(LibrariesIOError):
+    """The requested resource does not exist (404)."""
+
+
+class RateLimitedError(LibrariesIOError):
+    """The API key ran out of requests (429), `retry_after` holds the seconds to wait if known."""
+
+    def __init__(self, message: str, url: str = "", retry_after: Optional[float] = None, response: Any = None):
+        super().__init__(message, url, 429, response)
+        self.retry_after = retry_after
+
+
+class ServerError(LibrariesIOError):
+    """libraries.io failed to answer the request (5xx), after the retries."""
+
+
+class RequestTimeoutError(LibrariesIOError):
+    """The request timed out."""
+
+
+class ConnectionFailedError(LibrariesIOError):
+    """libraries.io could not be reached."""
+
+
+class CircuitOpenError(LibrariesIOError):
+    """The request was not sent since its endpoint keeps failing, `retry_after` holds the seconds left."""
+
+    def __init__(self, message: str, url: str = "", retry_after: float = 0.0):
+        super().__init__(message, url)
+        self.retry_after = retry_after
+
+
+# the errors telling that libraries.io is degraded, they count towards opening the circuit of an endpoint
+DEGRADED_ERRORS = (ServerError, RequestTimeoutError, ConnectionFailedError)
+
+
+def error_for_status(
+    status: int, url: str, reason: str = "", retry_after: Optional[float] = None, response: Any = None
+) -> Optional[LibrariesIOError]:
+    """
+    Function that builds the error matching the http status of a response.
+
+    Args:
+        status (int): the http status.
+        url (str): the url of the request.
+        reason (str): the reason phrase of the response.
+        retry_after (Optional[float]): the seconds of the Retry-After header, if any.
+        response (Any): the response.
+    Returns:
+        Optional[LibrariesIOError]: the error, None if the status is not an error.
+    """
+    if status < 400:
+        return None
+    message = f"{status} {'Client' if status < 500 else 'Server'} Error: {reason} for url: {url}"
+    if status == 404:
+        return NotFoundError(message, url, status, response)
+    if status == 429:
+        return RateLimitedError(message, url, retry_after, response)
+    if status >= 500:
+        return ServerError(message, url, status, response)
+    return LibrariesIOError(message, url, status, response)
+
+
+def redact_keys(text: str) -> str:
+    """
+    Function that masks the API keys of the query strings quoted in a text, e.g. an error message.
+
+    Args:
+        text (str): the text.
+    Returns:
+        str: the text with the API keys replaced by "***".
+    """
+    return _API_KEY_PARAM.sub(r"\1***", text)
@@ -0,0 +1,357 @@
+"""Module that implements the streaming exporters of the search result sets.
+
+The records are written as they are read from the paginated result stream, so an export holds a couple of
+pages, or a Parquet row group, in memory whatever the size of the result set.
+"""
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pybraries.models import ACTION_MODELS, Model
+from pybraries.pagination import MAX_PER_PAGE
+from pybraries.search_helpers import iter_search_api
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# the Search method names whose action is named differently
+ACTION_ALIASES = {
+    "project_search": "special_project_search",
+    "user_repository_contributions": "user_repositories_contributions",
+}
+
+# the kinds of the modelled fields which are not strings, the nested models are exported as JSON
+INT_FIELDS = frozenset(
+    {
+        "stars",
+        "forks",
+        "rank",
+        "contributions_count",
+        "dependents_count",
+        "dependent_repos_count",
+        "stargazers_count",
+        "forks_count",
+        "open_issues_count",
+        "size",
+        "github_id",
+    }
+)
+BOOL_FIELDS = frozenset({"fork", "deprecated", "outdated", "optional"})
+LIST_FIELDS = frozenset({"keywords", "normalized_licenses"})
+
+# the default number of rows of a Parquet row group
+ROW_GROUP_SIZE = 10000
+
+
+def _json_default(value: Any) -> Any:
+    """encodes the models and the tuples of interned strings"""
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _as_dict(record: Any) -> Dict:
+    """the fields of a record, a dict or a model"""
+    return record.to_dict() if isinstance(record, Model) else record
+
+
+def columns_for(action: str) -> Optional[List[str]]:
+    """
+    Build the columns of the results of a search action, the fields of its model.
+
+    Args:
+        action (str): the search action (e.g. "project_dependents").
+    Returns:
+        Optional[List[str]]: the columns, None if the results of the action are not modelled.
+    """
+    model = ACTION_MODELS.get(ACTION_ALIASES.get(action, action))
+    return list(model.__slots__) if model is not None else None
+
+
+def field_kind(field: str, sample: Any = None) -> str:
+    """
+    Find the kind of the values of a column, from the modelled fields or else from a sample value.
+
+    Args:
+        field (str): the column name.
+        sample (Any): a value of the column, used for the fields that are not modelled.
+    Returns:
+        str: one of "int", "float", "bool", "list" (of strings), "json" or "str".
+    """
+    if field in INT_FIELDS:
+        return "int"
+    if field in BOOL_FIELDS:
+        return "bool"
+    if field in LIST_FIELDS:
+        return "list"
+    if any(field in model._nested for model in ACTION_MODELS.values()):  # pylint: disable=protected-access
+        return "json"
+    if isinstance(sample, bool):
+        return "bool"
+    if isinstance(sample, int):
+        return "int"
+    if isinstance(sample, float):
+        return "float"
+    if isinstance(sample, (list, tuple)) and all(isinstance(item, str) for item in sample):
+        return "list"
+    if isinstance(sample, (dict, list, tuple)):
+        return "json"
+    return "str"
+
+
+def _convert(kind: str, value: Any) -> Any:
+    """converts a value to the kind of its column, None if it does not fit"""
+    if value is None:
+        return None
+    if kind == "int":
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    if kind == "float":
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    if kind == "bool":
+        return value if isinstance(value, bool) else None
+    if kind == "list":
+        return [str(item) for item in value] if isinstance(value, (list, tuple)) else [str(value)]
+    if kind == "json":
+        return json.dumps(value, default=_json_default)
+    return value if isinstance(value, str) else json.dumps(value, default=_json_default)
+
+
+class JsonlExporter:
+    """
+    Class that writes the records to a JSON lines file, one record per line, with all of their fields.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            path (str): the output file.
+            columns (Optional[Sequence[str]]): unused, JSON lines keep every field of the records.
+        """
+        self.path = path
+        self.columns = columns
+        self._handle = open(path, "w", encoding="utf8")  # pylint: disable=consider-using-with
+
+    def write(self, record: Any):
+        """
+        Function that writes a record.
+
+        Args:
+            record (Any): a result dict or model.
+        """
+        self._handle.write(json.dumps(record, default=_json_default) + "\n")
+
+    def close(self):
+        self._handle.close()
+
+
+class CsvExporter:
+    """
+    Class that writes the records to a CSV file with a header row; the lists and the nested records are
+    written as JSON, the missing values as empty cells.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            path (str): the output file.
+            columns (Optional[Sequence[str]]): the columns, the fields of the first record by default;
+                the fields of the records not in the columns are dropped.
+        """
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self._handle = open(path, "w", encoding="utf8", newline="")  # pylint: disable=consider-using-with
+        self._writer = csv.writer(self._handle)
+        if self.columns is not None:
+            self._writer.writerow(self.columns)
+
+    def write(self, record: Any):
+        """
+        Function that writes a record.
+
+        Args:
+            record (Any): a result dict or model.
+        """
+        record = _as_dict(record)
+        if self.columns is None:
+            self.columns = list(record)
+            self._writer.writerow(self.columns)
+        self._writer.writerow(
+            [
+                "" if value is None else value if isinstance(value, (str, int, float)) else _convert("json", value)
+                for value in (record.get(column) for column in self.columns)
+            ]
+        )
+
+    def close(self):
+        self._handle.close()
+
+
+class ParquetExporter:
+    """
+    Class that writes the records to a Parquet file, one row group every `row_group_size` records;
+    the column types follow the fields of the results and the nested records are stored as JSON strings.
+
+    The types of the fields that are not modelled are taken from their first non-null value in the first row
+    group, the file is only created once it is complete; the later values of another type are converted, or
+    dropped when they do not fit.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None, row_group_size: int = ROW_GROUP_SIZE):
+        """
+        Args:
+            path (str): the output file.
+            columns (Optional[Sequence[str]]): the columns, the fields of the first record by default;
+                the fields of the records not in the columns are dropped.
+            row_group_size (int): the number of records buffered and written per row group.
+        """
+        if pyarrow is None:
+            raise ImportError("The Parquet export requires pyarrow, install it using: pip install pybraries[parquet]")
+
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.row_group_size = row_group_size
+        self._kinds: Optional[List[str]] = None
+        # the records of the first row group, kept until the column types are known
+        self._pending: List[Dict] = []
+        self._batch: List[List] = []
+        self._writer = None
+
+    def _schema(self, records: List[Dict]) -> "pyarrow.Schema":
+        """the schema of the columns, the fields that are not modelled get the kind of their first non-null value"""
+        types = {
+            "int": pyarrow.int64(),
+            "float": pyarrow.float64(),
+            "bool": pyarrow.bool_(),
+            "list": pyarrow.list_(pyarrow.string()),
+            "json": pyarrow.string(),
+            "str": pyarrow.string(),
+        }
+        self._kinds = [
+            field_kind(column, next((record[column] for record in records if record.get(column) is not None), None))
+            for column in self.columns
+        ]
+        return pyarrow.schema([(column, types[kind]) for column, kind in zip(self.columns, self._kinds)])
+
+    def write(self, record: Any):
+        """
+        Function that buffers a record, writing the buffered row group once full.
+
+        Args:
+            record (Any): a result dict or model.
+        """
+        record = _as_dict(record)
+        if self.columns is None:
+            self.columns = list(record)
+        if self._writer is None:
+            self._pending.append(record)
+            if len(self._pending) >= self.row_group_size:
+                self._flush()
+            return
+        for values, column, kind in zip(self._batch, self.columns, self._kinds):
+            values.append(_convert(kind, record.get(column)))
+        if len(self._batch[0]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        """writes the buffered records as a row group, creating the file with the first one"""
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema(self._pending))
+            self._batch = [
+                [_convert(kind, record.get(column)) for record in self._pending]
+                for column, kind in zip(self.columns, self._kinds)
+            ]
+            self._pending = []
+        if self._batch and self._batch[0]:
+            table = pyarrow.Table.from_arrays(self._batch, schema=self._writer.schema)
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+            self._batch = [[] for _ in self.columns]
+
+    def close(self):
+        if self._writer is None:
+            # without records, the file has the known columns
+            self.columns = self.columns or []
+        self._flush()
+        self._writer.close()
+
+
+# the exporters of each format
+EXPORTERS = {"jsonl": JsonlExporter, "csv": CsvExporter, "parquet": ParquetExporter}
+
+
+def open_exporter(path: str, fmt: Optional[str] = None, columns: Optional[Sequence[str]] = None, **kwargs):
+    """
+    Open the exporter of a file, picked by its format.
+
+    Args:
+        path (str): the output file.
+        fmt (Optional[str]): "jsonl", "csv" or "parquet", by default picked by the file extension
+            (.csv, .parquet or .pq, JSON lines otherwise).
+        columns (Optional[Sequence[str]]): the columns of the CSV and Parquet files.
+        **kwargs: the arguments of the exporter, e.g. the `row_group_size` of the Parquet files.
+    Returns:
+        JsonlExporter, CsvExporter or ParquetExporter: the opened exporter.
+    """
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}.get(extension, "jsonl")
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format {fmt}, expected one of {', '.join(EXPORTERS)}")
+    return EXPORTERS[fmt](path, columns, **kwargs)
+
+
+def export(
+    records: Iterable, path: str, fmt: Optional[str] = None, columns: Optional[Sequence[str]] = None, **kwargs
+) -> int:
+    """
+    Write records to a file as they are read.
+
+    Args:
+        records (Iterable): the result dicts or models, e.g. a lazy `Search.iter_*` iterator.
+        path (str): the output file.
+        fmt (Optional[str]): "jsonl", "csv" or "parquet", by default picked by the file extension.
+        columns (Optional[Sequence[str]]): the columns of the CSV and Parquet files, the fields of the first
+            record by default.
+        **kwargs: the arguments of the exporter, e.g. the `row_group_size` of the Parquet files.
+    Returns:
+        int: the number of records written.
+    """
+    exporter = open_exporter(path, fmt, columns, **kwargs)
+    count = 0
+    try:
+        for record in records:
+            exporter.write(record)
+            count += 1
+    finally:
+        exporter.close()
+    return count
+
+
+def export_search(
+    action: str, path: str, *args, fmt: Optional[str] = None, per_page: int = MAX_PER_PAGE, **kwargs
+) -> int:
+    """
+    Write all the results of a paginated search action to a file, streaming them page by page; the CSV
+    and Parquet columns are the fields of the model of the action.
+
+    Args:
+        action (str): the search action or `Search` method name (e.g. "project_dependents", "project_search").
+        path (str): the output file.
+        *args: the positional arguments of the action (e.g. "pypi", "requests").
+        fmt (Optional[str]): "jsonl", "csv" or "parquet", by default picked by the file extension.
+        per_page (int): the results fetched per request.
+        **kwargs: the keyword arguments of the action (e.g. keywords="plot"), along with the arguments of
+            the exporter (e.g. row_group_size).
+    Returns:
+        int: the number of records written.
+    """
+    exporter_kwargs = {key: kwargs.pop(key) for key in ("row_group_size",) if key in kwargs}
+    records = iter_search_api(
+        ACTION_ALIASES.get(action, action), *args, per_page=per_page, raise_errors=True, **kwargs
+    )
+    return export(records, path, fmt, columns_for(action), **exporter_kwargs)
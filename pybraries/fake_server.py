@@ -0,0 +1,354 @@
+"""Module that implements a small local fake libraries.io server, used to test and benchmark without network.
+
+It serves the endpoints declared in `pybraries.endpoints` with deterministic synthetic data,
+e.g. point the clients to it using `LibIOSession.set_api_url(server.url)`.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# the hosts of the repository and user endpoints, the rest of the first path segments are platforms
+REPO_HOSTS = {"github", "gitlab", "bitbucket"}
+# the size of the project name pool the synthetic dependencies are drawn from
+PROJECT_POOL = 500
+
+
+def _seed(*parts: str) -> int:
+    """deterministic seed of a resource"""
+    return zlib.crc32("/".join(parts).lower().encode("utf8"))
+
+
+def fake_project(platform: str, name: str) -> Dict:
+    """builds the synthetic project of a platform"""
+    seed = _seed(platform, name)
+    versions = [
+        {"number": f"{v // 10}.{v % 10}.0", "published_at": f"20{10 + v // 12:02d}-{v % 12 + 1:02d}-01T00:00:00.000Z"}
+        for v in range(seed % 20 + 1)
+    ]
+    return {
+        "name": name,
+        "platform": platform,
+        "description": f"The {name} project",
+        "homepage": f"https://github.com/{name}/{name}",
+        "repository_url": f"https://github.com/{name}/{name}",
+        "language": "Python",
+        "normalized_licenses": ["MIT"],
+        "keywords": ["fake"],
+        "stars": seed % 5000,
+        "forks": seed % 700,
+        "rank": seed % 30,
+        "dependents_count": seed % 1000,
+        "dependent_repos_count": seed % 2000,
+        "latest_release_number": versions[-1]["number"],
+        "latest_release_published_at": versions[-1]["published_at"],
+        "versions": versions,
+    }
+
+
+def fake_dependencies(platform: str, name: str) -> List[Dict]:
+    """builds the synthetic dependencies of a project, drawn from a finite pool of projects"""
+    seed = _seed(platform, name, "dependencies")
+    return [
+        {
+            "project_name": f"pkg-{(seed + i * 7919) % PROJECT_POOL}",
+            "name": f"pkg-{(seed + i * 7919) % PROJECT_POOL}",
+            "platform": platform,
+            "requirements": ">= 1.0",
+            "kind": "runtime",
+            "optional": False,
+        }
+        for i in range(seed % 4)
+    ]
+
+
+def fake_repository(host: str, owner: str, repo: str) -> Dict:
+    """builds the synthetic repository of a host"""
+    seed = _seed(host, owner, repo)
+    return {
+        "full_name": f"{owner}/{repo}",
+        "host_type": host,
+        "description": f"The {repo} repository",
+        "language": "Python",
+        "license": "mit",
+        "stargazers_count": seed % 5000,
+        "forks_count": seed % 700,
+        "size": seed % 100000 + 1,
+        "github_id": str(seed),
+        "rank": seed % 30,
+    }
+
+
+def fake_user(host: str, login: str) -> Dict:
+    """builds the synthetic user of a host"""
+    return {"login": login, "name": login.title(), "user_type": "User", "host_type": host, "github_id": _seed(login)}
+
+
+class FakeLibrariesIO:
+    """
+    Class that implements the fake libraries.io server, running on a background thread.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limited_rate: float = 0.0,
+        total_items: int = 250,
+        seed: int = 0,
+        connect_latency: float = 0.0,
+    ):
+        """
+        Args:
+            host (str): the interface to listen on.
+            port (int): the port to listen on, 0 picks a free one.
+            latency (float): the seconds every response is delayed by.
+            error_rate (float): the probability of answering with a 500 error.
+            rate_limited_rate (float): the probability of answering with a 429 error and a Retry-After header.
+            total_items (int): the number of items of every list endpoint, spread over its pages.
+            seed (int): the seed of the error injection.
+            connect_latency (float): the seconds every new connection is delayed by, standing for the TCP and TLS
+                handshakes of libraries.io.
+        """
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.error_rate = error_rate
+        self.rate_limited_rate = rate_limited_rate
+        self.total_items = total_items
+        self.subscriptions: Set[Tuple[str, str]] = set()
+        self.requests_served = 0
+        self.connections_opened = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler(), bind_and_activate=False)
+        self._server.daemon_threads = True
+        # the default backlog of 5 drops the connections of a burst, which are retried a second later
+        self._server.request_queue_size = 128
+        try:
+            self._server.server_bind()
+            self._server.server_activate()
+        except OSError:
+            self._server.server_close()
+            raise
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """the base url of the fake api"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self) -> "FakeLibrariesIO":
+        """
+        Function that starts serving on a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Function that stops the server and releases its socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLibrariesIO":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _inject(self) -> Optional[int]:
+        """picks the injected error of a request, if any"""
+        with self._lock:
+            self.requests_served += 1
+            draw = self._random.random()
+        if draw < self.rate_limited_rate:
+            return 429
+        if draw < self.rate_limited_rate + self.error_rate:
+            return 500
+        return None
+
+    def _page(self, items_of, query: Dict[str, List[str]], total: Optional[int] = None) -> List:
+        """returns the requested page of a list endpoint, of `total_items` items unless given"""
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        per_page = min(max(int(query.get("per_page", ["30"])[0]), 1), 100)
+        start = (page - 1) * per_page
+        total = self.total_items if total is None else total
+        return [items_of(i) for i in range(start, min(start + per_page, total))]
+
+    def route(self, method: str, parts: List[str], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        """
+        Function that answers a request with a status and a JSON body.
+
+        Args:
+            method (str): the http method.
+            parts (List[str]): the path segments after the api prefix.
+            query (Dict[str, List[str]]): the query parameters.
+        Returns:
+            Tuple[int, Any]: the status and the body.
+        """
+        # pylint: disable=too-many-return-statements
+        if parts == ["platforms"]:
+            return 200, [
+                {"name": name, "project_count": 1000, "homepage": "", "color": "", "default_language": ""}
+                for name in ("Pypi", "NPM", "Maven", "Conda")
+            ]
+        if parts == ["search"]:
+            keywords = query.get("q", [""])[0]
+            return 200, self._page(lambda i: fake_project("Pypi", f"{keywords}-{i}"), query)
+        if parts and parts[0] == "subscriptions":
+            return self._subscriptions(method, parts[1:], query)
+
+        if parts and parts[0].lower() in REPO_HOSTS:
+            host = parts[0]
+            if len(parts) == 2:
+                return 200, fake_user(host, parts[1])
+            if len(parts) == 3 and parts[2] in ("repositories", "repository-contributions"):
+                return 200, self._page(lambda i: fake_repository(host, parts[1], f"repo-{i}"), query)
+            if len(parts) == 3 and parts[2] in ("projects", "project-contributions", "dependencies"):
+                return 200, self._page(lambda i: fake_project("Pypi", f"{parts[1]}-project-{i}"), query)
+            if len(parts) == 3:
+                return 200, fake_repository(host, parts[1], parts[2])
+            if len(parts) == 4 and parts[3] == "dependencies":
+                repo = fake_repository(host, parts[1], parts[2])
+                return 200, {**repo, "dependencies": fake_dependencies("Pypi", parts[2])}
+            if len(parts) == 4 and parts[3] == "projects":
+                return 200, self._page(lambda i: fake_project("Pypi", f"{parts[2]}-project-{i}"), query)
+            return 404, {"error": "Not found"}
+
+        if len(parts) == 2:
+            return 200, fake_project(parts[0], parts[1])
+        if len(parts) == 3:
+            platform, name, action = parts
+            if action == "dependents":
+                return 200, self._page(lambda i: fake_project(platform, f"{name}-dependent-{i}"), query)
+            if action == "dependent_repositories":
+                return 200, self._page(lambda i: fake_repository("GitHub", name, f"dependent-{i}"), query)
+            if action == "contributors":
+                return 200, self._page(lambda i: fake_user("GitHub", f"{name}-contributor-{i}"), query)
+            if action == "sourcerank":
+                seed = _seed(platform, name)
+                return 200, {"basic_info_present": 1, "contributors": seed % 3, "stars": seed % 5, "subtotal": 10}
+            if action == "usage":
+                return 200, {"*": _seed(platform, name) % 100}
+        if len(parts) == 4 and parts[3] == "dependencies":
+            return 200, {**fake_project(parts[0], parts[1]), "dependencies": fake_dependencies(parts[0], parts[1])}
+        return 404, {"error": "Not found"}
+
+    def _subscriptions(self, method: str, parts: List[str], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        """answers the subscription endpoints from the in-memory subscriptions"""
+        if not parts:
+            with self._lock:
+                subscriptions = sorted(self.subscriptions)
+            return 200, self._page(
+                lambda i: {"project": fake_project(*subscriptions[i]), "include_prerelease": True},
+                query,
+                total=len(subscriptions),
+            )
+        key = (parts[0], parts[1])
+        with self._lock:
+            if method == "POST":
+                self.subscriptions.add(key)
+            elif method == "DELETE":
+                if key not in self.subscriptions:
+                    return 404, {"error": "Not found"}
+                self.subscriptions.discard(key)
+                return 204, None
+            elif key not in self.subscriptions:
+                return 404, {"error": "Not found"}
+        return 200, {"project": fake_project(*key), "include_prerelease": True}
+
+    def _handler(self):
+        """builds the request handler class bound to this server"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """handles the requests of the fake server"""
+
+            # keep the connections alive, as libraries.io does
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                with fake._lock:  # pylint: disable=protected-access
+                    fake.connections_opened += 1
+                if fake.connect_latency:
+                    time.sleep(fake.connect_latency)
+                super().setup()
+
+            def _answer(self):
+                parsed = urlsplit(self.path)
+                query = parse_qs(parsed.query)
+                parts = [part for part in parsed.path.split("/") if part][1:]  # drop the api prefix
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                headers = {"X-RateLimit-Limit": "60"}
+                injected = fake._inject()  # pylint: disable=protected-access
+                if "api_key" not in query:
+                    status, body = 403, {"error": "Missing API key"}
+                elif injected == 429:
+                    status, body = 429, {"error": "Rate limit exceeded"}
+                    headers.update({"Retry-After": "1", "X-RateLimit-Remaining": "0"})
+                elif injected == 500:
+                    status, body = 500, {"error": "Internal server error"}
+                else:
+                    status, body = fake.route(self.command, parts, query)
+
+                payload = b"" if body is None else json.dumps(body).encode("utf8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _answer
+
+            def do_HEAD(self):
+                # the connection warm-ups, which are not api requests
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        return Handler
+
+
+def serve(port: int = 8080, latency: float = 0.0, error_rate: float = 0.0, rate_limited_rate: float = 0.0):
+    """
+    Run the fake server in the foreground, until interrupted.
+
+    Args:
+        port (int): the port to listen on.
+        latency (float): the seconds every response is delayed by.
+        error_rate (float): the probability of answering with a 500 error.
+        rate_limited_rate (float): the probability of answering with a 429 error.
+    """
+    with FakeLibrariesIO(
+        port=port, latency=latency, error_rate=error_rate, rate_limited_rate=rate_limited_rate
+    ) as fake:
+        print(f"Serving a fake libraries.io api at {fake.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(serve)
@@ -1,6 +1,28 @@
 """Module that includes helpers that for querying."""
 from typing import Dict, List, Tuple, Union
 
+from pybraries.remote_sess import LibIOSession
+
+
+def __getattr__(name: str):
+    """
+    The shared session used by the synchronous helpers (`sess`) is created on first access,
+    so importing the helpers does not import the HTTP stack.
+    """
+    if name == "sess":
+        return LibIOSession.get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def clear_params():
+    """
+    Function that clears the shared session parameters, keeping only the API key (if one is set).
+    """
+    sess = LibIOSession.get_session()
+    LibIOSession.clear_session_params()
+    if LibIOSession.has_key():
+        sess.params["api_key"] = LibIOSession.get_key()
+
 
 def extract(*keys):
     class From:
@@ -0,0 +1,159 @@
+"""Module that implements the pool of API keys the libraries.io requests are spread over."""
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from pybraries.errors import APIKeyMissingError
+from pybraries.rate_limit import FileTokenBucket, TokenBucket
+
+# the endpoints of the subscriptions of an account, always sent with the subscription key of the pool
+ACCOUNT_ENDPOINTS = frozenset(
+    ("list_subscribed", "check_subscribed", "subscribe", "update_subscribe", "delete_subscribe")
+)
+
+
+class KeyPool:
+    """
+    Class that spreads the requests over several API keys, each with its own token bucket: every request is
+    assigned the key with the most budget left, and a key answered with a 429 cools down before it is used again.
+
+    The subscriptions belong to a single account, so the requests of the `ACCOUNT_ENDPOINTS` are not spread:
+    they all go to the subscription key, the first one unless told otherwise.
+
+    The keys are only handed to the requests, everywhere else (e.g. `stats`) they are labelled by position.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        rate: float = 60,
+        per: float = 60.0,
+        capacity: Optional[float] = None,
+        cooldown: float = 60.0,
+        lock_file: Optional[str] = None,
+        subscription_key: Optional[str] = None,
+    ):
+        """
+        Args:
+            keys (Sequence[str]): the API keys, duplicates and empty ones are ignored.
+            rate (float): the amount of requests allowed every `per` seconds, per key.
+            per (float): the rate limit window, in seconds.
+            capacity (Optional[float]): the maximum burst of requests per key, defaults to `rate`.
+            cooldown (float): the seconds a key rests after a 429 response without a Retry-After header.
+            lock_file (Optional[str]): if set, the budget of each key is kept in a file named after it
+                (e.g. "<lock_file>.0") and shared by all processes using it.
+            subscription_key (Optional[str]): the key of the account the subscriptions are managed with, the
+                first key by default; a key outside `keys` gets its own budget and only sends the subscription
+                requests.
+        """
+        self._keys = list(dict.fromkeys(key for key in keys if key))
+        if not self._keys:
+            raise APIKeyMissingError("The key pool requires at least one API key.")
+
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity
+        self.cooldown = cooldown
+        self.lock_file = lock_file
+        self._buckets = [
+            FileTokenBucket(f"{lock_file}.{slot}", rate=rate, per=per, capacity=capacity)
+            if lock_file
+            else TokenBucket(rate=rate, per=per, capacity=capacity)
+            for slot in range(len(self._keys))
+        ]
+        self.subscription_key = subscription_key or self._keys[0]
+        if self.subscription_key in self._keys:
+            self._account_slot = self._keys.index(self.subscription_key)
+            self._account_bucket = self._buckets[self._account_slot]
+        else:
+            self._account_slot = None
+            self._account_bucket = (
+                FileTokenBucket(f"{lock_file}.subscriptions", rate=rate, per=per, capacity=capacity)
+                if lock_file
+                else TokenBucket(rate=rate, per=per, capacity=capacity)
+            )
+        self._lock = threading.Lock()
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        """the API keys, in the order of their labels"""
+        return tuple(self._keys)
+
+    def settings(self) -> Dict[str, Any]:
+        """
+        Function that returns the arguments the pool was built with, e.g. to build the same pool in another process.
+
+        Returns:
+            Dict[str, Any]: the keys, rate, per, capacity, cooldown, lock_file and subscription_key arguments.
+        """
+        return {
+            "keys": list(self._keys),
+            "rate": self.rate,
+            "per": self.per,
+            "capacity": self.capacity,
+            "cooldown": self.cooldown,
+            "lock_file": self.lock_file,
+            "subscription_key": self.subscription_key,
+        }
+
+    def reserve(self, account: bool = False) -> Tuple[str, TokenBucket, float]:
+        """
+        Function that assigns a request to the key with the most tokens left, without blocking.
+
+        Args:
+            account (bool): the request is a subscription one, it goes to the subscription key.
+        Returns:
+            Tuple[str, TokenBucket, float]: the key, its bucket, to pass the rate limit headers and 429 responses
+                to, and the seconds to wait before the request is sent.
+        """
+        if account:
+            return self.subscription_key, self._account_bucket, self._account_bucket.reserve()
+        # the choice and the reservation are atomic, so concurrent requests spread over the keys
+        with self._lock:
+            slot = max(range(len(self._buckets)), key=lambda index: self._buckets[index].available())
+            bucket = self._buckets[slot]
+            delay = bucket.reserve()
+        return self._keys[slot], bucket, delay
+
+    def acquire(self, account: bool = False) -> Tuple[str, TokenBucket, float]:
+        """
+        Function that assigns a request to the key with the most tokens left, blocking until the key allows it.
+
+        Args:
+            account (bool): the request is a subscription one, it goes to the subscription key.
+        Returns:
+            Tuple[str, TokenBucket, float]: the key, its bucket and the seconds spent waiting.
+        """
+        key, bucket, delay = self.reserve(account)
+        if delay > 0:
+            time.sleep(delay)
+        return key, bucket, delay
+
+    def cool_down(self, bucket: TokenBucket, retry_after: Optional[float] = None):
+        """
+        Function that rests a key answered with a 429 response.
+
+        Args:
+            bucket (TokenBucket): the bucket of the key, as returned by `acquire`.
+            retry_after (Optional[float]): the Retry-After seconds of the response, `cooldown` if missing.
+        """
+        bucket.pause(retry_after if retry_after else self.cooldown)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Function that returns the tokens available to each key.
+
+        Returns:
+            Dict[str, float]: the tokens available per key label (e.g. "key-0", "subscriptions" for a separate
+                subscription key), negative while a key cools down.
+        """
+        stats = {f"key-{slot}": bucket.available() for slot, bucket in enumerate(self._buckets)}
+        if self._account_slot is None:
+            stats["subscriptions"] = self._account_bucket.available()
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"KeyPool({len(self._keys)} keys, rate={self.rate}, per={self.per})"
@@ -1,31 +1,228 @@
 """Module that contains the make request helper."""
-from requests.exceptions import HTTPError
+from time import perf_counter
+from typing import Any, Dict, Hashable, Optional
 
+from pybraries.cache import ResponseCache
+from pybraries.errors import (
+    DEGRADED_ERRORS,
+    ConnectionFailedError,
+    LibrariesIOError,
+    RateLimitedError,
+    RequestTimeoutError,
+    ServerError,
+    error_for_status,
+    redact_keys,
+)
+from pybraries.key_pool import ACCOUNT_ENDPOINTS
+from pybraries.metrics import RequestEvent
 from pybraries.pagination import fix_pages
+from pybraries.rate_limit import retry_after_seconds
+from pybraries.remote_sess import LibIOSession
+from pybraries.single_flight import SingleFlight
 
 
 # pylint: disable=broad-except
-def make_request(url: str, kind: str) -> str:
+def make_request(
+    url: str,
+    kind: str,
+    params: Optional[Dict] = None,
+    endpoint: str = "",
+    raw: bool = False,
+    raise_errors: bool = False,
+) -> Any:
     """Call api server
 
+    The shared session only carries the API key, the query parameters are built per call
+    so concurrent requests never observe each other's parameters.
+
+    The failed requests raise, or print, a `LibrariesIOError` telling what went wrong: `NotFoundError`,
+    `RateLimitedError`, `ServerError`, `RequestTimeoutError`, `ConnectionFailedError`, or `CircuitOpenError`
+    when the endpoint kept failing and its requests are shed for a while. The Retry-After of a 429 response
+    holds off the rate limiter, so the next requests wait for it.
+
+    Identical GET requests made while one is in flight, from any thread, wait for it and share its
+    decoded result (or error) instead of sending their own; like the cached ones, the shared results must be
+    treated as read-only. With a key pool, the subscription requests are neither cached nor shared.
+
     Args:
         url (str): base url to call
         kind (str): get, post, put, or delete
+        params (Optional[Dict]): the query parameters of this call
+        endpoint (str): the endpoint name (e.g. "project"), used to pick the cache time to live and
+            to report the request event
+        raw (bool): return the undecoded response body as bytes
+        raise_errors (bool): raise the `LibrariesIOError` of a failed request instead of printing it and returning
+            an empty string
     Returns:
-        `json` encoded response from libraries.io
+        `json` encoded response from libraries.io, or its body bytes if raw is set
     """
-    ret = ""
+    params = {} if params is None else dict(params)
+    if LibIOSession.get_key_pool() is None:
+        # fail early and loudly if we do not have an API key
+        params["api_key"] = LibIOSession.get_key()
+    if kind == "post":
+        params["include_prerelease"] = "False"
+
+    try:
+        fix_pages(params=params)  # Must be called before any request for page validation
+        flights = LibIOSession.get_single_flight()
+        if flights is None or kind != "get" or _is_private(endpoint):
+            return _send(url, kind, params, endpoint, raw)
+        return _coalesced(flights, ResponseCache.make_key(kind, url, params, raw), url, params, endpoint, raw)
+    except LibrariesIOError as err:
+        if raise_errors:
+            raise
+        print(f"{'HTTP' if err.status is not None else 'Other'} error occurred: {err}")
+    except Exception as err:
+        if raise_errors:
+            raise
+        print(f"Other error occurred: {redact_keys(str(err))}")
+
+    return ""
+
+
+def _is_private(endpoint: str) -> bool:
+    """whether the response belongs to the subscription key of the key pool only, it is neither cached nor shared"""
+    return endpoint in ACCOUNT_ENDPOINTS and LibIOSession.get_key_pool() is not None
+
+
+def _coalesced(flights: SingleFlight, key: Hashable, url: str, params: Dict, endpoint: str, raw: bool) -> Any:
+    """
+    Function that sends a GET request, or waits for the identical one in flight and shares its outcome;
+    the waiting callers report a "coalesced" request event.
+    """
+    sent = False
+
+    def send() -> Any:
+        nonlocal sent
+        sent = True
+        return _send(url, "get", params, endpoint, raw)
+
+    event = RequestEvent(endpoint or url, "get")
+    event.cache = "coalesced"
+    start = perf_counter()
     try:
-        params = {"include_prerelease": "False"} if kind == "post" else {}
-        fix_pages()  # Must be called before any request for page validation
-        resp = getattr(sess, kind)(url, params=params)
-        resp.raise_for_status()
-        ret = resp.json()
-    except HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
+        return flights.do(key, send)
     except Exception as err:
-        print(f"Other error occurred: {err}")
+        event.error = redact_keys(str(err))
+        raise
     finally:
-        clear_params()
+        if not sent:
+            event.queue_wait = perf_counter() - start
+            LibIOSession.emit(event)
 
-    return ret
+
+def _send(url: str, kind: str, params: Dict, endpoint: str, raw: bool) -> Any:
+    """
+    Function that sends a request, or serves it from the cache, and reports its request event;
+    the failed requests raise a `LibrariesIOError`.
+    """
+    sess = LibIOSession.get_session()  # imports the HTTP stack on the first request
+    # pylint: disable=import-outside-toplevel
+    from requests.exceptions import ConnectionError as RequestsConnectionError, RetryError, Timeout
+    from urllib3.exceptions import ReadTimeoutError
+
+    event = RequestEvent(endpoint or url, kind)
+    breaker = LibIOSession.get_circuit_breaker()
+    # the circuit the outcome of the request is recorded in, once the breaker let it through
+    circuit = None
+    degraded = False
+    try:
+        # serve fresh responses from the cache, stale ones are revalidated with a conditional request
+        private = _is_private(endpoint)
+        cache = LibIOSession.get_cache() if not private else None
+        cache_key = cache.make_key(kind, url, params, raw) if cache is not None and kind == "get" else None
+        entry = cache.get(cache_key) if cache_key is not None else None
+        if entry is not None and entry.is_fresh():
+            event.cache = "hit"
+            return entry.value
+        event.cache = "miss" if cache_key is not None else None
+        headers = entry.validators() if entry is not None else {}
+
+        # shed the requests of a failing endpoint before they spend a token
+        if breaker is not None:
+            breaker.before(event.endpoint)
+            circuit = event.endpoint
+
+        pool = LibIOSession.get_key_pool()
+        if pool is not None:
+            # the key with the most budget left, its own bucket takes the place of the session rate limiter
+            api_key, limiter, event.queue_wait = pool.acquire(account=endpoint in ACCOUNT_ENDPOINTS)
+            params = dict(params, api_key=api_key)
+        else:
+            limiter = LibIOSession.get_rate_limiter()
+            if limiter is not None:
+                event.queue_wait = limiter.acquire()
+
+        # the errors of the HTTP stack quote the url along with the API key, they are not chained
+        start = perf_counter()
+        try:
+            resp = getattr(sess, kind)(url, params=params, headers=headers, timeout=LibIOSession.get_timeout())
+        except Timeout as err:
+            raise RequestTimeoutError(redact_keys(f"Request timed out: {err}"), url) from None
+        except RetryError as err:
+            raise ServerError(redact_keys(f"Server error after retrying: {err}"), url) from None
+        except RequestsConnectionError as err:
+            # a read timeout that exhausted the retries is reported as a connection error
+            if isinstance(getattr(err.args[0] if err.args else None, "reason", None), ReadTimeoutError):
+                raise RequestTimeoutError(redact_keys(f"Request timed out: {err}"), url) from None
+            raise ConnectionFailedError(redact_keys(f"Connection failed: {err}"), url) from None
+        content = resp.content
+        event.network_time = perf_counter() - start
+        event.status = resp.status_code
+        event.bytes = len(content)
+        retries = getattr(getattr(resp, "raw", None), "retries", None)
+        event.attempts = 1 + len(retries.history) if retries is not None else 1
+        if limiter is not None:
+            limiter.update_from_headers(resp.headers)
+
+        if entry is not None and resp.status_code == 304:
+            event.cache = "revalidated"
+            cache.refresh(cache_key, endpoint)
+            return entry.value
+
+        error = error_for_status(
+            resp.status_code,
+            url,
+            getattr(resp, "reason", ""),
+            retry_after=retry_after_seconds(resp.headers) if resp.status_code == 429 else None,
+            response=resp,
+        )
+        if error is not None:
+            if isinstance(error, RateLimitedError):
+                if pool is not None:
+                    pool.cool_down(limiter, error.retry_after)
+                elif error.retry_after and limiter is not None:
+                    limiter.pause(error.retry_after)
+            raise error
+
+        start = perf_counter()
+        ret = content if raw or not content else LibIOSession.get_decoder()(content)
+        event.decode_time = perf_counter() - start
+
+        if cache_key is not None:
+            cache.put(
+                cache_key,
+                ret,
+                len(content),
+                endpoint,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+            )
+        elif cache is not None:
+            # writes change what the collection they belong to returns
+            cache.invalidate(url.rsplit("/", 2)[0])
+        return ret
+    except LibrariesIOError as err:
+        event.error = str(err)
+        degraded = isinstance(err, DEGRADED_ERRORS)
+        raise
+    except Exception as err:
+        event.error = redact_keys(str(err))
+        # the request failed before libraries.io answered it
+        degraded = event.status is None
+        raise
+    finally:
+        if circuit is not None:
+            (breaker.record_failure if degraded else breaker.record_success)(circuit)
+        LibIOSession.emit(event)
@@ -0,0 +1,179 @@
+"""Module that implements the per-request instrumentation events and the built-in request metrics."""
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class RequestEvent:
+    """
+    Class that describes a single request made to libraries.io; all times are in seconds.
+    """
+
+    __slots__ = (
+        "endpoint",
+        "method",
+        "status",
+        "attempts",
+        "bytes",
+        "queue_wait",
+        "network_time",
+        "decode_time",
+        "cache",
+        "error",
+    )
+
+    def __init__(self, endpoint: str, method: str):
+        """
+        Args:
+            endpoint (str): the endpoint the request was made to (e.g. "project_dependencies").
+            method (str): get, post, put, or delete
+        """
+        self.endpoint = endpoint
+        self.method = method
+        self.status: Optional[int] = None
+        self.attempts = 0
+        self.bytes = 0
+        self.queue_wait = 0.0
+        self.network_time = 0.0
+        self.decode_time = 0.0
+        # one of "hit", "miss", "revalidated", "coalesced" when the response of an identical request in flight
+        # was shared, or None when the response cache is not used
+        self.cache: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def total_time(self) -> float:
+        """the time spent waiting, on the network and decoding"""
+        return self.queue_wait + self.network_time + self.decode_time
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the event as a dict, e.g. for structured logging.
+
+        Returns:
+            Dict: the event fields.
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"RequestEvent({self.to_dict()!r})"
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """nearest rank percentile of an ordered list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class EndpointStats:
+    """
+    Class that keeps the counters of an endpoint, the total seconds of its requests and a rolling window of
+    its latencies.
+    """
+
+    __slots__ = ("count", "errors", "cache_hits", "bytes", "seconds", "latencies")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+
+class RequestMetrics:
+    """
+    Class that aggregates the request events into per-endpoint counters and rolling latency percentiles.
+    """
+
+    def __init__(self, window: int = 1024):
+        """
+        Args:
+            window (int): the number of most recent latencies kept per endpoint.
+        """
+        self.window = window
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: RequestEvent):
+        """
+        Function that accounts for a request event.
+
+        Args:
+            event (RequestEvent): the event to record.
+        """
+        with self._lock:
+            stats = self._stats.get(event.endpoint)
+            if stats is None:
+                stats = self._stats[event.endpoint] = EndpointStats(self.window)
+            stats.count += 1
+            stats.errors += event.error is not None
+            stats.cache_hits += event.cache == "hit"
+            stats.bytes += event.bytes
+            stats.seconds += event.total_time
+            stats.latencies.append(event.total_time)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Function that returns the current metrics of every endpoint.
+
+        Returns:
+            Dict[str, Dict[str, float]]: per endpoint, the count, errors, cache_hits, bytes and seconds counters
+                along with the p50, p95 and p99 latencies of the rolling window.
+        """
+        with self._lock:
+            stats = {
+                endpoint: (s.count, s.errors, s.cache_hits, s.bytes, s.seconds, sorted(s.latencies))
+                for endpoint, s in self._stats.items()
+            }
+
+        return {
+            endpoint: {
+                "count": count,
+                "errors": errors,
+                "cache_hits": cache_hits,
+                "bytes": size,
+                "seconds": seconds,
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+                "p99": _percentile(ordered, 0.99),
+            }
+            for endpoint, (count, errors, cache_hits, size, seconds, ordered) in stats.items()
+        }
+
+    def to_prometheus(self, prefix: str = "pybraries") -> str:
+        """
+        Function that renders the metrics in the Prometheus text exposition format, one block of samples per
+        metric family.
+
+        Args:
+            prefix (str): the metric name prefix.
+        Returns:
+            str: the metrics text.
+        """
+        snapshot = sorted(self.snapshot().items())
+        lines = [f"# TYPE {prefix}_request_seconds summary"]
+        for endpoint, stats in snapshot:
+            label = f'endpoint="{endpoint}"'
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(f'{prefix}_request_seconds{{{label},quantile="0.{quantile[1:]}"}} {stats[quantile]}')
+            lines.append(f"{prefix}_request_seconds_sum{{{label}}} {stats['seconds']}")
+            lines.append(f"{prefix}_request_seconds_count{{{label}}} {stats['count']}")
+        for name, field in (
+            ("requests_total", "count"),
+            ("request_errors_total", "errors"),
+            ("cache_hits_total", "cache_hits"),
+            ("response_bytes_total", "bytes"),
+        ):
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.extend(f'{prefix}_{name}{{endpoint="{endpoint}"}} {stats[field]}' for endpoint, stats in snapshot)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        Function that drops all the recorded metrics.
+        """
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,194 @@
+"""Module that implements the typed, slotted result models of the libraries.io responses."""
+import sys
+from typing import Any, Dict, FrozenSet, Optional
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern a categorical string, or every string of a list which is turned into a tuple.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(sys.intern(item) if isinstance(item, str) else item for item in value)
+    return value
+
+
+class Model:
+    """
+    Base class of the result models; the fields are the `__slots__` of each model, the fields listed in
+    `_interned` hold frequently repeated strings and `_nested` maps the fields holding lists of other models.
+    Fields returned by libraries.io but not modelled are dropped, request the plain dicts to keep them.
+    """
+
+    __slots__ = ()
+    _interned: FrozenSet[str] = frozenset()
+    _nested: Dict[str, type] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Model":
+        """
+        Function that builds the model from a decoded libraries.io response.
+
+        Args:
+            data (Dict): the decoded response.
+        Returns:
+            Model: the model instance.
+        """
+        obj = cls.__new__(cls)
+        for field in cls.__slots__:
+            value = data.get(field)
+            if value is not None and field in cls._nested:
+                value = tuple(cls._nested[field].from_dict(item) for item in value)
+            elif field in cls._interned:
+                value = _intern(value)
+            setattr(obj, field, value)
+        return obj
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the model fields as a dict.
+
+        Returns:
+            Dict: the fields and their values.
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({getattr(self, self.__slots__[0])!r})"
+
+
+class Version(Model):
+    """A released version of a project."""
+
+    __slots__ = ("number", "published_at", "spdx_expression", "original_license")
+    _interned = frozenset({"spdx_expression", "original_license"})
+
+
+class Dependency(Model):
+    """A dependency of a project version or of a repository."""
+
+    __slots__ = (
+        "project_name",
+        "name",
+        "platform",
+        "requirements",
+        "latest_stable",
+        "latest",
+        "deprecated",
+        "outdated",
+        "kind",
+        "optional",
+        "filepath",
+        "normalized_licenses",
+    )
+    _interned = frozenset({"platform", "requirements", "kind", "filepath", "normalized_licenses"})
+
+
+class Project(Model):
+    """A project (package) of a platform."""
+
+    __slots__ = (
+        "name",
+        "platform",
+        "description",
+        "homepage",
+        "repository_url",
+        "package_manager_url",
+        "language",
+        "licenses",
+        "normalized_licenses",
+        "keywords",
+        "status",
+        "stars",
+        "forks",
+        "rank",
+        "contributions_count",
+        "dependents_count",
+        "dependent_repos_count",
+        "latest_release_number",
+        "latest_release_published_at",
+        "latest_stable_release_number",
+        "latest_stable_release_published_at",
+        "versions",
+        "dependencies",
+    )
+    _interned = frozenset({"platform", "language", "licenses", "normalized_licenses", "keywords", "status"})
+    _nested = {"versions": Version, "dependencies": Dependency}
+
+
+class Repository(Model):
+    """A source code repository."""
+
+    __slots__ = (
+        "full_name",
+        "host_type",
+        "description",
+        "homepage",
+        "language",
+        "license",
+        "keywords",
+        "fork",
+        "stargazers_count",
+        "forks_count",
+        "open_issues_count",
+        "size",
+        "default_branch",
+        "github_id",
+        "rank",
+        "created_at",
+        "pushed_at",
+        "dependencies",
+    )
+    _interned = frozenset({"host_type", "language", "license", "keywords", "default_branch"})
+    _nested = {"dependencies": Dependency}
+
+
+class User(Model):
+    """A user or organisation of a repository host."""
+
+    __slots__ = ("login", "name", "user_type", "host_type", "company", "blog", "location", "github_id")
+    _interned = frozenset({"user_type", "host_type", "location"})
+
+
+# the model of the responses of each search action, the rest are not modelled
+ACTION_MODELS = {
+    "project": Project,
+    "project_dependencies": Project,
+    "project_dependents": Project,
+    "project_dependent_repositories": Repository,
+    "project_contributors": User,
+    "special_project_search": Project,
+    "repository": Repository,
+    "repository_dependencies": Repository,
+    "repository_projects": Project,
+    "user": User,
+    "user_repositories": Repository,
+    "user_projects": Project,
+    "user_projects_contributions": Project,
+    "user_repositories_contributions": Repository,
+    "user_dependencies": Project,
+}
+
+
+def to_models(action: str, resp: Any) -> Any:
+    """
+    Convert the decoded response of a search action to its models.
+
+    Args:
+        action (str): function action name
+        resp (Any): the decoded response
+    Returns:
+        (Any): a model for a dict response, a list of models for a list response, otherwise the response unchanged.
+    """
+    model: Optional[type] = ACTION_MODELS.get(action)
+    if model is None:
+        return resp
+    if isinstance(resp, dict):
+        return model.from_dict(resp)
+    if isinstance(resp, list):
+        return [model.from_dict(item) for item in resp]
+    return resp
@@ -1,31 +1,147 @@
 """Module that implements pagination for results provided by libraries.io"""
-from pybraries.helpers import sess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+from pybraries.remote_sess import LibIOSession
 
 DEFAULT_PAGE = 1
 DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+# the number of pages fetched concurrently by `fetch_pages`
+FAN_OUT_CONCURRENCY = 8
 
 
-def fix_pages(page=None, per_page=None):
+def fix_pages(page=None, per_page=None, params: Optional[Dict] = None):
     """
     Change pagination settings.
     :arg
-        per_page (int): (optional) use this value instead of current session params
-        page (int): (optional) use this value instead of current session params
+        per_page (int): (optional) use this value instead of the current params
+        page (int): (optional) use this value instead of the current params
+        params (Optional[Dict]): (optional) the query parameters of a single call, fixed in place instead of the
+            shared session params
 
     Returns:
         valid_values_range (bool): page and per_page values within valid range
     """
+    if params is None:
+        params = LibIOSession.get_session().params
     try:
-        page = sess.params["page"] if page is None else page
+        page = params["page"] if page is None else page
     except KeyError:
         page = DEFAULT_PAGE
     try:
-        per_page = sess.params["per_page"] if per_page is None else per_page
+        per_page = params["per_page"] if per_page is None else per_page
     except KeyError:
         per_page = DEFAULT_PER_PAGE
 
-    sess.params["page"] = max(page, 1)  # Min value is 1
-    sess.params["per_page"] = min(max(per_page, 1), 100)  # Values between 1 and 100
+    params["page"] = max(page, 1)  # Min value is 1
+    params["per_page"] = min(max(per_page, 1), MAX_PER_PAGE)  # Values between 1 and 100
 
-    valid_values_range = sess.params["page"] == page and sess.params["per_page"] == per_page
+    valid_values_range = params["page"] == page and params["per_page"] == per_page
     return valid_values_range
+
+
+def paginate(
+    fetch_page: Callable[[int, int], Any], page: int = DEFAULT_PAGE, per_page: int = MAX_PER_PAGE
+) -> Iterator:
+    """
+    Lazily iterate over the items of a paginated endpoint, one item at a time.
+
+    The next page is fetched in the background while the current one is consumed, so at most
+    two pages are held in memory; iteration stops on the first short (or failed) page.
+
+    Args:
+        fetch_page (Callable[[int, int], Any]): fetches the items of a page given the page and per_page values.
+        page (int): the page to start from.
+        per_page (int): the items per page, clamped between 1 and 100.
+
+    Returns:
+        Iterator: the items of all the pages.
+    """
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = pool.submit(fetch_page, page, per_page)
+        while pending is not None:
+            items = pending.result()
+            items = items if isinstance(items, list) else []
+            # a full page means there may be more, so start fetching the next one right away
+            page += 1
+            pending = pool.submit(fetch_page, page, per_page) if len(items) >= per_page else None
+            yield from items
+    finally:
+        pool.shutdown(wait=False)
+
+
+def item_key(item: Any) -> Hashable:
+    """
+    Build the identity of a list item, used to drop the items repeated across page boundaries.
+
+    Args:
+        item (Any): a project, repository or user dict.
+    Returns:
+        Hashable: the repository full name, the user login or the project platform and name, if present.
+    """
+    if isinstance(item, dict):
+        if item.get("full_name"):
+            return "repository", item.get("host_type"), item["full_name"]
+        if item.get("login"):
+            return "user", item.get("host_type"), item["login"]
+        if item.get("name") and item.get("platform"):
+            return "project", item["platform"].lower(), item["name"]
+    return id(item)
+
+
+def fetch_pages(
+    fetch_page: Callable[[int, int], Any],
+    limit: int,
+    page: int = DEFAULT_PAGE,
+    per_page: int = MAX_PER_PAGE,
+    concurrency: int = FAN_OUT_CONCURRENCY,
+    key: Callable[[Any], Hashable] = item_key,
+) -> List:
+    """
+    Fetch the first `limit` items of a paginated endpoint, requesting the pages they span concurrently.
+
+    The pages are reassembled in order and the items repeated across page boundaries (e.g. when the
+    ranking shifts during the fetch) are dropped; the pages needed to make up for them are fetched next.
+
+    Args:
+        fetch_page (Callable[[int, int], Any]): fetches the items of a page given the page and per_page values.
+        limit (int): the number of items wanted.
+        page (int): the page to start from.
+        per_page (int): the items per page, clamped between 1 and 100 and to no more than `limit`.
+        concurrency (int): the number of pages fetched at once.
+        key (Callable[[Any], Hashable]): builds the identity of an item.
+
+    Returns:
+        List: up to `limit` unique items, fewer if the endpoint runs out of them.
+    """
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE, max(limit, 1))
+
+    items: List = []
+    seen = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while len(items) < limit:
+            # at most one page per worker at a time, so that a short page ends the fetch without overshooting
+            pages = range(page, page + min(-(-(limit - len(items)) // per_page), concurrency))
+            exhausted = False
+            for result in pool.map(lambda page_no: fetch_page(page_no, per_page), pages):
+                result = result if isinstance(result, list) else []
+                for item in result:
+                    identity = key(item)
+                    if identity not in seen:
+                        seen.add(identity)
+                        items.append(item)
+                # a short (or failed) page is the last one
+                if len(result) < per_page:
+                    exhausted = True
+                    break
+            if exhausted:
+                break
+            page = pages[-1] + 1
+
+    return items[:limit]
@@ -0,0 +1,201 @@
+"""Module that implements the client side rate limiting of the libraries.io requests."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# the rate limit headers returned by libraries.io
+LIMIT_HEADER = "X-RateLimit-Limit"
+REMAINING_HEADER = "X-RateLimit-Remaining"
+RETRY_AFTER_HEADER = "Retry-After"
+
+
+def retry_after_seconds(headers: Mapping) -> Optional[float]:
+    """
+    Function that reads the seconds to wait from the Retry-After header of a response, given either as
+    seconds or as an http date.
+
+    Args:
+        headers (Mapping): the (case insensitive) response headers.
+
+    Returns:
+        Optional[float]: the seconds to wait, None if the header is missing or invalid.
+    """
+    value = headers.get(RETRY_AFTER_HEADER)
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Class that implements a thread-safe token bucket, each request spends one token and tokens
+    are refilled at `rate` tokens every `per` seconds up to `capacity`.
+    """
+
+    def __init__(self, rate: float = 60, per: float = 60.0, capacity: Optional[float] = None):
+        """
+        Args:
+            rate (float): the amount of tokens refilled every `per` seconds.
+            per (float): the refill window, in seconds.
+            capacity (Optional[float]): the maximum burst of tokens, defaults to `rate`.
+        """
+        self.rate = rate
+        self.per = per
+        self.capacity = rate if capacity is None else capacity
+        self._clock = time.monotonic
+        self._lock = threading.Lock()
+        self._state = {"tokens": float(self.capacity), "stamp": self._clock()}
+
+    @contextmanager
+    def _state_locked(self) -> Iterator[Dict]:
+        """
+        Context manager that yields the bucket state while holding its lock.
+        """
+        with self._lock:
+            yield self._state
+
+    def _refill(self, state: Dict):
+        """
+        Function that refills the tokens of the state for the time elapsed since its last update.
+        """
+        now = self._clock()
+        elapsed = max(now - state["stamp"], 0.0)
+        state["tokens"] = min(float(self.capacity), state["tokens"] + elapsed * self.rate / self.per)
+        state["stamp"] = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Function that reserves tokens without blocking.
+
+        Args:
+            tokens (float): the amount of tokens to reserve.
+
+        Returns:
+            float: the seconds the caller has to wait before the reservation is honoured.
+        """
+        with self._state_locked() as state:
+            self._refill(state)
+            state["tokens"] -= tokens
+            deficit = -state["tokens"]
+
+        return max(deficit, 0.0) * self.per / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Function that blocks until the requested tokens are available.
+
+        Args:
+            tokens (float): the amount of tokens to acquire.
+
+        Returns:
+            float: the seconds spent waiting.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def available(self) -> float:
+        """
+        Function that returns the current estimate of the available tokens.
+
+        Returns:
+            float: the tokens available, negative if there are pending reservations.
+        """
+        with self._state_locked() as state:
+            self._refill(state)
+            return state["tokens"]
+
+    def update_from_headers(self, headers: Mapping):
+        """
+        Function that corrects the token estimate using the rate limit headers of a response, if present.
+
+        Args:
+            headers (Mapping): the (case insensitive) response headers.
+        """
+        try:
+            limit = int(headers.get(LIMIT_HEADER)) if headers.get(LIMIT_HEADER) is not None else None
+            remaining = int(headers.get(REMAINING_HEADER)) if headers.get(REMAINING_HEADER) is not None else None
+        except (TypeError, ValueError):
+            return
+
+        with self._state_locked() as state:
+            self._refill(state)
+            if limit is not None and limit < self.capacity:
+                self.capacity = limit
+            if remaining is not None:
+                # the server knows better, but never hand out tokens already reserved
+                state["tokens"] = min(state["tokens"], float(remaining))
+
+    def pause(self, seconds: float):
+        """
+        Function that holds off the requests for the given time, e.g. the Retry-After of a 429 response;
+        the tokens are drained so the next reservation waits at least that long.
+
+        Args:
+            seconds (float): the seconds to hold off.
+        """
+        with self._state_locked() as state:
+            self._refill(state)
+            state["tokens"] = min(state["tokens"], 1.0 - seconds * self.rate / self.per)
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Class that implements a token bucket whose state lives in a file protected by an exclusive file lock,
+    so several worker processes on the same host share a single budget.
+    """
+
+    def __init__(self, lock_file: str, rate: float = 60, per: float = 60.0, capacity: Optional[float] = None):
+        """
+        Args:
+            lock_file (str): the file holding the shared bucket state, created if missing.
+            rate (float): the amount of tokens refilled every `per` seconds.
+            per (float): the refill window, in seconds.
+            capacity (Optional[float]): the maximum burst of tokens, defaults to `rate`.
+        """
+        if fcntl is None:
+            raise RuntimeError("File lock backed rate limiting requires a POSIX platform.")
+
+        super().__init__(rate=rate, per=per, capacity=capacity)
+        self.lock_file = lock_file
+        # the wall clock is shared across processes, the monotonic clock is not
+        self._clock = time.time
+
+    @contextmanager
+    def _state_locked(self) -> Iterator[Dict]:
+        """
+        Context manager that yields the shared bucket state while holding the file lock.
+        """
+        with self._lock, open(self.lock_file, "a+", encoding="utf8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    state = json.loads(handle.read())
+                except ValueError:
+                    state = {"tokens": float(self.capacity), "stamp": self._clock()}
+
+                yield state
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
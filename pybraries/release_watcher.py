@@ -0,0 +1,328 @@
+"""Module that implements the incremental new release watcher."""
+import heapq
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pybraries.dependency_graph import node_id
+from pybraries.search import Search
+
+
+def _timestamp(published_at: Optional[str]) -> Optional[float]:
+    """the POSIX timestamp of a libraries.io date, e.g. "2022-04-01T12:00:00.000Z" """
+    if not published_at:
+        return None
+    try:
+        return datetime.fromisoformat(published_at.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class Fingerprint:
+    """
+    Class that keeps the compact release state of a watched project along with its polling schedule.
+    """
+
+    __slots__ = ("platform", "name", "latest", "published_at", "versions", "interval", "next_check")
+
+    def __init__(self, platform: str, name: str, interval: float, next_check: float = 0.0):
+        self.platform = platform
+        self.name = name
+        # the latest release number, its publication date and the number of versions, None until fetched
+        self.latest: Optional[str] = None
+        self.published_at: Optional[str] = None
+        self.versions: Optional[int] = None
+        # the seconds between two checks and the time of the next one
+        self.interval = interval
+        self.next_check = next_check
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the fingerprint as a JSON serializable dict.
+
+        Returns:
+            Dict: the fingerprint fields.
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Fingerprint":
+        """
+        Function that rebuilds a fingerprint from the output of `to_dict`.
+
+        Args:
+            data (Dict): the serialized fingerprint.
+        Returns:
+            Fingerprint: the fingerprint.
+        """
+        fingerprint = cls(data["platform"], data["name"], data["interval"], data["next_check"])
+        fingerprint.latest = data["latest"]
+        fingerprint.published_at = data["published_at"]
+        fingerprint.versions = data["versions"]
+        return fingerprint
+
+
+class ReleaseEvent:
+    """
+    Class that describes the new releases of a project found by the watcher.
+    """
+
+    __slots__ = ("platform", "name", "previous", "latest", "published_at", "new_versions")
+
+    def __init__(
+        self,
+        platform: str,
+        name: str,
+        previous: Optional[str],
+        latest: Optional[str],
+        published_at: Optional[str],
+        new_versions: List[str],
+    ):
+        self.platform = platform
+        self.name = name
+        self.previous = previous
+        self.latest = latest
+        self.published_at = published_at
+        self.new_versions = new_versions
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the event as a dict.
+
+        Returns:
+            Dict: the event fields.
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"ReleaseEvent({self.platform}/{self.name}: {self.previous} -> {self.latest})"
+
+
+class ReleaseWatcher:
+    """
+    Class that polls the watched projects for new releases, checking the frequently releasing projects
+    more often; each project keeps a compact fingerprint and only real new releases produce events.
+
+    A project is first checked every `release gap / checks_per_release` seconds, its median gap between
+    past releases; the interval then halves when a release is found and grows by half when none is,
+    always within `min_interval` and `max_interval`.
+    """
+
+    def __init__(
+        self,
+        projects: Iterable[Tuple[str, str]] = (),
+        min_interval: float = 300.0,
+        max_interval: float = 7 * 24 * 3600.0,
+        checks_per_release: float = 4.0,
+        concurrency: int = 4,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            projects (Iterable[Tuple[str, str]]): the (platform, name) pairs to watch.
+            min_interval (float): the minimum seconds between two checks of a project.
+            max_interval (float): the maximum seconds between two checks of a project.
+            checks_per_release (float): the checks made within the usual gap between two releases of a project.
+            concurrency (int): the number of concurrent `project` calls.
+            clock (Callable[[], float]): the wall clock the schedule is based on.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.checks_per_release = checks_per_release
+        self.concurrency = concurrency
+        self.clock = clock
+        self.fingerprints: Dict[str, Fingerprint] = {}
+        self._queue: List[Tuple[float, str]] = []
+        for platform, name in projects:
+            self.add(platform, name)
+
+    def add(self, platform: str, name: str):
+        """
+        Function that starts watching a project, its first check is due right away.
+
+        Args:
+            platform (str): package manager (e.g. "pypi").
+            name (str): project name.
+        """
+        key = node_id(platform, name)
+        if key not in self.fingerprints:
+            self.fingerprints[key] = Fingerprint(platform, name, self.min_interval)
+            heapq.heappush(self._queue, (0.0, key))
+
+    def remove(self, platform: str, name: str):
+        """
+        Function that stops watching a project.
+
+        Args:
+            platform (str): package manager (e.g. "pypi").
+            name (str): project name.
+        """
+        self.fingerprints.pop(node_id(platform, name), None)
+
+    def due(self, budget: Optional[int] = None) -> List[str]:
+        """
+        Function that takes the projects whose check is due off the schedule, most overdue first.
+
+        Args:
+            budget (Optional[int]): the maximum number of projects, all the due ones by default.
+        Returns:
+            List[str]: the identifiers of the due projects.
+        """
+        now = self.clock()
+        keys: List[str] = []
+        taken = set()
+        while self._queue and self._queue[0][0] <= now and (budget is None or len(keys) < budget):
+            next_check, key = heapq.heappop(self._queue)
+            fingerprint = self.fingerprints.get(key)
+            # skip the entries of removed projects and the ones superseded by a later schedule
+            if fingerprint is not None and fingerprint.next_check == next_check and key not in taken:
+                taken.add(key)
+                keys.append(key)
+        return keys
+
+    def poll(self, budget: Optional[int] = None) -> List[ReleaseEvent]:
+        """
+        Function that checks the due projects and returns their new releases.
+
+        Args:
+            budget (Optional[int]): the maximum number of projects to check, e.g. the requests left in the
+                rate limit window; the most overdue projects are checked first.
+        Returns:
+            List[ReleaseEvent]: the new releases found.
+        """
+        keys = self.due(budget)
+        args = [(self.fingerprints[key].platform, self.fingerprints[key].name) for key in keys]
+        events = []
+        for key, resp in zip(keys, Search.map(Search.project, args, workers=self.concurrency)):
+            event = self.update(key, resp)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def update(self, key: str, resp) -> Optional[ReleaseEvent]:
+        """
+        Function that compares a `project` response to the fingerprint of the project and reschedules it.
+
+        Args:
+            key (str): the identifier of the project.
+            resp: the `project` response, an empty string if the request failed.
+        Returns:
+            Optional[ReleaseEvent]: the new releases, None if there are none or the project was first fetched.
+        """
+        fingerprint = self.fingerprints[key]
+        if not isinstance(resp, dict):
+            # try again soon, without changing what we know about the project
+            self._schedule(fingerprint, self.min_interval)
+            return None
+
+        versions = resp.get("versions") or []
+        latest = resp.get("latest_release_number")
+        published_at = resp.get("latest_release_published_at")
+        first_fetch = fingerprint.versions is None
+
+        previous_at = _timestamp(fingerprint.published_at)
+        latest_at = _timestamp(published_at)
+        released = not first_fetch and (
+            (latest_at is not None and (previous_at is None or latest_at > previous_at))
+            or (latest != fingerprint.latest and len(versions) > fingerprint.versions)
+        )
+
+        event = None
+        if released:
+            if previous_at is None:
+                # without the date of the previous release the older versions cannot be told apart
+                new_versions = [latest] if latest else []
+            else:
+                new_versions = [
+                    version["number"]
+                    for version in versions
+                    if (_timestamp(version.get("published_at")) or 0.0) > previous_at
+                ]
+            event = ReleaseEvent(
+                fingerprint.platform, fingerprint.name, fingerprint.latest, latest, published_at, new_versions
+            )
+
+        if first_fetch:
+            interval = self._release_gap(versions) / self.checks_per_release
+        elif released:
+            interval = fingerprint.interval / 2
+        else:
+            interval = fingerprint.interval * 1.5
+
+        fingerprint.latest = latest
+        fingerprint.published_at = published_at
+        fingerprint.versions = len(versions)
+        self._schedule(fingerprint, interval)
+        return event
+
+    def _release_gap(self, versions: List[Dict]) -> float:
+        """the median seconds between the past releases, the maximum interval if unknown"""
+        stamps = sorted(filter(None, (_timestamp(version.get("published_at")) for version in versions)))
+        gaps = [later - earlier for earlier, later in zip(stamps, stamps[1:])]
+        return statistics.median(gaps) if gaps else self.max_interval
+
+    def _schedule(self, fingerprint: Fingerprint, interval: float):
+        """sets the interval of a project, within bounds, and queues its next check"""
+        fingerprint.interval = min(max(interval, self.min_interval), self.max_interval)
+        fingerprint.next_check = self.clock() + fingerprint.interval
+        heapq.heappush(self._queue, (fingerprint.next_check, node_id(fingerprint.platform, fingerprint.name)))
+
+    def watch(self, budget: Optional[int] = None, idle: float = 1.0) -> Iterator[ReleaseEvent]:
+        """
+        Function that polls forever, yielding the new releases as they are found.
+
+        Args:
+            budget (Optional[int]): the maximum number of projects checked per poll.
+            idle (float): the maximum seconds to sleep while no check is due.
+        Returns:
+            Iterator[ReleaseEvent]: the new releases.
+        """
+        while True:
+            yield from self.poll(budget)
+            wait = self._queue[0][0] - self.clock() if self._queue else idle
+            if wait > 0:
+                time.sleep(min(wait, idle))
+
+    def to_dict(self) -> Dict:
+        """
+        Function that returns the watcher state as a JSON serializable dict.
+
+        Returns:
+            Dict: the fingerprints of the watched projects.
+        """
+        return {"fingerprints": [fingerprint.to_dict() for fingerprint in self.fingerprints.values()]}
+
+    def save(self, path: str):
+        """
+        Function that atomically writes the watcher state to a JSON file.
+
+        Args:
+            path (str): the file to write.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as handle:
+            json.dump(self.to_dict(), handle)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "ReleaseWatcher":
+        """
+        Function that reads a watcher state written by `save`, keeping the schedule of each project.
+
+        Args:
+            path (str): the file to read.
+            **kwargs: the `ReleaseWatcher` arguments.
+        Returns:
+            ReleaseWatcher: the watcher.
+        """
+        watcher = cls(**kwargs)
+        with open(path, "r", encoding="utf8") as handle:
+            for data in json.load(handle)["fingerprints"]:
+                fingerprint = Fingerprint.from_dict(data)
+                key = node_id(fingerprint.platform, fingerprint.name)
+                watcher.fingerprints[key] = fingerprint
+                heapq.heappush(watcher._queue, (fingerprint.next_check, key))
+        return watcher
@@ -1,13 +1,26 @@
-"""Describes the libraries.io session."""
+"""Describes the libraries.io session.
+
+The HTTP stack (requests and urllib3) is imported when the session is first created, so importing
+the package stays cheap for the callers that never make a request.
+"""
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
 
-import requests
-from requests.exceptions import HTTPError
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from .cache import ResponseCache
+from .circuit_breaker import CircuitBreaker
+from .decoders import Decoder, default_decoder
+from .errors import APIKeyMissingError, ConnectionFailedError, SessionNotInitialisedError, redact_keys
+from .key_pool import KeyPool
+from .metrics import RequestEvent, RequestMetrics
+from .rate_limit import FileTokenBucket, TokenBucket
+from .single_flight import SingleFlight
+from .subscription_index import SubscriptionIndex
 
-from .errors import APIKeyMissingError, SessionNotInitialisedError
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from requests.adapters import BaseAdapter
+    from urllib3.util.retry import Retry
 
 
 class LibIOSession:
@@ -15,14 +28,45 @@ class LibIOSession:
     Class that implements the libraries.io session and keeps its state.
     """
 
-    # session retry settings
-    _retry_config = Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+    # session retry settings, the default ones are built on first use
+    _retry_config: Optional["Retry"] = None
     # the libraries.io API key
     _LIBRARIES_API_KEY = os.environ.get("LIBRARIES_API_KEY", None)
     # the default http retry force list set of codes
     default_status_forcelist = {500, 502, 503, 504}
     # the internal session object
-    _sess: Optional[requests.Session] = None
+    _sess: Optional["requests.Session"] = None
+    # the base url of the libraries.io api
+    _api_url = "https://libraries.io/api"
+    # the transport mounted on the session, None mounts the default retrying PooledTransport
+    _transport: Optional["BaseAdapter"] = None
+    # the connection pool of the default transport, the pool sizes are the ones of requests
+    _pool_config = {
+        "pool_connections": 10,
+        "pool_maxsize": 10,
+        "pool_block": False,
+        "keep_alive": True,
+        "tcp_keepalive": None,
+    }
+    # the connect and read timeouts of the requests in seconds, so that a stalled socket does not block forever
+    _timeout: Optional[Tuple[Optional[float], Optional[float]]] = (10.0, 60.0)
+    # the client side rate limiter every request has to pass, libraries.io allows about 60 requests per minute
+    _rate_limiter: Optional[TokenBucket] = TokenBucket(rate=60, per=60.0)
+    # the opt-in pool of API keys, used instead of the API key and the rate limiter above when set
+    _key_pool: Optional[KeyPool] = None
+    # the circuit breaker failing the requests of the endpoints that keep failing
+    _circuit_breaker: Optional[CircuitBreaker] = CircuitBreaker(failure_threshold=5, cooldown=30.0)
+    # the identical GET requests in flight, shared by the threads making them
+    _single_flight: Optional[SingleFlight] = SingleFlight()
+    # the opt-in response cache
+    _cache: Optional[ResponseCache] = None
+    # the opt-in local index of the subscriptions
+    _subscription_index: Optional[SubscriptionIndex] = None
+    # the JSON decoder of the response bodies
+    _decoder: Decoder = staticmethod(default_decoder())
+    # the built-in request metrics and the hooks called with the event of every request
+    _metrics = RequestMetrics()
+    _hooks: List[Callable[[RequestEvent], None]] = []
 
     # values used for pagination
     DEFAULT_PAGE = 1
@@ -32,7 +76,7 @@ class LibIOSession:
     @staticmethod
     def get_session(
         api_key: str = "", force_create: bool = False, include_prerelease: bool = False
-    ) -> requests.Session:
+    ) -> "requests.Session":
         """
         Function that fetches the instantiated session object for libraries.io with desired API key and
         retry config.
@@ -48,9 +92,11 @@ class LibIOSession:
 
         # check if the session exists, if not create it
         if not LibIOSession._sess or force_create:
+            import requests  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
             # session object common properties
             LibIOSession._sess = requests.Session()
-            LibIOSession._sess.mount("https://", HTTPAdapter(max_retries=LibIOSession._retry_config))
+            LibIOSession._mount()
 
         # check if we have an API key
         if api_key:
@@ -60,12 +106,23 @@ class LibIOSession:
         if include_prerelease:
             LibIOSession._sess.params["include_prerelease"] = 1
 
-        # attach the api key to the parameters
-        LibIOSession._sess.params["api_key"] = LibIOSession.get_key()
+        # attach the api key to the parameters, a missing key is reported when the first request is made
+        if LibIOSession.has_key():
+            LibIOSession._sess.params["api_key"] = LibIOSession.get_key()
 
         # finally, return the instantiated session object
         return LibIOSession._sess
 
+    @staticmethod
+    def has_key() -> bool:
+        """
+        Function that checks if an API key has been configured.
+
+        Returns:
+            bool: True if an API key is set, False otherwise.
+        """
+        return bool(LibIOSession._LIBRARIES_API_KEY)
+
     @staticmethod
     def get_key() -> str:
         """
@@ -93,6 +150,10 @@ class LibIOSession:
         """
         LibIOSession._LIBRARIES_API_KEY = key
 
+        # keep the already instantiated session in sync with the new key
+        if LibIOSession._sess is not None:
+            LibIOSession._sess.params["api_key"] = key
+
     @staticmethod
     def set_retry_config(total: int = 3, backoff_factor: float = 0.2, status_forcelist: Optional[list] = None):
         """
@@ -106,15 +167,502 @@ class LibIOSession:
         # check if we have a valid session
         LibIOSession._has_valid_session()
 
+        from urllib3.util.retry import Retry  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
         # now configure the retry parameters
         LibIOSession._retry_config = Retry(
             total=total,
             backoff_factor=backoff_factor,
             status_forcelist=LibIOSession.default_status_forcelist if not status_forcelist else status_forcelist,
+            raise_on_status=False,
         )
 
         # now add them to the session
-        LibIOSession._sess.mount("https://", HTTPAdapter(max_retries=LibIOSession._retry_config))
+        LibIOSession._mount()
+
+    @staticmethod
+    def set_retry(retry: "Retry"):
+        """
+        Function that sets the retry behaviour of the session from a `Retry` object, e.g. the one returned by
+        `get_retry_config` in another process; the session, if any, is remounted with it.
+
+        Args:
+            retry (Retry): the retry config.
+        """
+        LibIOSession._retry_config = retry
+        if LibIOSession._sess is not None:
+            LibIOSession._mount()
+
+    @staticmethod
+    def get_retry_config() -> "Retry":
+        """
+        Function that returns the retry behaviour of the session.
+
+        Returns:
+            Retry: the retry config, the default one allows 3 retries of the 5xx errors and of the 429 errors
+                carrying a Retry-After header, which is waited for.
+        """
+        if LibIOSession._retry_config is None:
+            from urllib3.util.retry import Retry  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+            # the last response is returned once the retries are exhausted, so its status picks the error raised
+            LibIOSession._retry_config = Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=sorted(LibIOSession.default_status_forcelist),
+                raise_on_status=False,
+            )
+        return LibIOSession._retry_config
+
+    @staticmethod
+    def set_transport(transport: Optional["BaseAdapter"] = None):
+        """
+        The transport used to send the requests, e.g. a `RecordingTransport` or a `ReplayTransport`.
+
+        Args:
+            transport (Optional[BaseAdapter]): the requests adapter to mount, None restores the default one.
+        """
+        LibIOSession._transport = transport
+        if LibIOSession._sess is not None:
+            LibIOSession._mount()
+
+    @staticmethod
+    def _mount():
+        """
+        Function that mounts the configured transport, along with the retry config, on the session.
+        """
+        # pylint: disable=import-outside-toplevel
+        from requests.adapters import HTTPAdapter
+
+        from .transport import PooledTransport
+
+        config = LibIOSession._pool_config
+        transport = LibIOSession._transport
+        if transport is None:
+            transport = PooledTransport(
+                tcp_keepalive=config["tcp_keepalive"],
+                pool_connections=config["pool_connections"],
+                pool_maxsize=config["pool_maxsize"],
+                pool_block=config["pool_block"],
+                max_retries=LibIOSession.get_retry_config(),
+            )
+        elif isinstance(transport, HTTPAdapter):
+            transport.max_retries = LibIOSession.get_retry_config()
+
+        for prefix in ("https://", "http://"):
+            LibIOSession._sess.mount(prefix, transport)
+
+        # without keep-alive every connection is closed once its response is read
+        if config["keep_alive"]:
+            LibIOSession._sess.headers.pop("Connection", None)
+        else:
+            LibIOSession._sess.headers["Connection"] = "close"
+
+    @staticmethod
+    def set_connection_pool(
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        tcp_keepalive: Optional[float] = None,
+    ):
+        """
+        The connection pool of the default transport; raise `pool_maxsize` to the number of threads making
+        requests, the connections returned to a full pool are closed and the next requests handshake again.
+
+        Args:
+            pool_connections (int): the number of hosts whose connections are pooled.
+            pool_maxsize (int): the number of connections kept open per host.
+            pool_block (bool): whether the requests wait for a pooled connection once `pool_maxsize` are in use,
+                instead of opening connections that are closed after their response.
+            keep_alive (bool): False closes every connection once its response is read.
+            tcp_keepalive (Optional[float]): the idle seconds after which the pooled connections send TCP
+                keep-alive probes, None keeps the OS defaults.
+        """
+        LibIOSession._pool_config = {
+            "pool_connections": pool_connections,
+            "pool_maxsize": pool_maxsize,
+            "pool_block": pool_block,
+            "keep_alive": keep_alive,
+            "tcp_keepalive": tcp_keepalive,
+        }
+        if LibIOSession._sess is not None:
+            LibIOSession._mount()
+
+    @staticmethod
+    def get_connection_pool() -> Dict:
+        """
+        Function that returns the settings of the connection pool.
+
+        Returns:
+            Dict: the `set_connection_pool` arguments in use.
+        """
+        return dict(LibIOSession._pool_config)
+
+    @staticmethod
+    def set_timeout(connect: Optional[float] = 10.0, read: Optional[float] = 60.0):
+        """
+        The timeouts of the requests, a request that exceeds them raises `RequestTimeoutError`.
+
+        Args:
+            connect (Optional[float]): the seconds to wait for a connection to be opened, None waits forever.
+            read (Optional[float]): the seconds to wait for the server between the bytes of a response,
+                None waits forever.
+        """
+        LibIOSession._timeout = None if connect is None and read is None else (connect, read)
+
+    @staticmethod
+    def get_timeout() -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """
+        Function that returns the timeouts of the requests.
+
+        Returns:
+            Optional[Tuple[Optional[float], Optional[float]]]: the connect and read timeouts, None if disabled.
+        """
+        return LibIOSession._timeout
+
+    # pylint: disable=import-outside-toplevel
+    @staticmethod
+    def warm_up(connections: Optional[int] = None) -> int:
+        """
+        Function that opens connections to the api host ahead of a burst of requests, so that the requests
+        of the burst do not pay the TCP and TLS handshakes; the connections wait in the pool of the session.
+        Opening them sends HEAD requests to the root of the host, which do not count against the rate limit.
+
+        Args:
+            connections (Optional[int]): the number of connections to open, at most and by default `pool_maxsize`.
+        Returns:
+            int: the number of connections in the pool, some of them may have been open already.
+        """
+        sess = LibIOSession.get_session()
+        from requests.exceptions import RequestException
+
+        maxsize = LibIOSession._pool_config["pool_maxsize"]
+        count = maxsize if connections is None else min(connections, maxsize)
+        scheme, netloc = urlsplit(LibIOSession.get_api_url())[:2]
+        root = urlunsplit((scheme, netloc, "/", "", ""))
+
+        # the streamed responses hold their connections until read, so every request opens its own one
+        responses = []
+        try:
+            for _ in range(count):
+                # the api key is not sent, the None value drops the session parameter
+                responses.append(
+                    sess.head(root, params={"api_key": None}, stream=True, timeout=LibIOSession.get_timeout())
+                )
+        except RequestException as err:
+            if not responses:
+                raise ConnectionFailedError(redact_keys(f"Connection failed: {err}"), root) from None
+        finally:
+            for resp in responses:
+                # reading the empty body hands the connection back to the pool, closing it would drop it
+                resp.content  # pylint: disable=pointless-statement
+                resp.close()
+        return len(responses)
+
+    @staticmethod
+    def set_api_url(url: str = "https://libraries.io/api"):
+        """
+        The base url of the api, e.g. to point the clients to a `FakeLibrariesIO` server.
+
+        Args:
+            url (str): the base url, without a trailing slash.
+        """
+        LibIOSession._api_url = url.rstrip("/")
+
+    @staticmethod
+    def get_api_url() -> str:
+        """
+        Function that returns the base url of the api.
+
+        Returns:
+            str: the base url.
+        """
+        return LibIOSession._api_url
+
+    @staticmethod
+    def set_rate_limit(
+        rate: Optional[float] = 60,
+        per: float = 60.0,
+        capacity: Optional[float] = None,
+        lock_file: Optional[str] = None,
+    ):
+        """
+        The client side rate limit to be used for the requests.
+
+        Args:
+            rate (Optional[float]): the amount of requests allowed every `per` seconds, None disables rate limiting.
+            per (float): the rate limit window, in seconds.
+            capacity (Optional[float]): the maximum burst of requests, defaults to `rate`.
+            lock_file (Optional[str]): if set, the budget is kept in this file and shared by all processes using it.
+        """
+        if rate is None:
+            LibIOSession._rate_limiter = None
+        elif lock_file:
+            LibIOSession._rate_limiter = FileTokenBucket(lock_file, rate=rate, per=per, capacity=capacity)
+        else:
+            LibIOSession._rate_limiter = TokenBucket(rate=rate, per=per, capacity=capacity)
+
+    @staticmethod
+    def get_rate_limiter() -> Optional[TokenBucket]:
+        """
+        Function that returns the rate limiter used for the requests.
+
+        Returns:
+            Optional[TokenBucket]: the rate limiter, None if rate limiting is disabled.
+        """
+        return LibIOSession._rate_limiter
+
+    @staticmethod
+    def set_key_pool(
+        keys: Optional[Sequence[str]] = None,
+        rate: float = 60,
+        per: float = 60.0,
+        capacity: Optional[float] = None,
+        cooldown: float = 60.0,
+        lock_file: Optional[str] = None,
+        subscription_key: Optional[str] = None,
+    ):
+        """
+        The pool of API keys the requests are spread over, each request is sent with the key that has the
+        most budget left; every key gets its own rate limit, which replaces the session one. The subscription
+        requests all go to the subscription key, and their responses are neither cached nor shared.
+
+        Args:
+            keys (Optional[Sequence[str]]): the API keys, None drops the pool and goes back to the API key.
+            rate (float): the amount of requests allowed every `per` seconds, per key.
+            per (float): the rate limit window, in seconds.
+            capacity (Optional[float]): the maximum burst of requests per key, defaults to `rate`.
+            cooldown (float): the seconds a key rests after a 429 response without a Retry-After header.
+            lock_file (Optional[str]): if set, the budgets are kept in files named after it and shared by all
+                processes using them.
+            subscription_key (Optional[str]): the key of the account the subscriptions are managed with, the first
+                key by default.
+        """
+        if keys is None:
+            LibIOSession._key_pool = None
+        else:
+            LibIOSession._key_pool = KeyPool(
+                keys,
+                rate=rate,
+                per=per,
+                capacity=capacity,
+                cooldown=cooldown,
+                lock_file=lock_file,
+                subscription_key=subscription_key,
+            )
+
+    @staticmethod
+    def get_key_pool() -> Optional[KeyPool]:
+        """
+        Function that returns the pool of API keys used for the requests.
+
+        Returns:
+            Optional[KeyPool]: the key pool, None if the requests use the API key.
+        """
+        return LibIOSession._key_pool
+
+    @staticmethod
+    def set_circuit_breaker(failure_threshold: Optional[int] = 5, cooldown: float = 30.0):
+        """
+        The per endpoint circuit breaker: once an endpoint failed `failure_threshold` times in a row with
+        server errors, timeouts or connection errors, its requests raise `CircuitOpenError` without being
+        sent for `cooldown` seconds.
+
+        Args:
+            failure_threshold (Optional[int]): the consecutive failures that open a circuit, None disables it.
+            cooldown (float): the seconds a circuit stays open before a trial request is let through.
+        """
+        if failure_threshold is None:
+            LibIOSession._circuit_breaker = None
+        else:
+            LibIOSession._circuit_breaker = CircuitBreaker(failure_threshold=failure_threshold, cooldown=cooldown)
+
+    @staticmethod
+    def get_circuit_breaker() -> Optional[CircuitBreaker]:
+        """
+        Function that returns the circuit breaker used for the requests.
+
+        Returns:
+            Optional[CircuitBreaker]: the circuit breaker, None if it is disabled.
+        """
+        return LibIOSession._circuit_breaker
+
+    @staticmethod
+    def set_coalescing(enabled: bool = True):
+        """
+        The coalescing of the identical GET requests: the calls made while the same request is in flight
+        wait for it and share its result, the async clients coalesce the requests of their coroutines.
+
+        Args:
+            enabled (bool): False sends every request on its own.
+        """
+        LibIOSession._single_flight = SingleFlight() if enabled else None
+
+    @staticmethod
+    def get_single_flight() -> Optional[SingleFlight]:
+        """
+        Function that returns the coalescer of the requests in flight.
+
+        Returns:
+            Optional[SingleFlight]: the coalescer, None if coalescing is disabled.
+        """
+        return LibIOSession._single_flight
+
+    @staticmethod
+    def set_cache(
+        max_entries: Optional[int] = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 300.0,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        """
+        The response cache to be used for the GET requests.
+
+        Args:
+            max_entries (Optional[int]): the maximum number of cached responses, None disables caching.
+            max_bytes (int): the maximum total size of the cached response bodies.
+            default_ttl (float): the time to live of the endpoints not present in `ttls`, in seconds.
+            ttls (Optional[Dict[str, float]]): time to live overrides per endpoint (e.g. "project_sourcerank").
+        """
+        if max_entries is None:
+            LibIOSession._cache = None
+        else:
+            LibIOSession._cache = ResponseCache(
+                max_entries=max_entries, max_bytes=max_bytes, default_ttl=default_ttl, ttls=ttls
+            )
+
+    @staticmethod
+    def get_cache() -> Optional[ResponseCache]:
+        """
+        Function that returns the response cache used for the requests.
+
+        Returns:
+            Optional[ResponseCache]: the response cache, None if caching is disabled.
+        """
+        return LibIOSession._cache
+
+    @staticmethod
+    def set_subscription_index(refresh_interval: Optional[float] = 300.0, enabled: bool = True):
+        """
+        The local subscription index used to answer `check_subscribed` without requests; it is loaded
+        from the subscription listing right away and kept up to date by the subscription changes of this client.
+
+        Args:
+            refresh_interval (Optional[float]): the seconds between the background reloads, which pick up the
+                changes made elsewhere; None disables them.
+            enabled (bool): False drops the index, the checks go to libraries.io again.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .subscription_helpers import iter_subscribed
+
+        def lister():
+            return ((sub["project"]["platform"], sub["project"]["name"]) for sub in iter_subscribed(raise_errors=True))
+
+        previous = LibIOSession._subscription_index
+        LibIOSession._subscription_index = SubscriptionIndex(lister, refresh_interval).start() if enabled else None
+        if previous is not None:
+            previous.stop()
+
+    @staticmethod
+    def get_subscription_index() -> Optional[SubscriptionIndex]:
+        """
+        Function that returns the local subscription index.
+
+        Returns:
+            Optional[SubscriptionIndex]: the subscription index, None if it is disabled.
+        """
+        return LibIOSession._subscription_index
+
+    @staticmethod
+    def set_decoder(decoder: Optional[Decoder] = None):
+        """
+        The JSON decoder to be used for the response bodies.
+
+        Args:
+            decoder (Optional[Decoder]): a function decoding the body bytes (e.g. orjson.loads), None
+                restores the fastest decoder installed.
+        """
+        LibIOSession._decoder = staticmethod(default_decoder() if decoder is None else decoder)
+
+    @staticmethod
+    def get_decoder() -> Decoder:
+        """
+        Function that returns the JSON decoder used for the response bodies.
+
+        Returns:
+            Decoder: the decoder function.
+        """
+        return LibIOSession._decoder
+
+    @staticmethod
+    def add_hook(hook: Callable[[RequestEvent], None]):
+        """
+        Register a hook that is called with the `RequestEvent` of every request.
+
+        Args:
+            hook (Callable[[RequestEvent], None]): the hook to call.
+        """
+        LibIOSession._hooks = [*LibIOSession._hooks, hook]
+
+    @staticmethod
+    def remove_hook(hook: Callable[[RequestEvent], None]):
+        """
+        Unregister a hook added with `add_hook`.
+
+        Args:
+            hook (Callable[[RequestEvent], None]): the hook to remove.
+        """
+        LibIOSession._hooks = [h for h in LibIOSession._hooks if h is not hook]
+
+    # pylint: disable=broad-except
+    @staticmethod
+    def emit(event: RequestEvent):
+        """
+        Function that records a request event in the metrics and passes it to the hooks.
+
+        Args:
+            event (RequestEvent): the event of the finished request.
+        """
+        LibIOSession._metrics.record(event)
+        for hook in LibIOSession._hooks:
+            try:
+                hook(event)
+            except Exception as err:
+                print(f"Request hook error occurred: {err}")
+
+    @staticmethod
+    def get_metrics() -> RequestMetrics:
+        """
+        Function that returns the built-in request metrics.
+
+        Returns:
+            RequestMetrics: the metrics, e.g. use `snapshot()` or `to_prometheus()` to scrape them.
+        """
+        return LibIOSession._metrics
+
+    @staticmethod
+    def _reset_after_fork():
+        """
+        Function that drops the state a forked child process must not share with its parent: the pooled
+        connections of the session, the requests in flight and the locks of the rate limiter, the circuit breaker
+        and the metrics.
+        """
+        LibIOSession._sess = None
+        if LibIOSession._single_flight is not None:
+            LibIOSession.set_coalescing()
+        pool = LibIOSession._key_pool
+        if pool is not None:
+            LibIOSession.set_key_pool(**pool.settings())
+        breaker = LibIOSession._circuit_breaker
+        if breaker is not None:
+            LibIOSession.set_circuit_breaker(breaker.failure_threshold, breaker.cooldown)
+        LibIOSession._metrics = RequestMetrics(LibIOSession._metrics.window)
+        limiter = LibIOSession._rate_limiter
+        if isinstance(limiter, FileTokenBucket):
+            LibIOSession.set_rate_limit(limiter.rate, limiter.per, limiter.capacity, lock_file=limiter.lock_file)
+        elif limiter is not None:
+            LibIOSession.set_rate_limit(limiter.rate, limiter.per, limiter.capacity)
 
     # noinspection PyUnresolvedReferences
     @staticmethod
@@ -136,7 +684,7 @@ class LibIOSession:
 
     # noinspection PyTypeChecker,PyUnresolvedReferences
     @staticmethod
-    def fix_pages(sess: requests.Session, page: Optional[int] = None, per_page: Optional[int] = None) -> bool:
+    def fix_pages(sess: "requests.Session", page: Optional[int] = None, per_page: Optional[int] = None) -> bool:
         """
         Change pagination settings.
 
@@ -191,3 +739,7 @@ class LibIOSession:
     #         clear_params()
     #
     #     return ret
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=LibIOSession._reset_after_fork)  # pylint: disable=protected-access
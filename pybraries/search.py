@@ -1,7 +1,10 @@
 # search.py
-from typing import Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
-from pybraries.search_helpers import search_api
+from pybraries.pagination import MAX_PER_PAGE
+from pybraries.search_helpers import iter_search_api, search_api
+from pybraries.spill import MAX_MEMORY, STREAM_CONCURRENCY, stream_search
 
 
 class Search:
@@ -9,31 +12,37 @@ class Search:
     platform, project, repo, and user GET actions"""
 
     @staticmethod
-    def platforms() -> Any:
+    def platforms(raw: bool = False) -> Any:
         """
         Return a list of supported package managers.
 
+        Args:
+            raw: return the undecoded response body as bytes
         Returns:
             List of dicts of platforms with platform info from libraries.io.
         """
 
-        return search_api("platforms")
+        return search_api("platforms", raw=raw)
 
     @staticmethod
-    def project(platforms: str, name: str) -> Any:
+    def project(platforms: str, name: str, raw: bool = False, as_models: bool = False) -> Any:
         """
         Return information about a project and its versions from a platform (e.g. PyPI).
 
         Args:
             platforms: package manager (e.g. "pypi").
             name: project name.
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
         Returns:
             List of dictionaries with information about the project from libraries.io.
         """
-        return search_api("project", platforms, name)
+        return search_api("project", platforms, name, raw=raw, as_models=as_models)
 
     @staticmethod
-    def project_dependencies(platforms: str, project: str, version: str = None) -> Any:
+    def project_dependencies(
+        platforms: str, project: str, version: str = None, raw: bool = False, as_models: bool = False
+    ) -> Any:
         """
         Get dependencies for a version of a project.
 
@@ -43,14 +52,23 @@ class Search:
             platforms: package manager (e.g. "pypi").
             project: project name.
             version: (optional) project version
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
         Returns:
             Dict of dependencies for a version of a project from libraries.io.
         """
 
-        return search_api("project_dependencies", platforms, project, version=version)
+        return search_api("project_dependencies", platforms, project, version=version, raw=raw, as_models=as_models)
 
     @staticmethod
-    def project_dependents(platforms: str, project: str, version: str = None) -> Any:
+    def project_dependents(
+        platforms: str,
+        project: str,
+        version: str = None,
+        raw: bool = False,
+        as_models: bool = False,
+        limit: Optional[int] = None,
+    ) -> Any:
         """
         Get projects that have at least one version that depends on a given project.
 
@@ -58,67 +76,86 @@ class Search:
             platforms: package manager (e.g. "pypi").
             project: project name
             version: project version
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts project dependents from libraries.io.
         """
 
-        return search_api("project_dependents", platforms, project, version=version)
+        return search_api(
+            "project_dependents", platforms, project, version=version, raw=raw, as_models=as_models, limit=limit
+        )
 
     @staticmethod
-    def project_dependent_repositories(platforms: str, project: str) -> Any:
+    def project_dependent_repositories(
+        platforms: str, project: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Get repositories that depend on a given project.
 
         Args:
             platforms: package manager (e.g. "pypi")
             project: project name
+            raw: return the undecoded response body as bytes
+            as_models: return Repository models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts of dependent repositories from libraries.io.
         """
 
-        return search_api("project_dependent_repositories", platforms, project)
+        return search_api(
+            "project_dependent_repositories", platforms, project, raw=raw, as_models=as_models, limit=limit
+        )
 
     @staticmethod
-    def project_contributors(platforms: str, project: str) -> Any:
+    def project_contributors(
+        platforms: str, project: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Get users that have contributed to a given project.
 
         Args:
             platforms: package manager
             project: project name
+            raw: return the undecoded response body as bytes
+            as_models: return User models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts of project contributor info from libraries.io.
         """
 
-        return search_api("project_contributors", platforms, project)
+        return search_api("project_contributors", platforms, project, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def project_sourcerank(platforms: str, project: str) -> Any:
+    def project_sourcerank(platforms: str, project: str, raw: bool = False) -> Any:
         """
         Get breakdown of SourceRank score for a given project.
 
         Args:
             platforms: package manager
             project: project name
+            raw: return the undecoded response body as bytes
         Returns:
             Dict of sourcerank info response from libraries.io.
         """
 
-        return search_api("project_sourcerank", platforms, project)
+        return search_api("project_sourcerank", platforms, project, raw=raw)
 
     @staticmethod
-    def project_usage(platforms: str, project: str) -> Any:
+    def project_usage(platforms: str, project: str, raw: bool = False) -> Any:
         """
         Get breakdown of usage for a given project.
 
         Args:
             platforms: package manager
             project: project name
+            raw: return the undecoded response body as bytes
         Returns:
             Dict with info about usage from libraries.io.
         """
 
-        return search_api("project_usage", platforms, project)
+        return search_api("project_usage", platforms, project, raw=raw)
 
     @staticmethod
     def project_search(**kwargs):
@@ -133,6 +170,9 @@ class Search:
             sort str: (optional) one of rank, stars,
                 dependents_count, dependent_repos_count,
                 latest_release_published_at, contributions_count, created_at
+            raw (bool): (optional) return the undecoded response body as bytes
+            as_models (bool): (optional) return Project models instead of dicts
+            limit (int): (optional) return the first limit results, fetching their pages concurrently
 
         Returns:
             List of dicts of project info from libraries.io.
@@ -140,7 +180,7 @@ class Search:
         return search_api("special_project_search", **kwargs)
 
     @staticmethod
-    def repository(host: str, owner: str, repo: str) -> Any:
+    def repository(host: str, owner: str, repo: str, raw: bool = False, as_models: bool = False) -> Any:
         """
         Return information about a repository and its versions.
 
@@ -148,14 +188,16 @@ class Search:
             host: host provider name (e.g. GitHub)
             owner: owner
             repo: repo
+            raw: return the undecoded response body as bytes
+            as_models: return Repository models instead of dicts
         Returns:
             List of dicts of info about a repository from libraries.io.
         """
 
-        return search_api("repository", host, owner, repo)
+        return search_api("repository", host, owner, repo, raw=raw, as_models=as_models)
 
     @staticmethod
-    def repository_dependencies(host: str, owner: str, repo: str) -> Any:
+    def repository_dependencies(host: str, owner: str, repo: str, raw: bool = False, as_models: bool = False) -> Any:
         """
         Return information about a repository's dependencies.
 
@@ -163,14 +205,18 @@ class Search:
             host: host provider name (e.g. GitHub)
             owner: owner
             repo: repo
+            raw: return the undecoded response body as bytes
+            as_models: return Repository models instead of dicts
         Returns:
             Dict of repo dependency info from libraries.io.
         """
 
-        return search_api("repository_dependencies", host, owner, repo)
+        return search_api("repository_dependencies", host, owner, repo, raw=raw, as_models=as_models)
 
     @staticmethod
-    def repository_projects(host: str, owner: str, repo: str) -> Any:
+    def repository_projects(
+        host: str, owner: str, repo: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Get a list of projects referencing the given repository.
 
@@ -178,79 +224,104 @@ class Search:
             host: host provider name (e.g. GitHub)
             owner: owner
             repo: repo
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts of projects referencing a repo from libraries.io.
         """
 
-        return search_api("repository_projects", host, owner, repo)
+        return search_api("repository_projects", host, owner, repo, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def user(host: str, user: str) -> Any:
+    def user(host: str, user: str, raw: bool = False, as_models: bool = False) -> Any:
         """
         Return information about a user.
 
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return User models instead of dicts
         Returns:
         Dict of info about user from libraries.io.
         """
-        return search_api("user", host, user)
+        return search_api("user", host, user, raw=raw, as_models=as_models)
 
     @staticmethod
-    def user_repositories(host: str, user: str) -> Any:
+    def user_repositories(
+        host: str, user: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Return information about a user's repos.
 
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return Repository models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts with info about user repos from libraries.io.
         """
-        return search_api("user_repositories", host, user)
+        return search_api("user_repositories", host, user, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def user_projects(host: str, user: str) -> Any:
+    def user_projects(
+        host: str, user: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Return information about projects using a user's repos.
 
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts of project info from libraries.io.
         """
-        return search_api("user_projects", host, user)
+        return search_api("user_projects", host, user, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def user_projects_contributions(host: str, user: str) -> Any:
+    def user_projects_contributions(
+        host: str, user: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Return information about projects a user has contributed to.
 
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts with user project contribution info from libraries.io.
         """
-        return search_api("user_projects_contributions", host, user)
+        return search_api("user_projects_contributions", host, user, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def user_repository_contributions(host: str, user: str) -> Any:
+    def user_repository_contributions(
+        host: str, user: str, raw: bool = False, as_models: bool = False, limit: Optional[int] = None
+    ) -> Any:
         """
         Return information about repositories a user has contributed to.
 
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return Repository models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             (list): list of dicts response from libraries.io
         """
-        return search_api("user_repositories_contributions", host, user)
+        return search_api("user_repositories_contributions", host, user, raw=raw, as_models=as_models, limit=limit)
 
     @staticmethod
-    def user_dependencies(host, user):
+    def user_dependencies(host, user, raw: bool = False, as_models: bool = False, limit: Optional[int] = None):
         """
         Return a list of unique user's repositories' dependencies.
 
@@ -259,7 +330,296 @@ class Search:
         Args:
             host: host provider name (e.g. GitHub)
             user: username
+            raw: return the undecoded response body as bytes
+            as_models: return Project models instead of dicts
+            limit: return the first limit results, fetching their pages concurrently
         Returns:
             List of dicts with user project dependency info.
         """
-        return search_api("user_dependencies", host, user)
+        return search_api("user_dependencies", host, user, raw=raw, as_models=as_models, limit=limit)
+
+    @staticmethod
+    def iter_project_dependents(
+        platforms: str, project: str, version: str = None, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the projects that depend on a given project, see `project_dependents`.
+
+        Args:
+            platforms: package manager (e.g. "pypi").
+            project: project name
+            version: project version
+            per_page: items fetched per request (max 100)
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts of project dependents from libraries.io.
+        """
+        return iter_search_api(
+            "project_dependents", platforms, project, version=version, per_page=per_page, as_models=as_models
+        )
+
+    @staticmethod
+    def stream_project_dependents(
+        platforms: str,
+        project: str,
+        version: str = None,
+        max_memory: int = MAX_MEMORY,
+        max_spill: Optional[int] = None,
+        concurrency: int = STREAM_CONCURRENCY,
+        as_models: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Stream all the projects that depend on a given project, fetching the pages ahead of a slow consumer
+        and spilling the ones that do not fit in `max_memory` to a temporary file, see `stream_search`.
+
+        Args:
+            platforms: package manager (e.g. "pypi").
+            project: project name
+            version: project version
+            max_memory: the bytes of the fetched pages queued in memory, the pages in flight are held outside of it
+            max_spill: the bytes of the pages spilled to disk before the fetching waits, None for no limit
+            concurrency: the pages fetched at once
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts of project dependents from libraries.io.
+        """
+        return stream_search(
+            "project_dependents",
+            platforms,
+            project,
+            version=version,
+            max_memory=max_memory,
+            max_spill=max_spill,
+            concurrency=concurrency,
+            as_models=as_models,
+        )
+
+    @staticmethod
+    def iter_project_dependent_repositories(
+        platforms: str, project: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the repositories that depend on a given project.
+
+        Args:
+            platforms: package manager (e.g. "pypi")
+            project: project name
+            per_page: items fetched per request (max 100)
+            as_models: yield Repository models instead of dicts
+        Returns:
+            Iterator of dicts of dependent repositories from libraries.io.
+        """
+        return iter_search_api(
+            "project_dependent_repositories", platforms, project, per_page=per_page, as_models=as_models
+        )
+
+    @staticmethod
+    def iter_project_contributors(
+        platforms: str, project: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the users that have contributed to a given project.
+
+        Args:
+            platforms: package manager
+            project: project name
+            per_page: items fetched per request (max 100)
+            as_models: yield User models instead of dicts
+        Returns:
+            Iterator of dicts of project contributor info from libraries.io.
+        """
+        return iter_search_api("project_contributors", platforms, project, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_project_search(per_page: int = MAX_PER_PAGE, **kwargs) -> Iterator[dict]:
+        """
+        Lazily iterate over all the results of a project search, see `project_search` for the keyword arguments
+        (including as_models).
+
+        Args:
+            per_page: items fetched per request (max 100)
+        Returns:
+            Iterator of dicts of project info from libraries.io.
+        """
+        return iter_search_api("special_project_search", per_page=per_page, **kwargs)
+
+    @staticmethod
+    def iter_repository_projects(
+        host: str, owner: str, repo: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the projects referencing the given repository.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            owner: owner
+            repo: repo
+            per_page: items fetched per request (max 100)
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts of projects referencing a repo from libraries.io.
+        """
+        return iter_search_api("repository_projects", host, owner, repo, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_user_repositories(
+        host: str, user: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the repositories of a user.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            per_page: items fetched per request (max 100)
+            as_models: yield Repository models instead of dicts
+        Returns:
+            Iterator of dicts with info about user repos from libraries.io.
+        """
+        return iter_search_api("user_repositories", host, user, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_user_projects(
+        host: str, user: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the projects using a user's repos.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            per_page: items fetched per request (max 100)
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts of project info from libraries.io.
+        """
+        return iter_search_api("user_projects", host, user, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_user_projects_contributions(
+        host: str, user: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the projects a user has contributed to.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            per_page: items fetched per request (max 100)
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts with user project contribution info from libraries.io.
+        """
+        return iter_search_api("user_projects_contributions", host, user, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_user_repository_contributions(
+        host: str, user: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the repositories a user has contributed to.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            per_page: items fetched per request (max 100)
+            as_models: yield Repository models instead of dicts
+        Returns:
+            Iterator of dicts with user repository contribution info from libraries.io.
+        """
+        return iter_search_api("user_repositories_contributions", host, user, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def iter_user_dependencies(
+        host: str, user: str, per_page: int = MAX_PER_PAGE, as_models: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over all the unique dependencies of a user's repositories.
+
+        Args:
+            host: host provider name (e.g. GitHub)
+            user: username
+            per_page: items fetched per request (max 100)
+            as_models: yield Project models instead of dicts
+        Returns:
+            Iterator of dicts with user project dependency info.
+        """
+        return iter_search_api("user_dependencies", host, user, per_page=per_page, as_models=as_models)
+
+    @staticmethod
+    def map(method: Union[str, Callable], arg_list: Iterable, workers: int = 8) -> List[Any]:
+        """
+        Call a search method for many arguments in parallel, using a pool of threads that share the session.
+
+        Args:
+            method: the search method or its name (e.g. "project").
+            arg_list: the arguments of each call; a tuple of positional arguments, a dict of keyword
+                arguments or a single positional argument.
+            workers: the number of threads to use.
+        Returns:
+            List with the response of each call, in the same order as arg_list.
+        """
+        func = getattr(Search, method) if isinstance(method, str) else method
+
+        def call(args):
+            if isinstance(args, dict):
+                return func(**args)
+            return func(*args) if isinstance(args, (tuple, list)) else func(args)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, arg_list))
+
+    # pylint: disable=broad-except
+    @staticmethod
+    def projects_bulk(
+        pairs: Iterable[Tuple[str, str]], concurrency: int = 8, raw: bool = False, as_models: bool = False
+    ) -> Iterator[Tuple[Tuple[str, str], Any]]:
+        """
+        Look up many projects concurrently, streaming the results as they finish.
+
+        Duplicate pairs are looked up once, platforms are matched case-insensitively. The lookups share
+        the session rate limiter, and only a bounded number of them is queued at a time, so the pairs
+        may be a lazy iterable of any size.
+
+        Args:
+            pairs: the (platform, name) pairs to look up (e.g. ("pypi", "plotly")).
+            concurrency: the number of lookups in flight.
+            raw: return the undecoded response bodies as bytes
+            as_models: return Project models instead of dicts
+        Returns:
+            Iterator of (pair, result) tuples in completion order; the result of a failed lookup (e.g. a 404
+            or a timeout) is the exception raised by it.
+        """
+
+        def lookup(pair: Tuple[str, str]) -> Tuple[Tuple[str, str], Any]:
+            try:
+                return pair, search_api("project", *pair, raw=raw, as_models=as_models, raise_errors=True)
+            except Exception as err:
+                return pair, err
+
+        def unique_pairs() -> Iterator[Tuple[str, str]]:
+            seen = set()
+            for platform, name in pairs:
+                key = (platform.lower(), name)
+                if key not in seen:
+                    seen.add(key)
+                    yield platform, name
+
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        pending = set()
+        try:
+            for pair in unique_pairs():
+                if len(pending) >= 2 * concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(lookup, pair))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # the consumer may stop early, drop the lookups that have not started yet
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
@@ -1,8 +1,10 @@
 # search_helpers.py
-from typing import List
+from typing import Dict, Iterator, List
 
-from pybraries.helpers import extract, sess
+from pybraries.endpoints import ENDPOINTS
 from pybraries.make_request import make_request
+from pybraries.models import to_models
+from pybraries.pagination import DEFAULT_PAGE, MAX_PER_PAGE, fetch_pages, paginate
 
 
 def search_api(action, *args, **kwargs):
@@ -12,89 +14,81 @@ def search_api(action, *args, **kwargs):
     Args:
         action (str): function action name
         *args (str): positional arguments
-        **kwargs (str): keyword arguments
+        **kwargs (str): keyword arguments, raw=True returns the undecoded response body as bytes,
+            as_models=True returns the typed result models, raise_errors=True raises the request errors
+            and limit=N returns the first N items of a list endpoint, fetching their pages concurrently
     Returns:
         (list): list of dicts response from libraries.io.
             according to page and per page
         Many are dicts or list of dicts.
     """
 
-    kind = "get"
-
-    url_end_list = handle_path_params(action, *args, **kwargs)
-
-    handle_query_params(action, **kwargs)
-    url_combined = "/".join(url_end_list)
-    return make_request(url_combined, kind)
-
-
-def handle_query_params(action, **kwargs):
-
-    if action == "special_project_search":
-        try:
-            sess.params["q"] = kwargs["keywords"]
-        except Exception as exc:
-            print(f"A string of keywords must be passed as a keyword argument, details: {exc}")
-
-        if "platforms" in kwargs:
-            sess.params["platforms"] = kwargs["platforms"]
-        if "licenses" in kwargs:
-            sess.params["licenses"] = kwargs["licenses"]
-        if "languages" in kwargs:
-            sess.params["languages"] = kwargs["languages"]
-
-    elif "project" in kwargs:
-        sess.params["q"] = kwargs["project"]
-
-    if "filters" in kwargs:
-        extract(*list(kwargs["filters"].keys())).of(kwargs["filters"]).then(sess.params.__setitem__)
-
-    if "sort" in kwargs:
-        sess.params["sort"] = kwargs["sort"]
-    if "page" in kwargs:
-        sess.params["page"] = kwargs["page"]
-    if "per_page" in kwargs:
-        sess.params["per_page"] = kwargs["per_page"]
-
-
-def handle_path_params(action, *args, **kwargs):
-    def from_kwargs(*keys):
-        return extract(*keys).of(kwargs).then([].append)
-
-    url_end_list: List[str] = ["https://libraries.io/api"]  # start of list to build url
-    if action == "special_project_search":
-        url_end_list.append("search?")
-    elif action == "platforms":
-        url_end_list.append("platforms")
-
-    elif action.startswith("project"):
-        action = action[7:]  # remove action prefix
-        url_end_list += [*from_kwargs("platforms", "project"), *args]
-        if action.startswith("_"):
-            action = action[1:]  # remove remaining underscore from operation name
-            if action == "dependencies":
-                version = kwargs.pop("version") or "latest"  # defaults to latest
-                url_end_list.append(version)
-            url_end_list.append(action)
-    elif action.startswith("repository"):
-        action = action[len("repository") :]
-        url_end_list += [*from_kwargs("host", "owner", "repo"), *args]
-        if action.startswith("_"):
-            url_end_list.append(action[1:])
-    elif "user" in action:
-        url_end_list += [*from_kwargs("host", "user"), *args]
-        if action == "user_repositories":
-            url_end_list.append("repositories")
-
-        if action == "user_projects":
-            url_end_list.append("projects")
-
-        if action == "user_projects_contributions":
-            url_end_list.append("project-contributions")
-
-        if action == "user_repositories_contributions":
-            url_end_list.append("repository-contributions")
-
-        if action == "user_dependencies":
-            url_end_list.append("dependencies")
-    return url_end_list
+    raw = kwargs.pop("raw", False)
+    as_models = kwargs.pop("as_models", False)
+    raise_errors = kwargs.pop("raise_errors", False)
+    limit = kwargs.pop("limit", None)
+
+    if limit is not None:
+        if raw:
+            raise ValueError("The limit of a search cannot be combined with raw responses.")
+        page, per_page = kwargs.pop("page", DEFAULT_PAGE), kwargs.pop("per_page", MAX_PER_PAGE)
+
+        def fetch_page(page_no: int, page_size: int):
+            return search_api(action, *args, page=page_no, per_page=page_size, raise_errors=raise_errors, **kwargs)
+
+        items = fetch_pages(fetch_page, limit, page=page, per_page=per_page)
+        return to_models(action, items) if as_models else items
+
+    endpoint = ENDPOINTS[action]
+    url = endpoint.url(args, kwargs)
+    params = endpoint.params(kwargs)
+    resp = make_request(url, endpoint.method, params, endpoint=action, raw=raw, raise_errors=raise_errors)
+    return to_models(action, resp) if as_models and not raw else resp
+
+
+def iter_search_api(action, *args, page: int = DEFAULT_PAGE, per_page: int = MAX_PER_PAGE, **kwargs) -> Iterator:
+    """
+    build and lazily iterate over all the pages of a search
+
+    Args:
+        action (str): function action name
+        *args (str): positional arguments
+        page (int): the page to start from
+        per_page (int): the items fetched per request
+        **kwargs (str): keyword arguments
+    Returns:
+        (Iterator): the items of every page, one at a time.
+    """
+
+    def fetch_page(page_no: int, page_size: int):
+        return search_api(action, *args, page=page_no, per_page=page_size, **kwargs)
+
+    return paginate(fetch_page, page=page, per_page=per_page)
+
+
+def handle_query_params(action, **kwargs) -> Dict:
+    """
+    Build the query parameters for the given action; each call gets its own parameters so that
+    concurrent calls never share state.
+
+    Args:
+        action (str): function action name
+        **kwargs (str): keyword arguments
+    Returns:
+        (dict): the query parameters of this call.
+    """
+    return ENDPOINTS[action].params(kwargs)
+
+
+def handle_path_params(action, *args, **kwargs) -> List[str]:
+    """
+    Build the url for the given action.
+
+    Args:
+        action (str): function action name
+        *args (str): positional arguments
+        **kwargs (str): keyword arguments
+    Returns:
+        (List[str]): the url parts, to be joined with "/".
+    """
+    return [ENDPOINTS[action].url(args, kwargs)]
@@ -0,0 +1,63 @@
+"""Module that implements the coalescing of the identical requests in flight."""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Flight:
+    """
+    Class that keeps the outcome of a call in flight, shared by its waiting callers.
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Any = None
+
+
+class SingleFlight:
+    """
+    Class that runs a single call per key at a time across threads: the callers arriving while the call of
+    their key is in flight wait for it and get its result, or its exception, instead of making their own.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Function that calls `func`, unless a call of the same key is in flight, whose outcome is shared.
+
+        Args:
+            key (Hashable): the key identifying the call.
+            func (Callable[[], Any]): the call.
+        Returns:
+            Any: the result of the call.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,316 @@
+"""Module that implements the disk spilling stream of the huge paginated result sets.
+
+The pages are fetched ahead of the consumer as fast as the rate budget allows and kept as their undecoded
+bodies; the ones that do not fit in the memory cap are spilled to a temporary file, read back in order once
+the consumer gets to them, so a slow consumer neither holds the crawl back nor grows the resident memory.
+
+The pages are only decoded by the consumer, which tells the fetching when it gets to the last, short, page.
+"""
+import struct
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Iterator, Optional
+
+from pybraries.models import to_models
+from pybraries.pagination import DEFAULT_PAGE, MAX_PER_PAGE
+from pybraries.remote_sess import LibIOSession
+from pybraries.search_helpers import search_api
+
+# the default memory cap of a stream, in bytes
+MAX_MEMORY = 64 * 1024 * 1024
+# the pages fetched at once by a stream
+STREAM_CONCURRENCY = 4
+
+# the length prefix of the spilled records
+_LENGTH = struct.Struct("<Q")
+# the body of a page past the last one
+_EMPTY_PAGE = b"[]"
+
+
+class SpillQueue:
+    """
+    Class that implements a FIFO queue of byte records kept in memory up to `max_memory` bytes, the overflow
+    being spilled to a temporary file; `put` blocks once the spill file holds `max_spill` bytes too.
+
+    The records are spilled only while the memory is full or older records are spilled already, so the ones
+    in memory always precede the spilled ones and the file is read sequentially; it is emptied once drained.
+
+    The consumer acknowledges the records it processed with `task_done`, which the producer can wait for.
+    """
+
+    def __init__(self, max_memory: int = MAX_MEMORY, max_spill: Optional[int] = None, directory: Optional[str] = None):
+        """
+        Args:
+            max_memory (int): the bytes of the records held in memory.
+            max_spill (Optional[int]): the bytes of the records spilled to disk, None for no limit.
+            directory (Optional[str]): the directory of the spill file, the temporary directory by default.
+        """
+        self.max_memory = max_memory
+        self.max_spill = max_spill
+        self.directory = directory
+        # the bytes held in memory, their peak and the bytes and records spilled in total
+        self.memory_bytes = 0
+        self.peak_memory = 0
+        self.spilled_bytes = 0
+        self.spilled_records = 0
+        self._unread = 0
+        self._memory: Deque[bytes] = deque()
+        self._spill = None
+        self._read_at = 0
+        self._write_at = 0
+        self._finished = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        # whether the consumer waits for a record, the records it processed and whether it saw the last one
+        self._waiting = False
+        self._done = 0
+        self._last = False
+        self._cond = threading.Condition()
+
+    def put(self, record: bytes) -> bool:
+        """
+        Function that appends a record, waiting while the memory and the spill file are full.
+
+        Args:
+            record (bytes): the record.
+        Returns:
+            bool: False if the queue was closed by its consumer, the record is dropped.
+        """
+        size = len(record)
+        with self._cond:
+            while not self._closed:
+                spilled = self._write_at - self._read_at
+                if not spilled and self.memory_bytes + size <= self.max_memory:
+                    self._memory.append(record)
+                    self.memory_bytes += size
+                    self.peak_memory = max(self.peak_memory, self.memory_bytes)
+                    self._cond.notify_all()
+                    return True
+                # a record larger than the spill cap is let through an empty spill file
+                if self.max_spill is None or not spilled or spilled + _LENGTH.size + size <= self.max_spill:
+                    self._write(record)
+                    self._cond.notify_all()
+                    return True
+                self._cond.wait()
+            return False
+
+    def _write(self, record: bytes):
+        """appends a record to the spill file"""
+        if self._spill is None:
+            # pylint: disable=consider-using-with
+            self._spill = tempfile.TemporaryFile(prefix="pybraries-spill-", dir=self.directory)
+        self._spill.seek(self._write_at)
+        self._spill.write(_LENGTH.pack(len(record)))
+        self._spill.write(record)
+        self._write_at = self._spill.tell()
+        self.spilled_bytes += len(record)
+        self.spilled_records += 1
+        self._unread += 1
+
+    def _read(self) -> bytes:
+        """reads the oldest spilled record, emptying the spill file once drained"""
+        self._spill.seek(self._read_at)
+        (size,) = _LENGTH.unpack(self._spill.read(_LENGTH.size))
+        record = self._spill.read(size)
+        self._read_at = self._spill.tell()
+        self._unread -= 1
+        if self._read_at == self._write_at:
+            self._spill.seek(0)
+            self._spill.truncate()
+            self._read_at = self._write_at = 0
+        return record
+
+    def get(self) -> Optional[bytes]:
+        """
+        Function that pops the oldest record, waiting while the queue is empty.
+
+        Returns:
+            Optional[bytes]: the record, None once the producer finished and every record was read.
+        Raises:
+            Exception: the error the producer finished with, once the records before it were read.
+        """
+        with self._cond:
+            while True:
+                if self._memory:
+                    record = self._memory.popleft()
+                    self.memory_bytes -= len(record)
+                    self._cond.notify_all()
+                    return record
+                if self._write_at > self._read_at:
+                    record = self._read()
+                    self._cond.notify_all()
+                    return record
+                if self._finished:
+                    if self._error is not None:
+                        raise self._error
+                    return None
+                self._waiting = True
+                try:
+                    self._cond.wait()
+                finally:
+                    self._waiting = False
+
+    @property
+    def consumer_waiting(self) -> bool:
+        """whether the consumer is waiting for the next record, so it gets the next one right away"""
+        with self._cond:
+            return self._waiting
+
+    def task_done(self, last: bool = False):
+        """
+        Function that acknowledges a record processed by the consumer.
+
+        Args:
+            last (bool): the record is the last one the consumer needs, the producer can stop.
+        """
+        with self._cond:
+            self._done += 1
+            self._last = self._last or last
+            self._cond.notify_all()
+
+    def wait_done(self, count: int) -> bool:
+        """
+        Function that waits until the consumer processed `count` records, closed the queue or saw the last one.
+
+        Args:
+            count (int): the records put so far.
+        Returns:
+            bool: True if the consumer needs no more records.
+        """
+        with self._cond:
+            while not self._closed and not self._last and self._done < count:
+                self._cond.wait()
+            return self._closed or self._last
+
+    def finish(self, error: Optional[BaseException] = None):
+        """
+        Function that marks the end of the records, called by the producer.
+
+        Args:
+            error (Optional[BaseException]): the error the producer failed with, raised to the consumer.
+        """
+        with self._cond:
+            self._finished = True
+            self._error = error
+            self._cond.notify_all()
+
+    def close(self):
+        """
+        Function that drops the records left and deletes the spill file, called by the consumer; the producer
+        waiting in `put` is released.
+        """
+        with self._cond:
+            self._closed = True
+            self._memory.clear()
+            self.memory_bytes = 0
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            self._read_at = self._write_at = self._unread = 0
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._memory) + self._unread
+
+
+# pylint: disable=broad-except
+def _produce(queue: SpillQueue, action: str, args: tuple, kwargs: dict, page: int, per_page: int, concurrency: int):
+    """
+    fetches the pages in order, `concurrency` of them at a time, until an empty one or the last page the consumer
+    saw; the pages are not decoded here. A page handed to a waiting consumer is decoded right away, so the next
+    page is only scheduled once the consumer told whether it was the last one; while the consumer lags behind, at
+    most `concurrency` pages are fetched past the last one.
+    """
+
+    def fetch_page(page_no: int) -> bytes:
+        return search_api(action, *args, page=page_no, per_page=per_page, raw=True, raise_errors=True, **kwargs)
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending: Deque = deque(pool.submit(fetch_page, page_no) for page_no in range(page, page + concurrency))
+    error = None
+    try:
+        next_page = page + concurrency
+        put = 0
+        while pending:
+            body = pending.popleft().result()
+            if not body or body.strip() == _EMPTY_PAGE:
+                break
+            waiting = queue.consumer_waiting
+            if not queue.put(body):
+                break
+            put += 1
+            if waiting and queue.wait_done(put):
+                break
+            # keep `concurrency` pages in flight
+            pending.append(pool.submit(fetch_page, next_page))
+            next_page += 1
+    except Exception as err:
+        error = err
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+        queue.finish(error)
+
+
+def stream_search(
+    action: str,
+    *args,
+    page: int = DEFAULT_PAGE,
+    per_page: int = MAX_PER_PAGE,
+    concurrency: int = STREAM_CONCURRENCY,
+    max_memory: int = MAX_MEMORY,
+    max_spill: Optional[int] = None,
+    directory: Optional[str] = None,
+    as_models: bool = False,
+    **kwargs,
+) -> Iterator[Any]:
+    """
+    Stream all the items of a paginated search action, fetching its pages ahead of the consumer in the
+    background and spilling the ones that do not fit in `max_memory` to a temporary file.
+
+    Args:
+        action (str): function action name (e.g. "project_dependents").
+        *args (str): positional arguments of the action.
+        page (int): the page to start from.
+        per_page (int): the items fetched per request.
+        concurrency (int): the pages fetched at once, enough to use the rate budget up.
+        max_memory (int): the bytes of the undecoded pages queued in memory; the `concurrency` pages in flight
+            and the page being consumed are held outside of it.
+        max_spill (Optional[int]): the bytes of the pages spilled to disk before the fetching waits for the
+            consumer, None for no limit.
+        directory (Optional[str]): the directory of the spill file, the temporary directory by default.
+        as_models (bool): yield the models of the items instead of dicts.
+        **kwargs (str): keyword arguments of the action.
+    Returns:
+        Iterator: the items of every page, one at a time; a failed page raises its `LibrariesIOError` once
+            the items before it are consumed. Stopping early cancels the fetching and deletes the spill file.
+    """
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    queue = SpillQueue(max_memory, max_spill, directory)
+    producer = threading.Thread(
+        target=_produce,
+        args=(queue, action, args, kwargs, max(page, 1), per_page, max(concurrency, 1)),
+        daemon=True,
+    )
+    producer.start()
+    decode = LibIOSession.get_decoder()
+    try:
+        while True:
+            body = queue.get()
+            if body is None:
+                return
+            items = decode(body)
+            last = not isinstance(items, list) or len(items) < per_page
+            # a short page is the last one, the fetching stops
+            queue.task_done(last)
+            if not isinstance(items, list):
+                return
+            yield from to_models(action, items) if as_models else items
+            if last:
+                return
+    finally:
+        queue.close()
@@ -1,7 +1,12 @@
 # subscribe_api.py
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
-from pybraries.subscription_helpers import sub_api
+from pybraries.make_request import make_request
+from pybraries.pagination import MAX_PER_PAGE
+from pybraries.remote_sess import LibIOSession
+from pybraries.subscription_helpers import handle_sub_path, iter_subscribed, sub_api
+from pybraries.subscription_index import subscription_key
 
 
 class Subscribe:
@@ -17,6 +22,18 @@ class Subscribe:
         """
         return sub_api("list_subscribed")
 
+    @staticmethod
+    def iter_subscribed(per_page: int = MAX_PER_PAGE) -> Iterator[dict]:
+        """
+        Lazily iterate over all the packages a user is subscribed to, fetching the pages as needed.
+
+        Args:
+            per_page: the subscriptions fetched per request.
+        Returns:
+            Iterator of dicts with info for each package subscribed to at libraries.io.
+        """
+        return iter_subscribed(per_page=per_page)
+
     @staticmethod
     def subscribe(manager: str, package: str) -> str:
         """
@@ -38,6 +55,9 @@ class Subscribe:
         """
         Check if a user is subscribed to notifications for new project releases.
 
+        The check is answered without a request when the local subscription index is enabled,
+        see `LibIOSession.set_subscription_index`.
+
         Args:
             manager: package manager name (e.g. PyPI).
             package: package name.
@@ -76,3 +96,61 @@ class Subscribe:
         """
 
         return str(sub_api("delete_subscribe", manager, package))
+
+    # pylint: disable=broad-except
+    @staticmethod
+    def sync(desired: Iterable[Tuple[str, str]], concurrency: int = 8, dry_run: bool = False) -> Dict[str, List]:
+        """
+        Reconcile the subscriptions with a desired set of packages, in as few requests as possible.
+
+        The current subscriptions are listed once, the difference is computed locally and only the
+        missing subscriptions and the extra ones are changed, concurrently and under the session rate limit.
+
+        Args:
+            desired: the (manager, package) pairs to be subscribed to (e.g. ("pypi", "plotly")), managers
+                are matched case-insensitively.
+            concurrency: the number of subscription changes in flight.
+            dry_run: only compute the changes, without applying them.
+        Returns:
+            Dict with the "subscribed" and "unsubscribed" (manager, package) pairs, the number of "unchanged"
+            ones and the "failed" changes as (action, manager, package, error) tuples.
+        """
+        # an incomplete listing would unsubscribe from everything on the missing pages, so fail loudly
+        current = {}
+        for subscription in iter_subscribed(raise_errors=True):
+            project = subscription["project"]
+            current[subscription_key(project["platform"], project["name"])] = (project["platform"], project["name"])
+        wanted = {subscription_key(*pair): tuple(pair) for pair in desired}
+
+        changes = [("subscribe", *wanted[key]) for key in wanted.keys() - current.keys()]
+        changes += [("unsubscribe", *current[key]) for key in current.keys() - wanted.keys()]
+        report = {
+            "subscribed": [],
+            "unsubscribed": [],
+            "unchanged": len(wanted.keys() & current.keys()),
+            "failed": [],
+        }
+
+        index = LibIOSession.get_subscription_index()
+
+        def apply(change: Tuple[str, str, str]):
+            action, manager, package = change
+            if dry_run:
+                return change, None
+            try:
+                kind = "post" if action == "subscribe" else "delete"
+                endpoint = "subscribe" if action == "subscribe" else "delete_subscribe"
+                make_request(handle_sub_path(manager, package), kind, endpoint=endpoint, raise_errors=True)
+                if index is not None:
+                    index.update(manager, package, subscribed=action == "subscribe")
+                return change, None
+            except Exception as err:
+                return change, err
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for (action, manager, package), error in pool.map(apply, sorted(changes)):
+                if error is None:
+                    report[f"{action}d"].append((manager, package))
+                else:
+                    report["failed"].append((action, manager, package, str(error)))
+        return report
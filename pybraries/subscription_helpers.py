@@ -1,55 +1,92 @@
-from typing import Union
+from typing import Dict, Iterator, Union
 
-from pybraries.helpers import extract
+from pybraries.endpoints import ENDPOINTS
+from pybraries.errors import NotFoundError
 from pybraries.make_request import make_request
+from pybraries.pagination import MAX_PER_PAGE, paginate
+from pybraries.remote_sess import LibIOSession
+
+
+def handle_sub_path(manager: str = "", package: str = "") -> str:
+    """
+    Build the subscription url, optionally for a specific package.
+
+    Args:
+        manager (str): package manager name (e.g. PyPI).
+        package (str): package name.
+    Returns:
+        (str): the subscription url.
+    """
+    if manager and package:
+        return ENDPOINTS["check_subscribed"].url((manager, package))
+    return ENDPOINTS["list_subscribed"].url()
 
 
 def sub_api(action, manager="", package="", *args, **kwargs) -> Union[bool, str]:
-    url_end_list = ["https://libraries.io/api/subscriptions"]  # start of list to build url
-    more_args = []  # for unpacking args
-    url_combined = ""  # final string url
-    kind = "get"  # get, post, put or delete
+    endpoint = ENDPOINTS[action]
+    kind = endpoint.method  # get, post, put or delete
 
     if action == "list_subscribed":
-        url_combined = "/".join(url_end_list)
-        resp = make_request(url_combined, kind)
+        params = endpoint.params(kwargs)
+        resp = make_request(
+            endpoint.url(), kind, params, endpoint=action, raise_errors=kwargs.get("raise_errors", False)
+        )
         return resp
 
     assert manager and package, "this operation requires manager and package definition"
 
-    url_end_list += [manager, package]
-    url_combined = "/".join(url_end_list)
+    url_combined = endpoint.url((manager, package))
 
+    index = LibIOSession.get_subscription_index()
     if action == "check_subscribed":
-        resp = make_request(url_combined, kind)
-        return resp is not None
+        if index is not None:
+            return (manager, package) in index
+        resp = make_request(url_combined, kind, endpoint=action)
+        return bool(resp)
     if action == "subscribe":
-        extract("include_prerelease").of(kwargs).then(url_end_list.append)
-        kind = "post"
-        make_request(url_combined, kind)
+        resp = make_request(url_combined, kind, endpoint=action)
+        if index is not None and resp:
+            index.update(manager, package, subscribed=True)
         return "Successfully Subscribed"
 
     if action == "update_subscribe":
-        kind = "put"
         # not implemented - seems libraries.io api has bug
         # if implemented in future, adjust modules in readme
-        make_request(url_combined, kind)
+        make_request(url_combined, kind, endpoint=action)
         return "include_prerelease is always set to true"
 
     if action == "delete_subscribe":
-        kind = "delete"
-
-        # first check if subscribed. Must be done before build url.
-        is_subscribed = sub_api("check_subscribed", manager=manager, package=package)
-
-        if is_subscribed:
-            make_request(url_combined, kind)
+        # a single round trip, libraries.io answers 404 if there is no subscription to delete
+        try:
+            make_request(url_combined, kind, endpoint=action, raise_errors=True)
             msg = "Successfully Unsubscribed"
-        else:
+        except NotFoundError:
             msg = f"Unsubscribe unnecessary. You are not subscribed to {package}."
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Other error occurred: {err}")
+            return f"Unsubscribe failed: {err}"
+        if index is not None:
+            index.update(manager, package, subscribed=False)
         return msg
 
 
+def iter_subscribed(per_page: int = MAX_PER_PAGE, raise_errors: bool = False) -> Iterator[Dict]:
+    """
+    Lazily iterate over all the pages of the subscriptions.
+
+    Args:
+        per_page (int): the subscriptions fetched per request.
+        raise_errors (bool): raise the request errors instead of stopping at the failed page.
+    Returns:
+        (Iterator[Dict]): the subscriptions, one at a time.
+    """
+
+    def fetch_page(page_no: int, page_size: int):
+        return sub_api("list_subscribed", page=page_no, per_page=page_size, raise_errors=raise_errors)
+
+    return paginate(fetch_page, per_page=per_page)
+
+
 # prerelease option currently not changeable for subscribe or update
 # (perhaps due to libraries.io api glitch)
 def __check_prerelease(*args, **kwargs):
@@ -0,0 +1,105 @@
+"""Module that implements the local index of the subscriptions, used to check them without requests."""
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+
+def subscription_key(manager: str, package: str) -> Tuple[str, str]:
+    """
+    Build the key a subscription is compared by, package managers are matched case-insensitively.
+
+    Args:
+        manager (str): package manager name (e.g. PyPI).
+        package (str): package name.
+    Returns:
+        (Tuple[str, str]): the subscription key.
+    """
+    return manager.lower(), package
+
+
+class SubscriptionIndex:
+    """
+    Class that keeps the subscriptions in a hash set, loaded from the subscription listing and refreshed
+    on a background thread every `refresh_interval` seconds; the local changes are applied right away.
+    """
+
+    def __init__(self, lister: Callable[[], Iterable[Tuple[str, str]]], refresh_interval: Optional[float] = 300.0):
+        """
+        Args:
+            lister (Callable[[], Iterable[Tuple[str, str]]]): lists the (manager, package) pairs subscribed to,
+                raising on failure.
+            refresh_interval (Optional[float]): the seconds between the background refreshes, None disables them.
+        """
+        self.lister = lister
+        self.refresh_interval = refresh_interval
+        self.loaded = False
+        self._keys: Set[Tuple[str, str]] = set()
+        # the local changes made while a refresh is listing, re-applied on top of its result
+        self._changes: Optional[Dict[Tuple[str, str], bool]] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        """
+        Function that reloads the index from the subscription listing.
+        """
+        with self._refresh_lock:
+            with self._lock:
+                self._changes = {}
+            try:
+                keys = {subscription_key(manager, package) for manager, package in self.lister()}
+            finally:
+                with self._lock:
+                    changes, self._changes = self._changes, None
+            with self._lock:
+                for key, subscribed in changes.items():
+                    (keys.add if subscribed else keys.discard)(key)
+                self._keys = keys
+                self.loaded = True
+
+    def start(self) -> "SubscriptionIndex":
+        """
+        Function that loads the index and starts refreshing it in the background.
+        """
+        self.refresh()
+        if self.refresh_interval is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Function that stops the background refreshes.
+        """
+        self._stopped.set()
+
+    # pylint: disable=broad-except
+    def _refresh_forever(self):
+        """refreshes the index until stopped, keeping the previous subscriptions when a refresh fails"""
+        while not self._stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as err:
+                print(f"Subscription index refresh error occurred: {err}")
+
+    def update(self, manager: str, package: str, subscribed: bool):
+        """
+        Function that records a subscription change made by this client.
+
+        Args:
+            manager (str): package manager name (e.g. PyPI).
+            package (str): package name.
+            subscribed (bool): True if subscribed to the package, False if unsubscribed.
+        """
+        key = subscription_key(manager, package)
+        with self._lock:
+            (self._keys.add if subscribed else self._keys.discard)(key)
+            if self._changes is not None:
+                self._changes[key] = subscribed
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        return subscription_key(*pair) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
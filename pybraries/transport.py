@@ -0,0 +1,148 @@
+"""Module that implements the pooled, record and replay transports of the libraries.io session."""
+import json
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection
+
+
+def normalize_url(url: str) -> str:
+    """
+    Build the cassette key of a url, dropping the API key and sorting the query parameters.
+
+    Args:
+        url (str): the request url.
+    Returns:
+        (str): the normalized url.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "api_key")
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def keepalive_socket_options(idle: Optional[float]) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Build the socket options of the pooled connections, enabling the TCP keep-alive probes if asked to.
+
+    Args:
+        idle (Optional[float]): the idle seconds after which a connection is probed, None keeps the OS defaults.
+    Returns:
+        (Optional[List[Tuple[int, int, int]]]): the socket options, None for the urllib3 defaults.
+    """
+    if idle is None:
+        return None
+    seconds = max(int(idle), 1)
+    options = [*HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # the names of the per socket settings differ between the platforms, macOS calls the idle time TCP_KEEPALIVE
+    for name in ("TCP_KEEPIDLE", "TCP_KEEPALIVE", "TCP_KEEPINTVL"):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), seconds))
+    return options
+
+
+class PooledTransport(HTTPAdapter):
+    """
+    Class that implements the default transport of the session, an `HTTPAdapter` whose pooled connections
+    may send TCP keep-alive probes, so that the idle ones are not silently dropped by the network in between.
+    """
+
+    __attrs__ = [*HTTPAdapter.__attrs__, "tcp_keepalive"]
+
+    def __init__(self, tcp_keepalive: Optional[float] = None, **kwargs):
+        """
+        Args:
+            tcp_keepalive (Optional[float]): the idle seconds after which a pooled connection is probed,
+                None keeps the OS defaults.
+            **kwargs: the `HTTPAdapter` arguments (e.g. pool_maxsize, max_retries).
+        """
+        # the pool manager is built by the HTTPAdapter constructor, which needs the socket options
+        self.tcp_keepalive = tcp_keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        options = keepalive_socket_options(self.tcp_keepalive)
+        if options is not None:
+            pool_kwargs.setdefault("socket_options", options)
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+
+class RecordingTransport(HTTPAdapter):
+    """
+    Class that implements a transport which performs the requests and appends every response to a
+    JSON lines cassette file; the API key is never written to the cassette.
+    """
+
+    def __init__(self, cassette: str, **kwargs):
+        """
+        Args:
+            cassette (str): the cassette file the responses are appended to.
+            **kwargs: the `HTTPAdapter` arguments (e.g. max_retries).
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self._lock = threading.Lock()
+
+    def send(self, request: PreparedRequest, *args, **kwargs) -> Response:  # pylint: disable=arguments-differ
+        resp = super().send(request, *args, **kwargs)
+        record = {
+            "method": request.method,
+            "url": normalize_url(request.url),
+            "status": resp.status_code,
+            "headers": dict(resp.headers),
+            "body": resp.content.decode("utf8", errors="replace"),
+        }
+        with self._lock, open(self.cassette, "a", encoding="utf8") as handle:
+            handle.write(json.dumps(record) + "\n")
+        return resp
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    Class that implements a transport which serves the responses of a cassette without any network access;
+    identical requests replay their recorded responses in order, repeating the last one once exhausted.
+    """
+
+    def __init__(self, cassette: str):
+        """
+        Args:
+            cassette (str): the cassette file written by `RecordingTransport`.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self._records: Dict[Tuple[str, str], List[Dict]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        with open(cassette, "r", encoding="utf8") as handle:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.setdefault((record["method"], record["url"]), []).append(record)
+
+    def send(self, request: PreparedRequest, *args, **kwargs) -> Response:  # pylint: disable=arguments-differ
+        key = (request.method, normalize_url(request.url))
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise LookupError(f"No recorded response for {key[0]} {key[1]} in {self.cassette}.")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        record = records[min(served, len(records) - 1)]
+
+        resp = Response()
+        resp.status_code = record["status"]
+        resp.headers = CaseInsensitiveDict(record["headers"])
+        resp.headers.pop("Content-Encoding", None)  # the recorded body is already decoded
+        resp._content = record["body"].encode("utf8")  # pylint: disable=protected-access
+        resp.encoding = "utf8"
+        resp.url = request.url
+        resp.request = request
+        resp.reason = "Replayed"
+        return resp
+
+    def close(self):
+        pass
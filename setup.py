@@ -25,6 +25,12 @@ setup(
     url="https://github.com/andylamp/pybraries/",
     packages=find_packages(),
     install_requires=requirements,
+    extras_require={
+        "async": ["aiohttp>=3.8.1"],
+        "fast": ["orjson>=3.6.7"],
+        "parquet": ["pyarrow>=7.0.0"],
+        "analytics": ["numpy>=1.16.0"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Programming Language :: Python :: 3.7",
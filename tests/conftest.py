@@ -0,0 +1,29 @@
+"""Shared fixtures of the `pybraries` tests, against the fake libraries.io server."""
+import pytest
+
+from pybraries.fake_server import FakeLibrariesIO
+from pybraries.remote_sess import LibIOSession
+
+
+@pytest.fixture
+def offline_session(monkeypatch):
+    """configures the session for the fake server and restores the default transport afterwards"""
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    monkeypatch.setattr(LibIOSession, "_retry_config", LibIOSession.get_retry_config().new(total=0))
+    monkeypatch.setattr(LibIOSession, "_api_url", LibIOSession.get_api_url())
+    yield
+    LibIOSession.set_transport(None)
+
+
+@pytest.fixture
+def fake(request, offline_session, monkeypatch):
+    """
+    serves the requests from the fake server, without a response cache; parametrize it indirectly with the
+    arguments of the server and the "cache" of the session, e.g. {"total_items": 5, "cache": ResponseCache()}
+    """
+    options = dict(getattr(request, "param", None) or {})
+    monkeypatch.setattr(LibIOSession, "_cache", options.pop("cache", None))
+    with FakeLibrariesIO(**options) as server:
+        LibIOSession.set_api_url(server.url)
+        yield server
@@ -0,0 +1,116 @@
+"""Tests for the `pybraries` SourceRank analytics, against the fake libraries.io server."""
+import pytest
+from pyexpect import expect
+
+from pybraries.analytics import (
+    SOURCERANK_FACTORS,
+    collect,
+    from_breakdowns,
+    load_array,
+    outlier_flags,
+    percentile_ranks,
+    rank,
+    save_array,
+    weighted_scores,
+)
+
+numpy = pytest.importorskip("numpy")
+
+
+def test_collect_breakdowns(fake):
+    """one row per distinct project, one column per factor, the usage summarised"""
+    data = collect([("PyPI", "requests"), ("pypi", "flask"), ("pypi", "requests")], concurrency=2)
+
+    expect(data.shape).equals((2,))
+    expect(list(data["name"])).equals(["requests", "flask"])
+    expect(list(data["platform"])).equals(["pypi", "pypi"])
+    expect(bool(data["fetched"].all())).equals(True)
+    expect(data.dtype.names).to_include(*SOURCERANK_FACTORS)
+    expect(list(data["basic_info_present"])).equals([1.0, 1.0])
+    expect(list(data["sourcerank"])).equals(list(data["basic_info_present"] + data["contributors"] + data["stars"]))
+    expect(list(data["usage_unpinned"])).equals(list(data["usage_total"]))
+    expect(fake.requests_served).equals(4)
+
+
+def test_collect_marks_failed_projects(fake, monkeypatch):
+    """a project that fails to fetch keeps its row, with NaN factors"""
+    route = fake.route
+    monkeypatch.setattr(
+        fake, "route", lambda method, parts, query: (404, {}) if "missing" in parts else route(method, parts, query)
+    )
+
+    data = collect([("pypi", "requests"), ("pypi", "missing")])
+
+    expect(list(data["fetched"])).equals([True, False])
+    expect(bool(numpy.isnan(data["stars"][1]))).equals(True)
+    expect(bool(numpy.isnan(weighted_scores(data)[1]))).equals(True)
+
+
+def test_collect_reuses_the_cache(fake, tmp_path):
+    """the projects saved in the cache are not fetched again"""
+    cache = str(tmp_path / "sourcerank.npy")
+    first = collect([("pypi", "requests"), ("pypi", "flask")], cache=cache)
+    served = fake.requests_served
+
+    data = collect([("pypi", "flask"), ("pypi", "a-much-longer-project-name")], cache=cache)
+
+    expect(fake.requests_served).equals(served + 2)
+    expect(list(data["name"])).equals(["flask", "a-much-longer-project-name"])
+    expect(float(data["sourcerank"][0])).equals(float(first["sourcerank"][1]))
+    expect(len(load_array(cache))).equals(3)
+
+
+def test_save_and_load(tmp_path):
+    """the arrays are saved without pickling and loaded back, or mapped, as they were"""
+    path = str(tmp_path / "breakdowns.npy")
+    data = from_breakdowns([(("pypi", "requests"), {"stars": 5, "is_removed": -5}, {"*": 3, ">= 2": 4})])
+
+    save_array(data, path)
+
+    for loaded in (load_array(path), load_array(path, mmap=True)):
+        expect(loaded.dtype).equals(data.dtype)
+        expect(float(loaded["sourcerank"][0])).equals(0.0)
+        expect(float(loaded["usage_total"][0])).equals(7.0)
+        expect(float(loaded["usage_requirements"][0])).equals(2.0)
+
+
+def test_weighted_scores():
+    """the factors missing from the weights count once, unknown factors are rejected"""
+    data = from_breakdowns(
+        [
+            (("pypi", "a"), {"stars": 2, "contributors": 1}, {}),
+            (("pypi", "b"), {"stars": 1, "contributors": 3}, {}),
+        ]
+    )
+
+    expect(list(weighted_scores(data))).equals([3.0, 4.0])
+    expect(list(weighted_scores(data, {"stars": 10}))).equals([21.0, 13.0])
+    with pytest.raises(ValueError):
+        weighted_scores(data, {"popularity": 1})
+
+
+def test_percentiles_and_outliers():
+    """the percentiles count the values lower or equal, the outliers are outside of Tukey's fences"""
+    values = numpy.array([1.0, 2.0, 2.0, 3.0, 4.0, 100.0, numpy.nan])
+
+    ranks = percentile_ranks(values)
+    expect(list(ranks[:6])).equals([100 / 6, 50.0, 50.0, 400 / 6, 500 / 6, 100.0])
+    expect(bool(numpy.isnan(ranks[6]))).equals(True)
+    expect(list(outlier_flags(values))).equals([False, False, False, False, False, True, False])
+
+
+def test_rank():
+    """the projects are sorted by descending score, the failed ones last"""
+    data = from_breakdowns(
+        [
+            (("pypi", "low"), {"stars": 1}, {}),
+            (("pypi", "failed"), None, None),
+            (("pypi", "high"), {"stars": 5}, {}),
+        ]
+    )
+
+    ranked = rank(data)
+
+    expect(list(ranked["name"])).equals(["high", "low", "failed"])
+    expect(list(ranked["percentile"][:2])).equals([100.0, 50.0])
+    expect(list(ranked["outlier"])).equals([False, False, False])
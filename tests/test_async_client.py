@@ -0,0 +1,84 @@
+"""Tests for the `pybraries` asyncio clients, served by a local aiohttp application."""
+import asyncio
+
+import pytest
+from pyexpect import expect
+
+from pybraries.async_client import AsyncLibIOSession, AsyncSearch, AsyncSubscribe
+from pybraries.remote_sess import LibIOSession
+
+web = pytest.importorskip("aiohttp.web")
+
+
+async def echo(request):
+    """echoes the path and query parameters back to the caller"""
+    return web.json_response({"path": request.path, "method": request.method, "query": dict(request.query)})
+
+
+def run_against_local_api(monkeypatch, scenario):
+    """runs the scenario coroutine with the api urls pointing to a local application"""
+
+    async def runner():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", echo)
+        server = web.AppRunner(app)
+        await server.setup()
+        site = web.TCPSite(server, "127.0.0.1", 0)
+        await site.start()
+        port = server.addresses[0][1]
+        monkeypatch.setattr(LibIOSession, "_api_url", f"http://127.0.0.1:{port}/api")
+        try:
+            return await scenario()
+        finally:
+            await server.cleanup()
+
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    return asyncio.run(runner())
+
+
+def test_async_search_hits_same_endpoints(monkeypatch):
+    """async search builds the same urls as the synchronous client"""
+
+    async def scenario():
+        async with AsyncSearch() as search:
+            return await asyncio.gather(
+                search.project("pypi", "plotly"),
+                search.project_dependencies("pypi", "plotly"),
+                search.user_repositories("github", "discdiver"),
+            )
+
+    project, deps, repos = run_against_local_api(monkeypatch, scenario)
+    expect(project["path"]).equals("/api/pypi/plotly")
+    expect(deps["path"]).equals("/api/pypi/plotly/latest/dependencies")
+    expect(repos["path"]).equals("/api/github/discdiver/repositories")
+    expect(project["query"]["api_key"]).equals("test-key")
+
+
+def test_async_project_search_params(monkeypatch):
+    """async project search passes the query parameters per call"""
+
+    async def scenario():
+        async with AsyncSearch() as search:
+            return await search.project_search(keywords="visualization", platforms="Pypi", per_page=500)
+
+    resp = run_against_local_api(monkeypatch, scenario)
+    expect(resp["query"]["q"]).equals("visualization")
+    expect(resp["query"]["platforms"]).equals("Pypi")
+    expect(resp["query"]["per_page"]).equals("100")
+
+
+def test_async_subscribe_shares_session(monkeypatch):
+    """async subscribe reuses a shared session and uses the right verbs"""
+
+    async def scenario():
+        session = AsyncLibIOSession()
+        subs = AsyncSubscribe(session)
+        listed = await subs.list_subscribed()
+        unsub = await subs.unsubscribe("pypi", "pandas")
+        await session.close()
+        return listed, unsub
+
+    listed, unsub = run_against_local_api(monkeypatch, scenario)
+    expect(listed["path"]).equals("/api/subscriptions")
+    expect(unsub).equals("Successfully Unsubscribed")
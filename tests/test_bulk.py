@@ -0,0 +1,58 @@
+"""Tests for the `pybraries` bulk project lookup."""
+import pytest
+from pyexpect import expect
+
+from pybraries.errors import NotFoundError
+from pybraries.search import Search
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """the fake server, which does not know the projects named "missing-*" """
+    route = fake.route
+
+    def missing_route(method, parts, query):
+        if len(parts) == 2 and parts[1].startswith("missing-"):
+            return 404, {"error": "Not found"}
+        return route(method, parts, query)
+
+    monkeypatch.setattr(fake, "route", missing_route)
+    return fake
+
+
+def test_projects_bulk_deduplicates(fake):
+    """every distinct pair is looked up once and reported once"""
+    pairs = [("pypi", f"pkg-{i % 50}") for i in range(200)] + [("PyPI", "pkg-0")]
+    results = dict(Search.projects_bulk(pairs, concurrency=4))
+
+    expect(len(results)).equals(50)
+    expect(fake.requests_served).equals(50)
+    expect(results[("pypi", "pkg-7")]["name"]).equals("pkg-7")
+
+
+def test_projects_bulk_reports_failures_per_pair(fake):
+    """a failed lookup yields its error instead of failing the batch"""
+    pairs = [("pypi", "plotly"), ("pypi", "missing-one"), ("npm", "react")]
+    results = dict(Search.projects_bulk(pairs, concurrency=2, as_models=True))
+
+    expect(results[("pypi", "plotly")].name).equals("plotly")
+    expect(results[("npm", "react")].platform).equals("npm")
+    expect(results[("pypi", "missing-one")]).is_instance_of(NotFoundError)
+    expect(results[("pypi", "missing-one")].status).equals(404)
+
+
+def test_projects_bulk_streams_lazily(fake):
+    """stopping early leaves the rest of a lazy iterable unread"""
+    consumed = []
+
+    def pairs():
+        for i in range(10000):
+            consumed.append(i)
+            yield "pypi", f"pkg-{i}"
+
+    stream = Search.projects_bulk(pairs(), concurrency=2)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+
+    expect(len(first)).equals(3)
+    expect(len(consumed) < 10).is_true()
@@ -0,0 +1,93 @@
+"""Tests for the `pybraries` response cache."""
+import json
+
+import pytest
+from pyexpect import expect
+
+from pybraries.cache import ResponseCache
+from pybraries.helpers import sess
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+class ConditionalResponse:
+    """a response honouring If-None-Match"""
+
+    decoded = 0
+
+    def __init__(self, headers):
+        self.status_code = 304 if headers.get("If-None-Match") == '"v1"' else 200
+        self.headers = {"ETag": '"v1"'}
+        self.content = b'{"name": "plotly"}'
+
+    def raise_for_status(self):
+        pass
+
+
+def counting_decoder(body):
+    """decodes the body, counting the decoded bodies"""
+    ConditionalResponse.decoded += 1
+    return json.loads(body)
+
+
+@pytest.fixture
+def cached_sess(monkeypatch):
+    """patches the shared session with a conditional server and enables the cache"""
+    requests_made = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        requests_made.append(headers)
+        return ConditionalResponse(headers)
+
+    ConditionalResponse.decoded = 0
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    monkeypatch.setattr(LibIOSession, "_cache", None)
+    monkeypatch.setattr(LibIOSession, "_decoder", staticmethod(counting_decoder))
+    monkeypatch.setattr(sess, "get", fake_get)
+    yield requests_made
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    """least recently used entries are evicted to honour both bounds"""
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.get("a")
+    cache.put("c", 3, 10)
+
+    expect(cache.get("b")).equals(None)
+    expect(cache.get("a").value).equals(1)
+
+    cache.put("d", 4, 95)
+    expect(len(cache)).equals(1)
+    expect(cache.size).equals(95)
+
+
+def test_key_excludes_api_key():
+    """the API key never takes part in the cache key"""
+    first = ResponseCache.make_key("get", "url", {"api_key": "one", "page": 1})
+    second = ResponseCache.make_key("get", "url", {"api_key": "two", "page": "1"})
+
+    expect(first).equals(second)
+    expect(str(first)).not_to_contain("one")
+
+
+def test_fresh_entries_skip_the_network(cached_sess):
+    """repeated calls within the time to live are served from memory"""
+    LibIOSession.set_cache()
+    Search.project("pypi", "plotly")
+    Search.project("pypi", "plotly")
+
+    expect(len(cached_sess)).equals(1)
+
+
+def test_stale_entries_are_revalidated(cached_sess):
+    """expired entries send the ETag and a 304 reuses the cached value without decoding"""
+    LibIOSession.set_cache(ttls={"project": 0})
+    first = Search.project("pypi", "plotly")
+    second = Search.project("pypi", "plotly")
+
+    expect(cached_sess[1]).equals({"If-None-Match": '"v1"'})
+    expect(second).equals(first)
+    expect(ConditionalResponse.decoded).equals(1)
@@ -0,0 +1,74 @@
+"""Tests for the `pybraries` connection pool, timeouts and warm-up, against the fake libraries.io server."""
+import socket
+
+import pytest
+from pyexpect import expect
+
+from pybraries.errors import RequestTimeoutError
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+from pybraries.search_helpers import search_api
+from pybraries.transport import PooledTransport, keepalive_socket_options
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """the fake server, restoring the default connection pool afterwards"""
+    monkeypatch.setattr(LibIOSession, "_single_flight", None)
+    monkeypatch.setattr(LibIOSession, "_timeout", LibIOSession.get_timeout())
+    yield fake
+    LibIOSession.set_connection_pool()
+
+
+def test_connection_pool_settings(fake):
+    """the default transport is remounted with the pool settings, keep-alive can be turned off"""
+    LibIOSession.set_connection_pool(pool_maxsize=32, pool_block=True, keep_alive=False, tcp_keepalive=30)
+
+    sess = LibIOSession.get_session()
+    adapter = sess.get_adapter(fake.url)
+    expect(adapter).is_instance(PooledTransport)
+    expect(adapter.poolmanager.connection_pool_kw["maxsize"]).equals(32)
+    expect(adapter.poolmanager.connection_pool_kw["block"]).equals(True)
+    expect(adapter.poolmanager.connection_pool_kw["socket_options"]).to_include(
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    )
+    expect(sess.headers["Connection"]).equals("close")
+    expect(LibIOSession.get_connection_pool()["pool_maxsize"]).equals(32)
+
+    LibIOSession.set_connection_pool()
+    expect("Connection" in sess.headers).is_false()
+    expect("socket_options" in sess.get_adapter(fake.url).poolmanager.connection_pool_kw).is_false()
+
+
+def test_keepalive_socket_options():
+    """the keep-alive probes are only enabled when asked to"""
+    expect(keepalive_socket_options(None)).equals(None)
+    options = keepalive_socket_options(0.5)
+    expect(options).to_include((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    expect(all(value >= 1 for _, _, value in options)).is_true()
+
+
+def test_read_timeout(fake):
+    """a response slower than the read timeout raises a timeout error"""
+    fake.latency = 0.5
+    LibIOSession.set_timeout(connect=1.0, read=0.05)
+
+    with pytest.raises(RequestTimeoutError):
+        search_api("project", "pypi", "plotly", raise_errors=True)
+
+    LibIOSession.set_timeout(None, None)
+    expect(LibIOSession.get_timeout()).equals(None)
+    expect(search_api("project", "pypi", "plotly", raise_errors=True)["name"]).equals("plotly")
+
+
+def test_warm_up_opens_the_pooled_connections(fake):
+    """the connections opened ahead of a burst serve all of its requests"""
+    LibIOSession.set_connection_pool(pool_maxsize=8)
+
+    expect(LibIOSession.warm_up(20)).equals(8)
+    expect(fake.connections_opened).equals(8)
+    expect(fake.requests_served).equals(0)
+
+    Search.map("project", [("pypi", f"project-{i}") for i in range(8)], workers=8)
+    expect(fake.requests_served).equals(8)
+    expect(fake.connections_opened).equals(8)
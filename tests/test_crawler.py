@@ -0,0 +1,84 @@
+"""Tests for the `pybraries` process pool crawler, against the fake libraries.io server."""
+import json
+import sqlite3
+
+import pytest
+from pyexpect import expect
+
+from pybraries.crawler import Crawler, crawl
+from pybraries.remote_sess import LibIOSession
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 5}], indirect=True)
+def test_crawl_to_jsonl(fake, tmp_path):
+    """every task of the users and repositories gets one record"""
+    sink = str(tmp_path / "crawl.jsonl")
+    stats = crawl(sink, users=["alice", "bob"], repositories=["plotly/dash"], processes=2, rate=None)
+
+    expect(stats).equals({"succeeded": 5, "failed": 0, "skipped": 0})
+    records = {tuple(record["task"]): record for record in read_jsonl(sink)}
+    expect(len(records[("user_repositories", "github", "alice")]["result"])).equals(5)
+    expect(records[("repository_dependencies", "github", "plotly", "dash")]["result"]["full_name"]).equals(
+        "plotly/dash"
+    )
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 5}], indirect=True)
+def test_crawl_resumes_after_crash(fake, tmp_path):
+    """a rerun skips the completed tasks and retries the failed ones, ignoring a half written record"""
+    sink = str(tmp_path / "crawl.jsonl")
+    route = fake.route
+    fake.route = lambda method, parts, query: (500, {}) if "bob" in parts else route(method, parts, query)
+    expect(crawl(sink, users=["alice", "bob"], processes=2, rate=None)).equals(
+        {"succeeded": 2, "failed": 2, "skipped": 0}
+    )
+    with open(sink, "a", encoding="utf8") as handle:
+        handle.write('{"task": ["user_dependencies", "github", "carol"], "res')
+
+    fake.route = route
+    stats = crawl(sink, users=["alice", "bob", "carol"], processes=2, rate=None)
+
+    expect(stats).equals({"succeeded": 4, "failed": 0, "skipped": 2})
+    ok = [tuple(record["task"]) for record in read_jsonl(sink) if record["error"] is None]
+    expect(len(ok)).equals(6)
+    expect(len(set(ok))).equals(6)
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 5}], indirect=True)
+def test_crawl_to_sqlite_following_repositories(fake, tmp_path):
+    """the repositories found for a user are crawled for their dependencies"""
+    sink = str(tmp_path / "crawl.db")
+    crawler = Crawler(sink, processes=2, rate=600, per=1.0, follow_repositories=True)
+    stats = crawler.run(Crawler.tasks_for(users=["alice"]))
+
+    expect(stats).equals({"succeeded": 7, "failed": 0, "skipped": 0})
+    with sqlite3.connect(sink) as conn:
+        actions = dict(conn.execute("SELECT action, COUNT(*) FROM results WHERE ok = 1 GROUP BY action").fetchall())
+    expect(actions).equals({"repository_dependencies": 5, "user_dependencies": 1, "user_repositories": 1})
+
+    expect(crawler.run(Crawler.tasks_for(users=["alice"]))).equals({"succeeded": 0, "failed": 0, "skipped": 7})
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 5}], indirect=True)
+def test_crawl_spreads_over_the_key_pool(fake, tmp_path, monkeypatch):
+    """the workers use every key of the pool of the session, with its own settings"""
+    route = fake.route
+    keys = []
+
+    def recording_route(method, parts, query):
+        keys.append(query["api_key"][0])
+        return route(method, parts, query)
+
+    fake.route = recording_route
+    monkeypatch.setattr(LibIOSession, "_key_pool", None)
+    LibIOSession.set_key_pool(["key-a", "key-b", "key-c"], rate=60, per=60.0, capacity=10, cooldown=5.0)
+
+    stats = crawl(str(tmp_path / "crawl.jsonl"), users=["alice", "bob", "carol"], processes=2, rate=None)
+
+    expect(stats["succeeded"]).equals(6)
+    expect(set(keys)).equals({"key-a", "key-b", "key-c"})
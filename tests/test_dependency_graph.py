@@ -0,0 +1,75 @@
+"""Tests for the `pybraries` dependency graph crawler."""
+import json
+
+import pytest
+from pyexpect import expect
+
+from pybraries.dependency_graph import DependencyGraph
+from pybraries.search import Search
+
+DEPENDENCIES = {
+    "app": ["flask", "requests"],
+    "flask": ["werkzeug", "jinja2"],
+    "requests": ["urllib3", "idna"],
+    "jinja2": ["markupsafe"],
+    "werkzeug": ["markupsafe"],
+}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """patches project_dependencies with a static dependency tree"""
+    calls = []
+
+    def project_dependencies(platforms, project, version=None):
+        calls.append(project)
+        deps = [
+            {"project_name": name, "platform": "Pypi", "requirements": "*", "kind": "runtime"}
+            for name in DEPENDENCIES.get(project, [])
+        ]
+        return {"name": project, "dependencies": deps}
+
+    monkeypatch.setattr(Search, "project_dependencies", staticmethod(project_dependencies))
+    yield calls
+
+
+def test_build_deduplicates(fetched):
+    """every project is fetched once and the adjacency is complete"""
+    graph = DependencyGraph.build("pypi", "app", max_depth=5, concurrency=3)
+
+    expect(sorted(fetched)).equals(sorted(set(fetched)))
+    expect(len(graph.nodes)).equals(8)
+    expect([edge["to"] for edge in graph.edges["pypi/flask"]]).equals(["pypi/werkzeug", "pypi/jinja2"])
+    expect(graph.nodes["pypi/markupsafe"]["depth"]).equals(3)
+
+
+def test_build_honours_max_depth(fetched):
+    """nodes at max depth are not expanded"""
+    graph = DependencyGraph.build("pypi", "app", max_depth=1)
+
+    expect(fetched).equals(["app"])
+    expect(sorted(graph.nodes)).equals(["pypi/app", "pypi/flask", "pypi/requests"])
+
+
+def test_build_resumes_from_checkpoint(fetched, tmp_path, monkeypatch):
+    """an interrupted crawl continues from its checkpoint without refetching"""
+    checkpoint = str(tmp_path / "graph.json")
+    original = Search.project_dependencies
+
+    def interrupted(platforms, project, version=None):
+        if project == "jinja2":
+            raise KeyboardInterrupt
+        return original(platforms, project, version)
+
+    monkeypatch.setattr(Search, "project_dependencies", staticmethod(interrupted))
+    with pytest.raises(KeyboardInterrupt):
+        DependencyGraph.build("pypi", "app", max_depth=5, concurrency=1, checkpoint=checkpoint)
+
+    monkeypatch.setattr(Search, "project_dependencies", staticmethod(original))
+    done_before = len(fetched)
+    graph = DependencyGraph.build("pypi", "app", max_depth=5, concurrency=1, checkpoint=checkpoint)
+
+    expect(fetched[:done_before]).not_to_contain("jinja2")
+    expect(fetched[done_before:]).not_to_contain("app")
+    expect(json.load(open(checkpoint))["edges"]).equals(graph.to_dict()["edges"])
+    expect(len(graph.edges)).equals(8)
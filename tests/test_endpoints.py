@@ -0,0 +1,50 @@
+"""Tests for the `pybraries` endpoint registry."""
+import pytest
+from pyexpect import expect
+
+from pybraries.endpoints import ENDPOINTS
+from pybraries.remote_sess import LibIOSession
+
+
+@pytest.fixture
+def api_url(monkeypatch):
+    monkeypatch.setattr(LibIOSession, "_api_url", "https://libraries.io/api")
+    return "https://libraries.io/api"
+
+
+@pytest.mark.parametrize(
+    "action, args, path",
+    [
+        ("platforms", (), "platforms"),
+        ("project", ("pypi", "plotly"), "pypi/plotly"),
+        ("project_dependencies", ("pypi", "plotly", "5.6.0"), "pypi/plotly/5.6.0/dependencies"),
+        ("project_dependencies", ("pypi", "plotly"), "pypi/plotly/latest/dependencies"),
+        ("project_dependent_repositories", ("pypi", "plotly"), "pypi/plotly/dependent_repositories"),
+        ("repository_projects", ("github", "plotly", "dash"), "github/plotly/dash/projects"),
+        ("user_projects_contributions", ("github", "alice"), "github/alice/project-contributions"),
+        ("special_project_search", (), "search"),
+        ("check_subscribed", ("pypi", "plotly"), "subscriptions/pypi/plotly"),
+    ],
+)
+def test_urls(api_url, action, args, path):
+    """the urls match the libraries.io routes"""
+    expect(ENDPOINTS[action].url(args)).equals(f"{api_url}/{path}")
+
+
+def test_path_params_by_keyword(api_url):
+    """the path parameters not given positionally are taken by name"""
+    endpoint = ENDPOINTS["repository"]
+    expect(endpoint.url(("github",), {"owner": "plotly", "repo": "dash"})).equals(f"{api_url}/github/plotly/dash")
+    with pytest.raises(TypeError):
+        endpoint.url(("github", "plotly"))
+
+
+def test_params():
+    """only the accepted keyword arguments become query parameters, the filters are merged as is"""
+    params = ENDPOINTS["special_project_search"].params(
+        {"keywords": "plot", "sort": "stars", "platforms": "pypi", "filters": {"licenses": "MIT"}, "raw": True}
+    )
+    expect(params).equals({"q": "plot", "sort": "stars", "platforms": "pypi", "licenses": "MIT"})
+    expect(ENDPOINTS["project"].params({"keywords": "plot", "page": 2})).equals({"page": 2})
+    with pytest.raises(TypeError):
+        ENDPOINTS["special_project_search"].params({"sort": "stars"})
@@ -0,0 +1,120 @@
+"""Tests for the `pybraries` request errors and circuit breaker, against the fake libraries.io server."""
+from email.utils import formatdate
+
+import pytest
+from pyexpect import expect
+from requests.exceptions import ReadTimeout
+
+from pybraries.circuit_breaker import CircuitBreaker
+from pybraries.errors import CircuitOpenError, NotFoundError, RateLimitedError, RequestTimeoutError, ServerError
+from pybraries.rate_limit import TokenBucket, retry_after_seconds
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+from pybraries.search_helpers import search_api
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """the fake server, with a fresh circuit breaker"""
+    monkeypatch.setattr(LibIOSession, "_circuit_breaker", CircuitBreaker(failure_threshold=3, cooldown=30.0))
+    # the session may have been created with the default retries already
+    monkeypatch.setattr(
+        LibIOSession.get_session().get_adapter(fake.url), "max_retries", LibIOSession.get_retry_config()
+    )
+    return fake
+
+
+def test_typed_errors(fake, monkeypatch):
+    """the failed requests raise the error matching their cause"""
+    route = fake.route
+    monkeypatch.setattr(
+        fake,
+        "route",
+        lambda method, parts, query: (404, {})
+        if "missing" in parts
+        else (503, {})
+        if "down" in parts
+        else route(method, parts, query),
+    )
+
+    with pytest.raises(NotFoundError) as not_found:
+        search_api("project", "pypi", "missing", raise_errors=True)
+    expect(not_found.value.status).equals(404)
+    with pytest.raises(ServerError):
+        search_api("project", "pypi", "down", raise_errors=True)
+    expect(Search.project("pypi", "missing")).equals("")
+
+    def timeout(*args, **kwargs):
+        raise ReadTimeout("read timed out")
+
+    monkeypatch.setattr(LibIOSession.get_session(), "get", timeout)
+    with pytest.raises(RequestTimeoutError):
+        search_api("project", "pypi", "plotly", raise_errors=True)
+
+
+def test_set_retry_remounts_the_session(fake, monkeypatch):
+    """a Retry object sets the retry behaviour of the session already created"""
+    retry = LibIOSession.get_retry_config().new(total=5)
+    LibIOSession.set_retry(retry)
+
+    expect(LibIOSession.get_retry_config()).equals(retry)
+    expect(LibIOSession.get_session().get_adapter(fake.url).max_retries.total).equals(5)
+
+    monkeypatch.undo()
+    LibIOSession.set_retry(LibIOSession.get_retry_config())
+
+
+def test_rate_limited_honours_retry_after(fake, monkeypatch):
+    """a 429 raises its Retry-After and holds off the rate limiter for that long"""
+    limiter = TokenBucket(rate=100, per=1.0)
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", limiter)
+    fake.rate_limited_rate = 1.0
+
+    with pytest.raises(RateLimitedError) as rate_limited:
+        search_api("project", "pypi", "plotly", raise_errors=True)
+
+    expect(rate_limited.value.retry_after).equals(1.0)
+    expect(limiter.reserve()).is_greater_or_equal_than(0.99)
+    expect(retry_after_seconds({"Retry-After": formatdate(usegmt=True)})).is_less_or_equal_than(1.0)
+    expect(retry_after_seconds({"Retry-After": "soon"})).is_none()
+
+
+def test_circuit_opens_per_endpoint(fake, monkeypatch):
+    """an endpoint that keeps failing is failed fast for the cooldown, the others are not affected"""
+    clock = FakeClock()
+    LibIOSession.get_circuit_breaker().clock = clock
+    route = fake.route
+    broken = {"dependencies"}
+    monkeypatch.setattr(
+        fake, "route", lambda method, parts, query: (500, {}) if broken & set(parts) else route(method, parts, query)
+    )
+
+    for _ in range(3):
+        with pytest.raises(ServerError):
+            search_api("project_dependencies", "pypi", "plotly", raise_errors=True)
+    served = fake.requests_served
+    with pytest.raises(CircuitOpenError) as circuit_open:
+        search_api("project_dependencies", "pypi", "plotly", raise_errors=True)
+    expect(circuit_open.value.retry_after).equals(30.0)
+    expect(fake.requests_served).equals(served)
+    expect(Search.project("pypi", "plotly")["name"]).equals("plotly")
+
+    # after the cooldown a single trial request goes through, its failure reopens the circuit
+    clock.now += 30.0
+    expect(LibIOSession.get_circuit_breaker().state("project_dependencies")).equals("half-open")
+    with pytest.raises(ServerError):
+        search_api("project_dependencies", "pypi", "plotly", raise_errors=True)
+    expect(LibIOSession.get_circuit_breaker().state("project_dependencies")).equals("open")
+
+    clock.now += 30.0
+    broken.clear()
+    expect(search_api("project_dependencies", "pypi", "plotly", raise_errors=True)).to_include("dependencies")
+    expect(LibIOSession.get_circuit_breaker().state("project_dependencies")).equals("closed")
@@ -0,0 +1,87 @@
+"""Tests for the `pybraries` streaming exporters, against the fake libraries.io server."""
+import csv
+import json
+
+import pytest
+from pyexpect import expect
+
+from pybraries.export import columns_for, export, export_search
+from pybraries.models import Project
+
+
+def test_export_search_to_jsonl(fake, tmp_path):
+    """every result of every page is written with all of its fields"""
+    path = str(tmp_path / "dependents.jsonl")
+
+    expect(export_search("project_dependents", path, "pypi", "requests")).equals(250)
+
+    with open(path, encoding="utf8") as handle:
+        records = [json.loads(line) for line in handle]
+    expect(len(records)).equals(250)
+    expect(len({record["name"] for record in records})).equals(250)
+    expect(records[0]["versions"][0]).to_include("number")
+    expect(fake.requests_served).equals(3)
+
+
+def test_export_search_to_csv(fake, tmp_path):
+    """the columns are the fields of the model of the action, lists are written as JSON"""
+    path = str(tmp_path / "search.csv")
+
+    expect(export_search("project_search", path, keywords="plot", per_page=50)).equals(250)
+
+    with open(path, encoding="utf8", newline="") as handle:
+        rows = list(csv.reader(handle))
+    expect(rows[0]).equals(list(Project.__slots__))
+    expect(len(rows)).equals(251)
+    row = dict(zip(rows[0], rows[1]))
+    expect(json.loads(row["keywords"])).equals(["fake"])
+    expect(row["homepage"]).to_include("https://")
+    expect(row["dependencies"]).equals("")
+
+
+def test_export_models_and_unmodelled_records(tmp_path):
+    """models are exported by their fields, the columns of plain records come from the first one"""
+    path = str(tmp_path / "models.csv")
+    project = Project.from_dict({"name": "plotly", "platform": "pypi", "versions": [{"number": "1.0"}]})
+    expect(export([project], path)).equals(1)
+    with open(path, encoding="utf8", newline="") as handle:
+        row = list(csv.DictReader(handle))[0]
+    expect(json.loads(row["versions"])[0]["number"]).equals("1.0")
+
+    path = str(tmp_path / "platforms.csv")
+    expect(export([{"name": "PyPI", "project_count": 10}, {"name": "NPM", "extra": 1}], path)).equals(2)
+    with open(path, encoding="utf8", newline="") as handle:
+        expect(list(csv.reader(handle))).equals([["name", "project_count"], ["PyPI", "10"], ["NPM", ""]])
+    expect(columns_for("platforms")).is_none()
+
+
+def test_export_search_to_parquet_row_groups(fake, tmp_path):
+    """the Parquet file is written in row groups with typed columns"""
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "repositories.parquet")
+
+    expect(export_search("user_repositories", path, "github", "alice", row_group_size=100)).equals(250)
+
+    metadata = parquet.ParquetFile(path).metadata
+    expect(metadata.num_rows).equals(250)
+    expect(metadata.num_row_groups).equals(3)
+    schema = parquet.read_schema(path)
+    expect(str(schema.field("stargazers_count").type)).equals("int64")
+    expect(str(schema.field("fork").type)).equals("bool")
+    expect(str(schema.field("dependencies").type)).equals("string")
+
+
+def test_parquet_types_skip_the_leading_nulls(tmp_path):
+    """the columns that are not modelled get the type of their first non-null value"""
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "scores.parquet")
+    records = [{"name": "a", "score": None, "downloads": None}] + [
+        {"name": f"p-{i}", "score": i / 2, "downloads": i} for i in range(5)
+    ]
+
+    expect(export(records, path, row_group_size=4)).equals(6)
+
+    table = parquet.read_table(path)
+    expect(str(table.schema.field("score").type)).equals("double")
+    expect(str(table.schema.field("downloads").type)).equals("int64")
+    expect(table.column("downloads").to_pylist()).equals([None, 0, 1, 2, 3, 4])
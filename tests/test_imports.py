@@ -0,0 +1,40 @@
+"""Tests for the lazy imports of `pybraries`, run in fresh interpreters."""
+import subprocess
+import sys
+
+from pyexpect import expect
+
+HEAVY_MODULES = ("requests", "urllib3", "aiohttp")
+
+
+def loaded_after(code: str) -> list:
+    """runs the code in a fresh interpreter and returns the heavy modules it imported"""
+    probe = f"{code}\nimport sys\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, check=True, text=True).stdout
+    return out.split()
+
+
+def test_import_does_not_load_http_stack():
+    """importing the package or a client class does not import the HTTP libraries"""
+    expect(loaded_after("import pybraries")).equals([])
+    expect(loaded_after("from pybraries import Search, Subscribe, LibIOSession")).equals([])
+
+
+def test_http_stack_loaded_on_first_request():
+    """the HTTP stack is imported once the session is needed, aiohttp only by the async client"""
+    expect(loaded_after("from pybraries import LibIOSession\nLibIOSession.get_session()")).equals(
+        ["requests", "urllib3"]
+    )
+    expect(loaded_after("from pybraries import AsyncSearch")).to_include("aiohttp")
+
+
+def test_lazy_attributes():
+    """the public names resolve to their definitions, whatever the import order"""
+    import pybraries  # pylint: disable=import-outside-toplevel
+    from pybraries.search import Search  # pylint: disable=import-outside-toplevel
+
+    expect(pybraries.Search).is_(Search)
+    expect(callable(pybraries.make_request)).is_true()
+    expect(set(pybraries.__all__) <= set(dir(pybraries))).is_true()
+    for name in pybraries.__all__:
+        expect(hasattr(pybraries, name)).is_true()
@@ -0,0 +1,117 @@
+"""Tests for the `pybraries` API key pool, against the fake libraries.io server."""
+import socket
+
+import pytest
+from pyexpect import expect
+
+from pybraries.errors import ConnectionFailedError, RateLimitedError
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+from pybraries.search_helpers import search_api
+from pybraries.subscribe import Subscribe
+
+KEYS = ["secret-key-a", "secret-key-b", "secret-key-c"]
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """the fake server, recording the key of every request"""
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", None)
+    monkeypatch.setattr(LibIOSession, "_key_pool", None)
+    route = fake.route
+    fake.keys_used = []
+
+    def recording_route(method, parts, query):
+        fake.keys_used.append(query["api_key"][0])
+        return route(method, parts, query)
+
+    monkeypatch.setattr(fake, "route", recording_route)
+    return fake
+
+
+def test_requests_spread_over_the_keys(fake):
+    """every request goes to the key with the most budget left"""
+    LibIOSession.set_key_pool(KEYS, rate=2, per=60.0)
+
+    names = [Search.project("pypi", f"pkg-{i}")["name"] for i in range(6)]
+
+    expect(names).equals([f"pkg-{i}" for i in range(6)])
+    expect(sorted(fake.keys_used)).equals(sorted(KEYS * 2))
+    expect(max(LibIOSession.get_key_pool().stats().values())).is_less_than(0.1)
+    expect(LibIOSession.get_key_pool().keys).equals(tuple(KEYS))
+    expect(LibIOSession.get_key_pool().settings()["rate"]).equals(2)
+
+
+def test_rate_limited_key_cools_down(fake, monkeypatch):
+    """a key answered with a 429 rests, the other keys take its requests"""
+    LibIOSession.set_key_pool(KEYS[:2], rate=100, per=60.0, cooldown=30.0)
+    route = fake.route
+    monkeypatch.setattr(
+        fake,
+        "route",
+        lambda method, parts, query: (429, {}) if query["api_key"][0] == KEYS[0] else route(method, parts, query),
+    )
+
+    with pytest.raises(RateLimitedError):
+        search_api("project", "pypi", "pkg-0", raise_errors=True)
+    fake.keys_used.clear()
+    for i in range(1, 5):
+        expect(Search.project("pypi", f"pkg-{i}")["name"]).equals(f"pkg-{i}")
+
+    expect(fake.keys_used).equals([KEYS[1]] * 4)
+    expect(LibIOSession.get_key_pool().stats()["key-0"]).is_less_than(0)
+
+
+def test_keys_stay_out_of_caches_logs_and_metrics(fake, capsys):
+    """the keys are only sent to libraries.io"""
+    LibIOSession.set_key_pool(KEYS, rate=100, per=60.0)
+    LibIOSession.set_cache()
+    events = []
+    LibIOSession.add_hook(events.append)
+    try:
+        Search.project("pypi", "plotly")
+        Search.project("pypi", "plotly")
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        LibIOSession.set_api_url(f"http://127.0.0.1:{closed_port}/api")
+        Search.project("pypi", "plotly-unreachable")
+        with pytest.raises(ConnectionFailedError) as failed:
+            search_api("project", "pypi", "plotly-unreachable", raise_errors=True)
+    finally:
+        LibIOSession.remove_hook(events.append)
+
+    exposed = " ".join(
+        [
+            repr(list(LibIOSession.get_cache()._entries)),  # pylint: disable=protected-access
+            repr(events),
+            LibIOSession.get_metrics().to_prometheus(),
+            repr(LibIOSession.get_key_pool()),
+            str(failed.value),
+            capsys.readouterr().out,
+        ]
+    )
+    expect(exposed).to_include("api_key=***")
+    for key in KEYS:
+        expect(exposed).not_to_contain(key)
+
+
+def test_subscriptions_stay_on_one_account(fake):
+    """the subscription requests all go to the subscription key, uncached, the other requests are spread"""
+    LibIOSession.set_key_pool(KEYS[:2], rate=100, per=60.0, subscription_key=KEYS[1])
+    LibIOSession.set_cache()
+
+    Subscribe.subscribe("pypi", "pandas")
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_true()
+    expect(len(Subscribe.list_subscribed())).equals(1)
+    expect(Subscribe.unsubscribe("pypi", "pandas")).equals("Successfully Unsubscribed")
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_false()
+    expect(fake.keys_used).equals([KEYS[1]] * 5)
+
+    # the budget spent on the subscriptions sends the other requests to the other key
+    fake.keys_used.clear()
+    for i in range(4):
+        Search.project("pypi", f"pkg-{i}")
+    expect(fake.keys_used).equals([KEYS[0]] * 4)
+    expect(LibIOSession.get_key_pool().settings()["subscription_key"]).equals(KEYS[1])
@@ -0,0 +1,85 @@
+"""Tests for the request path of `pybraries`, using a fake session transport."""
+import json
+import time
+
+import pytest
+from pyexpect import expect
+
+from pybraries.helpers import sess
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+class EchoResponse:
+    """a response that echoes the url and the parameters of the request"""
+
+    def __init__(self, url, params):
+        self.url = url
+        self.params = params
+        self.headers = {}
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def content(self):
+        return json.dumps({"url": self.url, "params": self.params}).encode()
+
+
+@pytest.fixture
+def echo_sess(monkeypatch):
+    """patches the shared session to echo back the requests made"""
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        time.sleep(0.01)  # give the other threads a chance to interleave
+        return EchoResponse(url, {**sess.params, **params})
+
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    monkeypatch.setattr(sess, "params", {"api_key": "test-key"})
+    monkeypatch.setattr(sess, "get", fake_get)
+    yield sess
+
+
+def test_params_are_per_call(echo_sess):
+    """query parameters are passed per call and never stored in the session"""
+    resp = Search.project_search(keywords="visualization", platforms="Pypi", sort="stars", per_page=50)
+
+    expect(resp["params"]["q"]).equals("visualization")
+    expect(resp["params"]["per_page"]).equals(50)
+    expect(resp["params"]["api_key"]).equals("test-key")
+    expect(echo_sess.params).equals({"api_key": "test-key"})
+
+
+def test_map_keeps_queries_apart(echo_sess):
+    """concurrent searches do not corrupt each other's parameters"""
+    keywords = [f"keyword-{i}" for i in range(32)]
+    responses = Search.map("project_search", [{"keywords": k, "page": i + 1} for i, k in enumerate(keywords)])
+
+    expect([r["params"]["q"] for r in responses]).equals(keywords)
+    expect([r["params"]["page"] for r in responses]).equals(list(range(1, 33)))
+
+
+def test_map_positional_args(echo_sess):
+    """map accepts tuples of positional arguments and callables"""
+    responses = Search.map(Search.project, [("pypi", "plotly"), ("npm", "react")], workers=2)
+
+    expect(responses[0]["url"]).equals("https://libraries.io/api/pypi/plotly")
+    expect(responses[1]["url"]).equals("https://libraries.io/api/npm/react")
+
+
+def test_raw_returns_body_bytes(echo_sess):
+    """raw mode skips decoding altogether"""
+    resp = Search.project("pypi", "plotly", raw=True)
+
+    expect(type(resp)).equals(bytes)
+    expect(json.loads(resp)["url"]).equals("https://libraries.io/api/pypi/plotly")
+
+
+def test_custom_decoder(echo_sess, monkeypatch):
+    """the session decoder is used for every response"""
+    monkeypatch.setattr(LibIOSession, "_decoder", LibIOSession._decoder)
+    LibIOSession.set_decoder(lambda body: {"size": len(body)})
+
+    expect(Search.project("pypi", "plotly")["size"]).is_greater_than(0)
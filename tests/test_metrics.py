@@ -0,0 +1,95 @@
+"""Tests for the `pybraries` request instrumentation hooks and metrics."""
+import pytest
+from pyexpect import expect
+
+from pybraries.metrics import RequestEvent, RequestMetrics
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """the fake server, collecting the events of its requests in fresh metrics"""
+    monkeypatch.setattr(LibIOSession, "_metrics", RequestMetrics())
+    monkeypatch.setattr(LibIOSession, "_hooks", [])
+    fake.events = []
+    LibIOSession.add_hook(fake.events.append)
+    return fake
+
+
+def test_snapshot_percentiles():
+    """the snapshot reports the counters and the latency percentiles of each endpoint"""
+    metrics = RequestMetrics(window=100)
+    for i in range(100):
+        event = RequestEvent("project", "get")
+        event.network_time = (i + 1) / 1000
+        event.bytes = 10
+        event.error = "boom" if i % 10 == 0 else None
+        metrics.record(event)
+
+    stats = metrics.snapshot()["project"]
+    expect(stats["count"]).equals(100)
+    expect(stats["errors"]).equals(10)
+    expect(stats["bytes"]).equals(1000)
+    expect(stats["p50"]).equals(0.051)
+    expect(stats["p95"]).equals(0.096)
+    expect(stats["p99"]).equals(0.1)
+
+
+def test_prometheus_families_are_contiguous():
+    """every metric family follows its own TYPE line, the summary has its sum and count"""
+    metrics = RequestMetrics()
+    for endpoint in ("project", "user"):
+        for _ in range(2):
+            event = RequestEvent(endpoint, "get")
+            event.network_time = 0.25
+            metrics.record(event)
+
+    families = []
+    for line in metrics.to_prometheus().splitlines():
+        if line.startswith("# TYPE "):
+            families.append(line.split()[2])
+        else:
+            expect(line.split("{")[0] in (families[-1], f"{families[-1]}_sum", f"{families[-1]}_count")).is_true()
+    expect(len(families)).equals(len(set(families)))
+    text = metrics.to_prometheus()
+    expect(text).to_include('pybraries_request_seconds_sum{endpoint="user"} 0.5')
+    expect(text).to_include('pybraries_request_seconds_count{endpoint="user"} 2')
+
+
+def test_hook_receives_request_event(fake):
+    """every request reports its endpoint, status, size and timings"""
+    Search.project("pypi", "flask")
+
+    expect(len(fake.events)).equals(1)
+    event = fake.events[0]
+    expect(event.endpoint).equals("project")
+    expect(event.method).equals("get")
+    expect(event.status).equals(200)
+    expect(event.attempts).equals(1)
+    expect(event.bytes > 0).is_true()
+    expect(event.network_time > 0).is_true()
+    expect(event.error).is_none()
+
+
+def test_errors_and_cache_hits_are_counted(fake, monkeypatch):
+    """failed requests and cache hits show up in the metrics and the Prometheus text"""
+    LibIOSession.set_cache()
+    try:
+        Search.project("pypi", "flask")
+        Search.project("pypi", "flask")
+    finally:
+        LibIOSession.set_cache(None)
+    monkeypatch.setattr(fake, "route", lambda *args: (404, {"error": "Not found"}))
+    Search.user("github", "andylamp")
+
+    events = fake.events
+    expect([event.cache for event in events]).equals(["miss", "hit", None])
+    expect(events[-1].status).equals(404)
+    expect(events[-1].error).to_include("404")
+
+    metrics = LibIOSession.get_metrics()
+    expect(metrics.snapshot()["project"]["cache_hits"]).equals(1)
+    text = metrics.to_prometheus()
+    expect(text).to_include('pybraries_requests_total{endpoint="project"} 2')
+    expect(text).to_include('pybraries_request_errors_total{endpoint="user"} 1')
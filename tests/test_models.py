@@ -0,0 +1,56 @@
+"""Tests for the `pybraries` typed result models."""
+import json
+
+from pyexpect import expect
+
+from pybraries.models import Project, Repository, User, to_models
+
+
+def project_payload(name):
+    # build the strings at runtime, as a decoder would, so they are distinct objects
+    return json.loads(
+        json.dumps(
+            {
+                "name": name,
+                "platform": "Pypi",
+                "language": "Python",
+                "normalized_licenses": ["MIT"],
+                "stars": 10,
+                "versions": [{"number": "1.0.0", "published_at": "2022-01-01T00:00:00.000Z"}],
+                "not_modelled": "dropped",
+            }
+        )
+    )
+
+
+def test_project_from_dict():
+    """fields and nested versions are mapped to the model"""
+    project = Project.from_dict(project_payload("plotly"))
+
+    expect(project.name).equals("plotly")
+    expect(project.stars).equals(10)
+    expect(project.versions[0].number).equals("1.0.0")
+    expect(project.normalized_licenses).equals(("MIT",))
+    expect(project.to_dict()).not_to_include("not_modelled")
+
+
+def test_categorical_strings_are_interned():
+    """the repeated categorical strings of different models are the same object"""
+    first = Project.from_dict(project_payload("plotly"))
+    second = Project.from_dict(project_payload("dash"))
+
+    expect(first.platform is second.platform).equals(True)
+    expect(first.normalized_licenses[0] is second.normalized_licenses[0]).equals(True)
+
+
+def test_models_are_slotted():
+    """models carry no per instance dict"""
+    expect(hasattr(Project.from_dict({}), "__dict__")).equals(False)
+
+
+def test_to_models_per_action():
+    """the response shape picks a model, a list or the response unchanged"""
+    expect(type(to_models("user", {"login": "discdiver"}))).equals(User)
+    expect(type(to_models("user_repositories", [{"full_name": "a/b"}])[0])).equals(Repository)
+    expect(to_models("project_sourcerank", {"basic_info_present": 1})).equals({"basic_info_present": 1})
+    expect(to_models("project", "")).equals("")
@@ -1,64 +1,201 @@
 """ test_pagination.py miscellaneous tests '"""
+import json
+import random
+import threading
+import time
+
 import pytest
 
 from pybraries import fix_pages
 from pybraries.helpers import clear_params, sess
+from pybraries.pagination import fetch_pages, paginate
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
 
 
 @pytest.fixture
-def clear_sess_params():
-    clear_params()
-    yield
+def params():
+    return {}
 
 
-def test_set_valid_per_pages(clear_sess_params):
+def test_set_valid_per_pages(params):
     """call to fix_pages returns true for valid ranges"""
 
-    assert fix_pages(per_page=15)
-    assert sess.params["per_page"] == 15
-    assert sess.params["page"] == 1
+    assert fix_pages(per_page=15, params=params)
+    assert params["per_page"] == 15
+    assert params["page"] == 1
 
 
-def test_set_per_pages_big_value(clear_sess_params):
+def test_set_per_pages_big_value(params):
     """fix_pages returns false for large per_page argument"""
-    clear_params()
 
-    assert not fix_pages(per_page=101)
-    assert sess.params["per_page"] == 100
-    assert sess.params["page"] == 1
+    assert not fix_pages(per_page=101, params=params)
+    assert params["per_page"] == 100
+    assert params["page"] == 1
 
 
-def test_set_per_pages_small_value(clear_sess_params):
+def test_set_per_pages_small_value(params):
     """fix_pages returns false for small per_page argument"""
-    clear_params()
 
-    assert not fix_pages(per_page=0)
-    assert sess.params["per_page"] == 1
-    assert sess.params["page"] == 1
+    assert not fix_pages(per_page=0, params=params)
+    assert params["per_page"] == 1
+    assert params["page"] == 1
 
 
-def test_set_valid_page(clear_sess_params):
+def test_set_valid_page(params):
     """call to fix_pages returns a string"""
-    clear_params()
 
-    assert fix_pages(page=1)
-    assert sess.params["per_page"] == 30
-    assert sess.params["page"] == 1
+    assert fix_pages(page=1, params=params)
+    assert params["per_page"] == 30
+    assert params["page"] == 1
 
 
-def test_set_pages_small_value(clear_sess_params):
+def test_set_pages_small_value(params):
     """fix_pages returns false for large page argument"""
-    clear_params()
 
-    assert not fix_pages(page=0)
-    assert sess.params["per_page"] == 30
-    assert sess.params["page"] == 1
+    assert not fix_pages(page=0, params=params)
+    assert params["per_page"] == 30
+    assert params["page"] == 1
 
 
-def test_set_pages_big_value(clear_sess_params):
+def test_set_pages_big_value(params):
     """fix_pages returns false for large page argument"""
+
+    assert fix_pages(page=1000, params=params)
+    assert params["per_page"] == 30
+    assert params["page"] == 1000
+
+
+def test_existing_params_are_kept():
+    """fix_pages uses the values already present in the params"""
+    params = {"page": 3, "per_page": 500}
+
+    assert not fix_pages(params=params)
+    assert params["per_page"] == 100
+    assert params["page"] == 3
+
+
+def test_session_params_by_default():
+    """without params, fix_pages fixes the shared session params"""
+    clear_params()
+
+    assert not fix_pages(per_page=101)
+    assert sess.params["per_page"] == 100
+    assert sess.params["page"] == 1
     clear_params()
 
-    assert fix_pages(page=1000)
-    assert sess.params["per_page"] == 30
-    assert sess.params["page"] == 1000
+
+def test_paginate_stops_on_short_page():
+    """paginate yields every item and stops after the first short page"""
+    pages = {1: [1, 2, 3], 2: [4, 5, 6], 3: [7]}
+    fetched = []
+
+    def fetch_page(page, per_page):
+        fetched.append((page, per_page))
+        return pages.get(page, [])
+
+    assert list(paginate(fetch_page, per_page=3)) == [1, 2, 3, 4, 5, 6, 7]
+    assert fetched == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_paginate_prefetches_one_page_ahead():
+    """while a page is consumed only the next one is fetched"""
+    fetched = []
+    fetched_next = threading.Event()
+
+    def fetch_page(page, per_page):
+        fetched.append(page)
+        if page == 2:
+            fetched_next.set()
+        return list(range(per_page))
+
+    items = paginate(fetch_page, per_page=2)
+    next(items)
+    assert fetched_next.wait(1)
+    assert fetched == [1, 2]
+
+
+def test_paginate_stops_on_error():
+    """a failed request, reported as an empty string, ends the iteration"""
+    assert list(paginate(lambda page, per_page: "", per_page=2)) == []
+
+
+def test_iter_project_dependents(monkeypatch):
+    """the search iterators walk the pages of the endpoint"""
+
+    class PageResponse:
+        headers = {}
+        status_code = 200
+
+        def __init__(self, params):
+            self.params = params
+
+        def raise_for_status(self):
+            pass
+
+        @property
+        def content(self):
+            start = (self.params["page"] - 1) * self.params["per_page"]
+            items = [{"name": f"dependent-{i}"} for i in range(start, min(start + self.params["per_page"], 250))]
+            return json.dumps(items).encode()
+
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    monkeypatch.setattr(sess, "get", lambda url, params=None, headers=None, timeout=None: PageResponse(params))
+
+    names = [project["name"] for project in Search.iter_project_dependents("pypi", "numpy")]
+    assert names == [f"dependent-{i}" for i in range(250)]
+
+
+def ranked_pages(total, shift_after=None):
+    """fetches the pages of a ranking, optionally shifting it by one item once some pages were served"""
+    served = []
+
+    def fetch_page(page, per_page):
+        time.sleep(random.random() / 100)  # let the pages complete out of order
+        served.append(page)
+        offset = -1 if shift_after is not None and len(served) > shift_after else 0
+        start = max((page - 1) * per_page + offset, 0)
+        return [{"platform": "Pypi", "name": f"item-{i}"} for i in range(start, min(start + per_page, total))]
+
+    return fetch_page, served
+
+
+def test_fetch_pages_in_order():
+    """the pages are fetched concurrently and reassembled in order"""
+    fetch_page, served = ranked_pages(1000)
+    items = fetch_pages(fetch_page, limit=450)
+
+    assert [item["name"] for item in items] == [f"item-{i}" for i in range(450)]
+    assert sorted(served) == [1, 2, 3, 4, 5]
+
+
+def test_fetch_pages_drops_duplicates_and_refills():
+    """items repeated by a shifting ranking are dropped and made up for from the next page"""
+    fetch_page, served = ranked_pages(1000, shift_after=1)
+    items = fetch_pages(fetch_page, limit=300, concurrency=1)
+
+    assert [item["name"] for item in items] == [f"item-{i}" for i in range(300)]
+    assert served == [1, 2, 3, 4]
+
+
+def test_fetch_pages_stops_at_the_end():
+    """a short page ends the fetch, small limits use small pages"""
+    fetch_page, served = ranked_pages(120)
+    assert len(fetch_pages(fetch_page, limit=1000)) == 120
+
+    fetch_page, served = ranked_pages(120)
+    assert len(fetch_pages(fetch_page, limit=10)) == 10
+    assert served == [1]
+
+
+def test_search_limit(fake):
+    """limit=N returns the first N results of a list endpoint"""
+    dependents = Search.project_dependents("pypi", "flask", limit=230, as_models=True)
+    hits = Search.project_search(keywords="plot", limit=1000)
+
+    assert [project.name for project in dependents] == [f"flask-dependent-{i}" for i in range(230)]
+    assert len(hits) == 250
+    assert 3 + 3 <= fake.requests_served <= 3 + 8  # a window of pages at most, beyond the last one
+    with pytest.raises(ValueError):
+        Search.user_repositories("github", "andylamp", raw=True, limit=10)
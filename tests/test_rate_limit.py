@@ -0,0 +1,77 @@
+"""Tests for the `pybraries` client side rate limiting."""
+import pytest
+from pyexpect import expect
+
+from pybraries.helpers import sess
+from pybraries.rate_limit import FileTokenBucket, TokenBucket
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+class HeaderResponse:
+    """a response carrying only rate limit headers"""
+
+    headers = {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "3"}
+    content = b"{}"
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+def test_bucket_allows_burst_then_delays():
+    """the bucket hands out its capacity at once and then spaces the requests"""
+    bucket = TokenBucket(rate=10, per=1.0, capacity=2)
+
+    expect(bucket.reserve()).equals(0.0)
+    expect(bucket.reserve()).equals(0.0)
+    expect(bucket.reserve()).is_greater_than(0.05)
+
+
+def test_bucket_follows_remaining_header():
+    """the remaining header lowers the token estimate"""
+    bucket = TokenBucket(rate=60, per=60.0)
+    bucket.update_from_headers({"X-RateLimit-Remaining": "5", "X-RateLimit-Limit": "30"})
+
+    expect(bucket.available()).is_less_or_equal_than(5.01)
+    expect(bucket.capacity).equals(30)
+
+
+def test_bucket_ignores_bad_headers():
+    """malformed headers leave the estimate untouched"""
+    bucket = TokenBucket(rate=60, per=60.0)
+    bucket.update_from_headers({"X-RateLimit-Remaining": "lots"})
+
+    expect(bucket.available()).is_greater_than(59)
+
+
+def test_file_buckets_share_budget(tmp_path):
+    """two buckets on the same file, as in two processes, share a single budget"""
+    lock_file = str(tmp_path / "budget.json")
+    first = FileTokenBucket(lock_file, rate=1, per=60.0, capacity=2)
+    second = FileTokenBucket(lock_file, rate=1, per=60.0, capacity=2)
+
+    expect(first.reserve()).equals(0.0)
+    expect(second.reserve()).equals(0.0)
+    expect(first.reserve()).is_greater_than(30)
+
+
+def test_make_request_passes_the_bucket(monkeypatch):
+    """every request spends a token and refreshes the estimate from the headers"""
+    bucket = TokenBucket(rate=60, per=60.0)
+    monkeypatch.setattr(LibIOSession, "_LIBRARIES_API_KEY", "test-key")
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", bucket)
+    monkeypatch.setattr(sess, "get", lambda url, params=None, headers=None, timeout=None: HeaderResponse())
+
+    Search.project("pypi", "plotly")
+
+    expect(bucket.available()).is_less_than(3.01)
+
+
+@pytest.mark.parametrize("rate, lock_file, kind", [(None, None, type(None)), (30, None, TokenBucket)])
+def test_set_rate_limit(monkeypatch, rate, lock_file, kind):
+    """the session rate limit can be replaced or disabled"""
+    monkeypatch.setattr(LibIOSession, "_rate_limiter", None)
+    LibIOSession.set_rate_limit(rate, lock_file=lock_file)
+
+    expect(type(LibIOSession.get_rate_limiter())).equals(kind)
@@ -0,0 +1,99 @@
+"""Tests for the `pybraries` incremental release watcher."""
+from pyexpect import expect
+
+from pybraries.release_watcher import ReleaseWatcher
+
+DAY = 24 * 3600.0
+
+
+class Clock:
+    """a manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1_650_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def project(versions, gap_days):
+    """a project response with the given number of versions, released every gap_days"""
+    return {
+        "latest_release_number": f"1.{versions - 1}.0",
+        "latest_release_published_at": f"2022-01-{versions * gap_days:02d}T00:00:00.000Z",
+        "versions": [
+            {"number": f"1.{v}.0", "published_at": f"2022-01-{(v + 1) * gap_days:02d}T00:00:00.000Z"}
+            for v in range(versions)
+        ],
+    }
+
+
+def test_only_new_releases_are_events():
+    """the first fetch and unchanged projects produce no events, new versions do"""
+    clock = Clock()
+    watcher = ReleaseWatcher([("pypi", "plotly")], min_interval=60, clock=clock)
+
+    expect(watcher.update("pypi/plotly", project(3, 2))).is_none()
+    expect(watcher.update("pypi/plotly", project(3, 2))).is_none()
+    event = watcher.update("pypi/plotly", project(5, 2))
+
+    expect(event.previous).equals("1.2.0")
+    expect(event.latest).equals("1.4.0")
+    expect(event.new_versions).equals(["1.3.0", "1.4.0"])
+    expect(watcher.fingerprints["pypi/plotly"].versions).equals(5)
+
+
+def test_unknown_previous_date_reports_the_latest_only():
+    """a release after an undated one reports the latest version, not every version of the project"""
+    watcher = ReleaseWatcher([("pypi", "plotly")], min_interval=60, clock=Clock())
+    undated = project(3, 2)
+    undated["latest_release_published_at"] = None
+
+    expect(watcher.update("pypi/plotly", undated)).is_none()
+    event = watcher.update("pypi/plotly", project(9, 2))
+
+    expect(event.previous).equals("1.2.0")
+    expect(event.new_versions).equals(["1.8.0"])
+
+
+def test_active_projects_are_checked_first():
+    """projects releasing often are due sooner, failed fetches are retried soon"""
+    clock = Clock()
+    watcher = ReleaseWatcher(
+        [("pypi", "active"), ("pypi", "dormant"), ("pypi", "broken")],
+        min_interval=60,
+        max_interval=30 * DAY,
+        clock=clock,
+    )
+    expect(watcher.due()).equals(["pypi/active", "pypi/broken", "pypi/dormant"])
+    watcher.update("pypi/active", project(10, 1))
+    watcher.update("pypi/dormant", project(2, 14))
+    watcher.update("pypi/broken", "")
+
+    expect(watcher.fingerprints["pypi/active"].interval).equals(DAY / 4)
+    expect(watcher.fingerprints["pypi/dormant"].interval).equals(14 * DAY / 4)
+    clock.now += 60
+    expect(watcher.due()).equals(["pypi/broken"])
+    clock.now += DAY
+    expect(watcher.due()).equals(["pypi/active"])
+    clock.now += 30 * DAY
+    expect(watcher.due(budget=1)).equals(["pypi/dormant"])
+
+
+def test_poll_within_budget_and_resume(fake, tmp_path):
+    """a poll checks at most the budget, the schedule survives a save and load"""
+    clock = Clock()
+    watcher = ReleaseWatcher([("pypi", f"pkg-{i}") for i in range(10)], clock=clock)
+
+    expect(watcher.poll(budget=4)).equals([])
+    expect(fake.requests_served).equals(4)
+    expect(watcher.poll()).equals([])
+    expect(fake.requests_served).equals(10)
+    expect(watcher.poll()).equals([])
+    expect(fake.requests_served).equals(10)
+
+    path = str(tmp_path / "watcher.json")
+    watcher.save(path)
+    restored = ReleaseWatcher.load(path, clock=clock)
+    expect(restored.fingerprints["pypi/pkg-3"].to_dict()).equals(watcher.fingerprints["pypi/pkg-3"].to_dict())
+    expect(restored.due()).equals([])
@@ -0,0 +1,87 @@
+"""Tests for the `pybraries` coalescing of the identical requests in flight, against the fake libraries.io server."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pyexpect import expect
+
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+
+
+@pytest.fixture
+def fake(fake, monkeypatch):
+    """a slow fake server, so that concurrent requests overlap"""
+    monkeypatch.setattr(LibIOSession, "_single_flight", LibIOSession.get_single_flight())
+    fake.latency = 0.2
+    return fake
+
+
+def call_together(func, callers=16):
+    """calls func from many threads at once"""
+    barrier = threading.Barrier(callers)
+
+    def call(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(callers) as pool:
+        return list(pool.map(call, range(callers)))
+
+
+def test_threads_share_one_request(fake):
+    """identical requests in flight share a single request and its decoded result"""
+    events = []
+    LibIOSession.add_hook(events.append)
+    try:
+        results = call_together(lambda: Search.project("pypi", "requests"))
+    finally:
+        LibIOSession.remove_hook(events.append)
+
+    expect(fake.requests_served).equals(1)
+    expect(results[0]["name"]).equals("requests")
+    expect(all(result is results[0] for result in results)).is_true()
+    expect(sorted(str(event.cache) for event in events)).equals(["None"] + ["coalesced"] * 15)
+
+
+def test_threads_share_errors_and_distinct_requests_are_sent(fake, monkeypatch):
+    """the error of a shared request reaches every caller, different requests are not coalesced"""
+    route = fake.route
+    monkeypatch.setattr(
+        fake, "route", lambda method, parts, query: (404, {}) if "missing" in parts else route(method, parts, query)
+    )
+    expect(call_together(lambda: Search.project("pypi", "missing"))).equals([""] * 16)
+    expect(fake.requests_served).equals(1)
+
+    names = iter(range(16))
+    lock = threading.Lock()
+
+    def distinct():
+        with lock:
+            name = f"pkg-{next(names)}"
+        return Search.project("pypi", name)["name"]
+
+    expect(sorted(call_together(distinct))).equals(sorted(f"pkg-{i}" for i in range(16)))
+    expect(fake.requests_served).equals(17)
+
+
+def test_coalescing_can_be_disabled(fake):
+    """every call sends its own request once coalescing is disabled"""
+    LibIOSession.set_coalescing(False)
+    call_together(lambda: Search.project("pypi", "requests"), callers=4)
+    expect(fake.requests_served).equals(4)
+
+
+def test_coroutines_share_one_request(fake):
+    """identical requests of concurrent coroutines share a single request"""
+    async_client = pytest.importorskip("pybraries.async_client")
+
+    async def scenario():
+        async with async_client.AsyncSearch() as search:
+            return await asyncio.gather(*(search.project("pypi", "requests") for _ in range(16)))
+
+    results = asyncio.run(scenario())
+
+    expect(fake.requests_served).equals(1)
+    expect([result["name"] for result in results]).equals(["requests"] * 16)
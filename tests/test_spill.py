@@ -0,0 +1,157 @@
+"""Tests for the `pybraries` disk spilling stream, against the fake libraries.io server."""
+import threading
+import time
+
+import pytest
+from pyexpect import expect
+
+from pybraries import spill
+from pybraries.errors import ServerError
+from pybraries.models import Project
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+from pybraries.spill import SpillQueue, stream_search
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    """records the queues of the streams"""
+    created = []
+
+    class RecordedQueue(SpillQueue):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(spill, "SpillQueue", RecordedQueue)
+    return created
+
+
+def test_queue_spills_the_overflow_in_order():
+    """the records over the memory cap go to disk, and come back in order"""
+    queue = SpillQueue(max_memory=10)
+    for index in range(10):
+        expect(queue.put(f"record-{index}".encode())).is_true()
+
+    expect(queue.peak_memory).is_less_or_equal_than(10)
+    expect(queue.spilled_records).equals(9)
+    expect(len(queue)).equals(10)
+    # the memory is free again but the newer records follow the spilled ones
+    expect(queue.get()).equals(b"record-0")
+    queue.put(b"late")
+    queue.finish()
+
+    expect([queue.get() for _ in range(10)]).equals([f"record-{index}".encode() for index in range(1, 10)] + [b"late"])
+    expect(queue.get()).equals(None)
+    expect(queue._write_at).equals(0)  # pylint: disable=protected-access
+
+
+def test_queue_backpressure_and_close():
+    """a full queue blocks the producer until the consumer reads or closes it"""
+    queue = SpillQueue(max_memory=4, max_spill=24)
+    expect(queue.put(b"aaaa")).is_true()
+    expect(queue.put(b"bbbb")).is_true()
+    expect(queue.put(b"cccc")).is_true()
+
+    results = []
+    producer = threading.Thread(target=lambda: results.append(queue.put(b"dddd")))
+    producer.start()
+    time.sleep(0.05)
+    expect(results).equals([])
+    expect(queue.get()).equals(b"aaaa")
+    expect(queue.get()).equals(b"bbbb")
+    producer.join(1)
+    expect(results).equals([True])
+
+    blocked = threading.Thread(target=lambda: results.append(queue.put(b"eeee" * 10) and queue.put(b"ffff")))
+    blocked.start()
+    time.sleep(0.05)
+    queue.close()
+    blocked.join(1)
+    expect(results).equals([True, False])
+
+
+def test_queue_raises_the_producer_error():
+    """the error of the producer is raised once the records before it are read"""
+    queue = SpillQueue()
+    queue.put(b"record")
+    queue.finish(ServerError("down", "url", 503))
+
+    expect(queue.get()).equals(b"record")
+    with pytest.raises(ServerError):
+        queue.get()
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 1000}], indirect=True)
+def test_stream_search_keeps_the_memory_cap(fake, queues):
+    """a slow consumer gets every item in order, the fetching does not wait for it"""
+    items = stream_search("project_dependents", "pypi", "numpy", per_page=100, max_memory=30000)
+
+    first = next(items)
+    # the pages are fetched ahead of the consumer
+    deadline = time.monotonic() + 5
+    while fake.requests_served < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    names = [first["name"]] + [item["name"] for item in items]
+
+    expect(names).equals([f"numpy-dependent-{index}" for index in range(1000)])
+    expect(fake.requests_served).is_greater_or_equal_than(11)
+    expect(queues[0].peak_memory).is_less_or_equal_than(30000)
+    expect(queues[0].spilled_records).is_greater_than(0)
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 250}], indirect=True)
+def test_stream_decodes_every_page_once(fake, monkeypatch):
+    """the pages are decoded by the consumer only, the fetching stops on the page past the last one"""
+    decoded = []
+    decode = LibIOSession.get_decoder()
+    monkeypatch.setattr(LibIOSession, "_decoder", staticmethod(lambda body: decoded.append(body) or decode(body)))
+
+    names = [item["name"] for item in stream_search("project_dependents", "pypi", "numpy", per_page=100)]
+
+    expect(len(names)).equals(250)
+    expect(len(decoded)).equals(3)
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 250}], indirect=True)
+def test_stream_stops_fetching_on_the_last_page(fake):
+    """a consumer keeping up tells the fetching about the short page, no page past it is requested"""
+    names = [
+        item["name"] for item in stream_search("project_dependents", "pypi", "numpy", per_page=100, concurrency=1)
+    ]
+
+    expect(len(names)).equals(250)
+    expect(fake.requests_served).equals(3)
+
+
+def test_stream_stops_early(fake, queues):
+    """stopping the consumer stops the fetching and drops the spilled pages"""
+    fake.total_items = 1000000
+    items = Search.stream_project_dependents("pypi", "numpy", max_memory=0, concurrency=2, as_models=True)
+
+    expect(next(items)).is_instance(Project)
+    items.close()
+    time.sleep(0.1)
+    served = fake.requests_served
+
+    expect(served).is_less_than(10000)
+    expect(len(queues[0])).equals(0)
+    time.sleep(0.1)
+    expect(fake.requests_served).equals(served)
+
+
+@pytest.mark.parametrize("fake", [{"total_items": 1000}], indirect=True)
+def test_stream_raises_failed_pages(fake, monkeypatch):
+    """a failed page raises after the items of the pages before it"""
+    route = fake.route
+    monkeypatch.setattr(
+        fake,
+        "route",
+        lambda method, parts, query: (500, {}) if query.get("page") == ["3"] else route(method, parts, query),
+    )
+
+    names = []
+    with pytest.raises(ServerError):
+        for item in stream_search("project_dependents", "pypi", "numpy", per_page=100):
+            names.append(item["name"])
+    expect(len(names)).equals(200)
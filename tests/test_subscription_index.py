@@ -0,0 +1,93 @@
+"""Tests for the `pybraries` local subscription index."""
+import asyncio
+import threading
+import time
+
+import pytest
+from pyexpect import expect
+
+from pybraries.async_client import AsyncSubscribe
+from pybraries.remote_sess import LibIOSession
+from pybraries.subscribe import Subscribe
+from pybraries.subscription_index import SubscriptionIndex
+
+
+@pytest.fixture
+def fake(fake):
+    """the fake server, dropping the index afterwards"""
+    yield fake
+    LibIOSession.set_subscription_index(enabled=False)
+
+
+def test_checks_cost_no_requests(fake):
+    """the checks are answered from the index, which follows the changes of this client"""
+    fake.subscriptions.update({("Pypi", "pandas"), ("Pypi", "numpy")})
+    LibIOSession.set_subscription_index(refresh_interval=None)
+    served = fake.requests_served
+
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_true()
+    expect(Subscribe.check_subscribed("PyPI", "numpy")).is_true()
+    expect(Subscribe.check_subscribed("pypi", "plotly")).is_false()
+    expect(fake.requests_served).equals(served)
+
+    Subscribe.subscribe("pypi", "plotly")
+    Subscribe.unsubscribe("pypi", "pandas")
+    expect(Subscribe.check_subscribed("pypi", "plotly")).is_true()
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_false()
+    expect(fake.requests_served).equals(served + 2)
+
+
+def test_async_checks_use_the_index(fake):
+    """the asyncio client answers the checks from the same index and keeps it up to date"""
+    fake.subscriptions.add(("Pypi", "pandas"))
+    LibIOSession.set_subscription_index(refresh_interval=None)
+    served = fake.requests_served
+
+    async def scenario():
+        async with AsyncSubscribe() as subs:
+            checked = await subs.check_subscribed("pypi", "pandas")
+            await subs.subscribe("pypi", "plotly")
+            await subs.unsubscribe("pypi", "pandas")
+            return (
+                checked,
+                await subs.check_subscribed("pypi", "plotly"),
+                await subs.check_subscribed("pypi", "pandas"),
+            )
+
+    expect(asyncio.run(scenario())).equals((True, True, False))
+    expect(fake.requests_served).equals(served + 2)
+
+
+def test_background_refresh_picks_external_changes(fake):
+    """changes made elsewhere show up after a refresh"""
+    LibIOSession.set_subscription_index(refresh_interval=0.05)
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_false()
+
+    fake.subscriptions.add(("Pypi", "pandas"))
+    deadline = time.monotonic() + 5
+    while not Subscribe.check_subscribed("pypi", "pandas") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    expect(Subscribe.check_subscribed("pypi", "pandas")).is_true()
+
+
+def test_refresh_keeps_changes_made_while_listing():
+    """a change made while a refresh is listing is not lost when the refresh completes"""
+    listing, release = threading.Event(), threading.Event()
+
+    def lister():
+        listing.set()
+        release.wait()
+        return [("pypi", "pandas")]
+
+    index = SubscriptionIndex(lister, refresh_interval=None)
+    refresh = threading.Thread(target=index.refresh)
+    refresh.start()
+    listing.wait()
+    index.update("pypi", "plotly", subscribed=True)
+    index.update("pypi", "pandas", subscribed=False)
+    release.set()
+    refresh.join()
+
+    expect(("pypi", "plotly") in index).is_true()
+    expect(("pypi", "pandas") in index).is_false()
+    expect(len(index)).equals(1)
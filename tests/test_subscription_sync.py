@@ -0,0 +1,75 @@
+"""Tests for the `pybraries` subscription sync, against the fake libraries.io server."""
+import asyncio
+
+from pyexpect import expect
+
+from pybraries.async_client import AsyncSubscribe
+from pybraries.subscribe import Subscribe
+
+
+def test_sync_applies_only_the_difference(fake):
+    """the subscriptions are listed once and only the differences are changed"""
+    fake.subscriptions.update({("Pypi", "pandas"), ("Pypi", "numpy"), ("NPM", "react")})
+
+    report = Subscribe.sync([("pypi", "numpy"), ("npm", "react"), ("pypi", "plotly")])
+
+    expect(report).equals(
+        {"subscribed": [("pypi", "plotly")], "unsubscribed": [("Pypi", "pandas")], "unchanged": 2, "failed": []}
+    )
+    expect(fake.subscriptions).equals({("Pypi", "numpy"), ("NPM", "react"), ("pypi", "plotly")})
+    expect(fake.requests_served).equals(3)
+
+
+def test_sync_lists_every_page(fake):
+    """the subscriptions beyond the first page are seen, so they are not subscribed again"""
+    fake.subscriptions.update(("pypi", f"pkg-{i}") for i in range(250))
+
+    report = Subscribe.sync([("pypi", f"pkg-{i}") for i in range(1, 251)], concurrency=4)
+
+    expect(report["unchanged"]).equals(249)
+    expect(report["subscribed"]).equals([("pypi", "pkg-250")])
+    expect(report["unsubscribed"]).equals([("pypi", "pkg-0")])
+    expect(len(list(Subscribe.iter_subscribed()))).equals(250)
+
+
+def test_sync_reports_failures_and_dry_runs(fake, monkeypatch):
+    """failed changes are reported, a dry run changes nothing"""
+    route = fake.route
+    monkeypatch.setattr(
+        fake, "route", lambda method, parts, query: (500, {}) if "broken" in parts else route(method, parts, query)
+    )
+    desired = [("pypi", "plotly"), ("pypi", "broken")]
+
+    expect(Subscribe.sync(desired, dry_run=True)["subscribed"]).equals([("pypi", "broken"), ("pypi", "plotly")])
+    expect(fake.subscriptions).equals(set())
+
+    report = Subscribe.sync(desired)
+    expect(report["subscribed"]).equals([("pypi", "plotly")])
+    expect(len(report["failed"])).equals(1)
+    expect(report["failed"][0][:3]).equals(("subscribe", "pypi", "broken"))
+
+
+def test_unsubscribe_is_a_single_request(fake):
+    """unsubscribing does not check the subscription first"""
+    fake.subscriptions.add(("pypi", "plotly"))
+
+    expect(Subscribe.check_subscribed("pypi", "plotly")).is_true()
+    expect(Subscribe.unsubscribe("pypi", "plotly")).equals("Successfully Unsubscribed")
+    expect(Subscribe.unsubscribe("pypi", "plotly")).to_include("unnecessary")
+    expect(Subscribe.check_subscribed("pypi", "plotly")).is_false()
+    expect(fake.requests_served).equals(4)
+
+
+def test_async_unsubscribe_is_a_single_request(fake):
+    """the asyncio client does not check the subscription first either"""
+    fake.subscriptions.add(("pypi", "plotly"))
+
+    async def scenario():
+        async with AsyncSubscribe() as subs:
+            return await subs.unsubscribe("pypi", "plotly"), await subs.unsubscribe("pypi", "plotly")
+
+    unsubscribed, unnecessary = asyncio.run(scenario())
+    expect(unsubscribed).equals("Successfully Unsubscribed")
+    expect(unnecessary).to_include("unnecessary")
+    expect(fake.subscriptions).equals(set())
+    expect(fake.requests_served).equals(2)
@@ -0,0 +1,62 @@
+"""Tests for the `pybraries` record/replay transports and the fake libraries.io server."""
+from pyexpect import expect
+
+from pybraries.remote_sess import LibIOSession
+from pybraries.search import Search
+from pybraries.subscribe import Subscribe
+from pybraries.transport import RecordingTransport, ReplayTransport, normalize_url
+
+
+def test_normalize_url_drops_api_key():
+    """the cassette key never contains the API key and ignores the parameter order"""
+    expect(normalize_url("http://h/api/pypi/flask?per_page=30&api_key=secret&page=1")).equals(
+        "http://h/api/pypi/flask?page=1&per_page=30"
+    )
+
+
+def test_fake_server_serves_search_endpoints(fake):
+    """the fake server answers the endpoints built by handle_path_params"""
+    expect(Search.project("pypi", "flask")["name"]).equals("flask")
+    expect(Search.project_dependencies("pypi", "flask")).to_include("dependencies")
+    expect(Search.user("github", "discdiver")["login"]).equals("discdiver")
+    expect(Search.repository("github", "pandas-dev", "pandas")["full_name"]).equals("pandas-dev/pandas")
+    expect(len(list(Search.iter_project_dependents("pypi", "flask")))).equals(250)
+
+
+def test_fake_server_subscriptions(fake):
+    """the fake server keeps the subscriptions in memory"""
+    Subscribe.subscribe("pypi", "pandas")
+
+    expect(fake.subscriptions).equals({("pypi", "pandas")})
+    expect(Subscribe.unsubscribe("pypi", "pandas")).equals("Successfully Unsubscribed")
+    expect(fake.subscriptions).equals(set())
+
+
+def test_fake_server_injects_rate_limits(fake):
+    """429 responses carry a Retry-After header"""
+    fake.rate_limited_rate = 1.0
+
+    expect(Search.project("pypi", "flask")).equals("")
+
+
+def test_record_then_replay(fake, tmp_path):
+    """recorded responses are replayed without the server"""
+    cassette = str(tmp_path / "cassette.jsonl")
+    LibIOSession.set_transport(RecordingTransport(cassette))
+    recorded = [Search.project("pypi", "flask"), Search.project_dependents("pypi", "flask")]
+    fake.stop()
+
+    LibIOSession.set_transport(ReplayTransport(cassette))
+    replayed = [Search.project("pypi", "flask"), Search.project_dependents("pypi", "flask")]
+
+    expect(replayed).equals(recorded)
+    expect(open(cassette).read()).not_to_contain("test-key")
+
+
+def test_replay_unknown_request(offline_session, tmp_path):
+    """requests missing from the cassette fail instead of reaching the network"""
+    cassette = tmp_path / "empty.jsonl"
+    cassette.write_text("")
+    LibIOSession.set_transport(ReplayTransport(str(cassette)))
+
+    expect(Search.project("pypi", "flask")).equals("")